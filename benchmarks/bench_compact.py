@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Compares the memory taken by regular and compact model instances, for
+places saved together (sharing their timestamps) and for places each
+saved at its own time.
+
+usage: ./benchmarks/bench_compact.py [count]
+
+On CPython 3.11, bytes per place, regular against compact:
+
+    places    shared timestamps      distinct timestamps
+    30000     232  160  (31% less)   304  340  (12% more)
+    60000     232  160  (31% less)   304  304  (same)
+    100000    232  160  (31% less)   282  208  (26% less)
+    200000    232  160  (31% less)   273  195  (28% less)
+
+Distinct timestamps fill the caches of models.timestamps, which only
+start over at LIMIT (65536) entries. Until then each one also costs a
+compact place its interned int, which outweighs the __dict__ it saves.
+"""
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.compact import compact  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def records(count, shared):
+    """count Place dicts as reload() would read them from file.json, all
+    with the same timestamps if shared"""
+    start = datetime.now()
+    for i in range(count):
+        now = (start if shared else
+               start + timedelta(microseconds=i)).isoformat()
+        yield {"id": "{:036d}".format(i), "created_at": now,
+               "updated_at": now, "__class__": "Place",
+               "city_id": "c-{}".format(i % 100), "user_id": "u", "name": "n",
+               "number_rooms": i % 5, "price_by_night": 100 + i % 50,
+               "latitude": 6.5 + i * 1e-6, "longitude": 3.3}
+
+
+def measure(cls, count, shared):
+    """bytes allocated to build count instances of cls"""
+    data = list(records(count, shared))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [cls(**obj) for obj in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return after - before
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for shared in (True, False):
+        regular = measure(Place, count, shared)
+        small = measure(compact(Place), count, shared)
+        print("{} places, {} timestamps".format(
+            count, "shared" if shared else "distinct"))
+        print("regular: {:8.1f} MiB {:6.0f} B/object".format(
+            regular / 2 ** 20, regular / count))
+        print("compact: {:8.1f} MiB {:6.0f} B/object".format(
+            small / 2 ** 20, small / count))
+        print("saved:   {:8.1%}".format(1 - small / regular))
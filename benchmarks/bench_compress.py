@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Compares compressed JSON snapshots with the raw ones at several sizes:
+the size of the file and the throughput of save() and reload(), in MiB of
+JSON per second.
+
+usage: ./benchmarks/bench_compress.py [count ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine import serializers  # noqa: E402
+from bench_serializers import populate  # noqa: E402
+
+codecs = {"raw": None, "gzip-1": serializers.GzipCodec(1),
+          "gzip-6": serializers.GzipCodec(6)}
+if serializers.zstandard is not None:
+    codecs["zstd-3"] = serializers.ZstdCodec(3)
+
+
+def measure(codec, path):
+    """size of the file, seconds to save and to reload with codec"""
+    strg = FileStorage(compress=codec)
+    objects = FileStorage._FileStorage__objects
+    FileStorage._FileStorage__cache.clear()
+    strg.count()  # brings the indexes up to date off the clock
+    start = time.perf_counter()
+    strg.save()
+    saved = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    strg.reload()
+    loaded = time.perf_counter() - start
+    FileStorage._FileStorage__objects = objects
+    return os.path.getsize(path), saved, loaded
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    path = os.path.join(tempfile.mkdtemp(), "file.json")
+    FileStorage._FileStorage__file_path = path
+    for count in counts:
+        FileStorage._FileStorage__objects = {}
+        populate(count)
+        print("{} objects".format(3 * count))
+        raw = None
+        for name, codec in codecs.items():
+            size, saved, loaded = measure(codec, path)
+            raw = raw or size
+            print("  {:7s} {:8.2f} MiB ({:5.1%})  save {:6.1f} MiB/s  "
+                  "reload {:6.1f} MiB/s".format(
+                      name, size / 2 ** 20, size / raw,
+                      raw / 2 ** 20 / saved, raw / 2 ** 20 / loaded))
+            os.remove(path)
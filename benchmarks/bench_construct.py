@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Compares the ways of building instances from stored dicts, as reload()
+does: the kwargs constructor, from_dict() one record at a time, and
+from_records() over the whole list.
+
+usage: ./benchmarks/bench_construct.py [count]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def records(count):
+    """count dicts as Place.to_dict() gives them"""
+    now = datetime.now().isoformat()
+    return [{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now,
+             "__class__": "Place", "name": "Place {}".format(i),
+             "city_id": "c{}".format(i % 100), "price_by_night": i % 200,
+             "amenity_ids": []} for i in range(count)]
+
+
+def timed(build, dicts):
+    """seconds build(dicts) takes"""
+    start = time.perf_counter()
+    build(dicts)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    FileStorage._FileStorage__objects = {}
+    dicts = records(count)
+    ways = {"kwargs": lambda dicts: [Place(**dic) for dic in dicts],
+            "from_dict": lambda dicts: [Place.from_dict(dic)
+                                        for dic in dicts],
+            "from_records": Place.from_records}
+    print("{} records".format(count))
+    for name, build in ways.items():
+        seconds = timed(build, dicts)
+        print("{:12s} {:7.3f} s  {:6.0f} ns/record".format(
+            name, seconds, seconds / count * 1e9))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compares the snapshot formats of FileStorage: the size of the file, the
+time save() takes to write it whole and the time reload() takes to read
+it back.
+
+usage: ./benchmarks/bench_serializers.py [count]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.serializers import formats  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def populate(count):
+    """creates count places, reviews and users"""
+    for i in range(count):
+        user = User()
+        user.email = "u{}@hbnb.io".format(i)
+        user.first_name = "User{}".format(i)
+        place = Place()
+        place.user_id = user.id
+        place.name = "Place {}".format(i)
+        place.price_by_night = 50 + i % 200
+        place.latitude = 6.5 + i * 1e-5
+        place.amenity_ids = ["a{}".format(i % 7), "b{}".format(i % 11)]
+        review = Review()
+        review.place_id = place.id
+        review.user_id = user.id
+        review.text = "Quiet and clean, would stay again."
+
+
+def measure(name, path):
+    """size of the file, seconds to save and to reload in format name"""
+    strg = FileStorage(serializer=name)
+    objects = FileStorage._FileStorage__objects
+    FileStorage._FileStorage__cache.clear()
+    strg.count()  # brings the indexes up to date off the clock
+    start = time.perf_counter()
+    strg.save()
+    saved = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    strg.reload()
+    loaded = time.perf_counter() - start
+    FileStorage._FileStorage__objects = objects
+    return os.path.getsize(path), saved, loaded
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    path = os.path.join(tempfile.mkdtemp(), "file.json")
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    populate(count)
+    print("{} objects".format(3 * count))
+    for name in formats:
+        size, saved, loaded = measure(name, path)
+        print("{:7s} {:8.1f} MiB  save {:6.3f} s  reload {:6.3f} s".format(
+            name, size / 2 ** 20, saved, loaded))
+        os.remove(path)
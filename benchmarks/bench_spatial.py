@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Compares the spatial index of the places with a full scan: places
+within a radius (with a haversine on every place for the scan) and within
+a bounding box, over places spread across Nigeria.
+
+usage: ./benchmarks/bench_spatial.py [count]
+"""
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.engine.spatial import Grid, distance, inside  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def places(count):
+    """count places at random positions"""
+    rand = random.Random(0)
+    return Place.from_records(
+        {"id": str(uuid.uuid4()), "latitude": rand.uniform(4.3, 13.9),
+         "longitude": rand.uniform(2.7, 14.6)} for _ in range(count))
+
+
+def timed(function, repeat):
+    """seconds a call of function takes, on average, and its result"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    objs = places(count)
+    grid = Grid()
+    start = time.perf_counter()
+    for obj in objs:
+        grid.add(obj, obj.latitude, obj.longitude)
+    print("{} places indexed in {:.2f} s".format(
+        count, time.perf_counter() - start))
+    lagos = (6.5244, 3.3792)
+    box = (6.4, 3.2, 6.7, 3.6)
+    queries = {
+        "near 5 km": (
+            lambda: grid.near(*lagos, 5),
+            lambda: sorted((distance(*lagos, o.latitude, o.longitude), o.id)
+                           for o in objs
+                           if distance(*lagos, o.latitude, o.longitude) <= 5)),
+        "within box": (
+            lambda: grid.box(*box),
+            lambda: [o for o in objs
+                     if inside(o.latitude, o.longitude, *box)]),
+    }
+    for name, (indexed, scan) in queries.items():
+        fast, found = timed(indexed, 100)
+        slow, expected = timed(scan, 1)
+        assert len(found) == len(expected)
+        print("{:10s} {:5d} found  index {:8.3f} ms  scan {:8.1f} ms".format(
+            name, len(found), fast * 1e3, slow * 1e3))
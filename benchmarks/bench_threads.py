@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Hammers one FileStorage from several threads at once: writers create
+and update users and save, readers look them up. Reports the throughput
+and checks that the store and the file agree once all threads are done.
+
+usage: ./benchmarks/bench_threads.py [threads] [operations per thread]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def writer(strg, count, errors):
+    """creates count users, updating and saving each one"""
+    try:
+        for i in range(count):
+            user = User()
+            user.first_name = "n{}".format(i)
+            if i % 10 == 0:
+                strg.save()
+    except Exception as error:
+        errors.append(error)
+
+
+def reader(strg, count, errors):
+    """runs count lookups of users by class and by id"""
+    try:
+        for i in range(count):
+            users = strg.all(User)
+            for obj in list(users.values())[:10]:
+                strg.get(User, obj.id)
+    except Exception as error:
+        errors.append(error)
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    path = os.path.join(tempfile.mkdtemp(), "file.json")
+    FileStorage._FileStorage__file_path = path
+    FileStorage._FileStorage__objects = {}
+    strg = FileStorage()
+    errors = []
+    workers = [threading.Thread(target=writer, args=(strg, count, errors))
+               for i in range(threads // 2)]
+    workers += [threading.Thread(target=reader, args=(strg, count, errors))
+                for i in range(threads - threads // 2)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    strg.save()
+    elapsed = time.perf_counter() - start
+    with open(path) as fil:
+        stored = len(json.load(fil))
+    expected = threads // 2 * count
+    print("{} threads, {} operations each".format(threads, count))
+    print("elapsed: {:8.2f} s {:8.0f} operations/s".format(
+        elapsed, threads * count / elapsed))
+    print("errors:  {:8d}".format(len(errors)))
+    print("stored:  {:8d} of {}".format(stored, expected))
+    os.remove(path)
+    sys.exit(1 if errors or stored != expected else 0)
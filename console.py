@@ -25,6 +25,13 @@ def get_type(data: str):
             return str
 
 
+def read_only(obj, name):
+    """True if name is a property of the class of obj without a setter,
+    such as the relationship lists (User.places, Place.reviews...)"""
+    attr = getattr(type(obj), name, None)
+    return isinstance(attr, property) and attr.fset is None
+
+
 def extract_words(input_string):
     """Extracts command arguments from the interpreter correctly.
     This is to allow the use of multiple words in quites as argument."""
@@ -53,7 +60,8 @@ class HBNBCommand(cmd.Cmd):
     prompt = "(hbnb) "
     modelnames = ('Amenity', 'BaseModel', 'City', 'Place',
                   'Review', 'State', 'User')
-    cmdnames = ('all', 'destroy', 'show', 'count', 'update')
+    cmdnames = ('all', 'destroy', 'show', 'count', 'update', 'where',
+                'search')
 
     def default(self, line):
         """Overrides the default() method to allow/support different format
@@ -85,25 +93,26 @@ class HBNBCommand(cmd.Cmd):
         """counts number of instances
         <classname>.count()
         """
-        objs = storage.all()
         if not arg:
             print("** class name missing **")
         elif arg not in self.modelnames:
             print("** class doesn't exist **")
         else:
-            i = 0
-            for key, value in objs.items():
-                if arg in key:
-                    i += 1
-            print(i)
+            print(storage.count(arg))
 
     def emptyline(self) -> bool:
         return False
 
+    def precmd(self, line):
+        """picks up what other processes saved before running a command"""
+        storage.refresh()
+        return line
+
     def do_quit(self, arg):
         """Quits the interpreter:
         quit
         """
+        storage.close()
         return True
 
     def do_EOF(self, arg):
@@ -111,6 +120,7 @@ class HBNBCommand(cmd.Cmd):
         EOF
         """
         print()
+        storage.close()
         return True
 
     def do_create(self, arg):
@@ -141,11 +151,11 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            objs = storage.all()
-            if f"{args[0]}.{args[1]}" not in objs.keys():
+            obj = storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
             else:
-                print(objs[f"{args[0]}.{args[1]}"])
+                print(obj)
 
     def do_destroy(self, arg):
         """deletes an instance
@@ -161,12 +171,12 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            objs = storage.all()
-            if f"{args[0]}.{args[1]}" not in objs.keys():
+            obj = storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
             else:
-                del objs[f"{args[0]}.{args[1]}"]
-                storage.save_changes(objs)
+                storage.delete(obj)
+                storage.save()
 
     def do_all(self, arg):
         """prints string repr of instances based or not
@@ -183,11 +193,66 @@ on class name:
         elif arg not in self.modelnames:
             print("** class doesn't exist **")
         else:
-            for key, value in objs.items():
-                if arg in key:
-                    lis.append(str(value))
+            for value in storage.all(arg).values():
+                lis.append(str(value))
         print(lis)
 
+    def do_where(self, arg):
+        """prints string repr of the instances of a class matching every
+        condition, <attribute>[__<lt|le|gt|ge|eq|ne>]=<value> or
+        <attribute>__<all|any>=<value>[|<value>...] on a list, sorted by
+        order_by=[-]<attribute> and cut at limit=<count> if given:
+        where <classname> [<condition> ...]
+                or
+        <classname>.where(<condition>, ...)
+        """
+        args = extract_words(arg)
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        else:
+            query = storage.query(args[0])
+            conditions = {}
+            try:
+                for word in args[1:]:
+                    name, sep, value = word.partition("=")
+                    if not sep:
+                        raise ValueError(f"invalid condition: {word}")
+                    if name == "order_by":
+                        query = query.order_by(value)
+                    elif name == "limit":
+                        query = query.limit(int(value))
+                    elif name.endswith(("__all", "__any")):
+                        conditions[name] = value.split("|")
+                    else:
+                        conditions[name] = get_type(value)(value)
+                print([str(obj) for obj in query.where(**conditions)])
+            except ValueError as err:
+                print(f"** {err} **")
+
+    def do_search(self, arg):
+        """prints string repr of the instances of a class whose text holds
+        any of the words, the most relevant first:
+        search <classname> <words>
+                or
+        <classname>.search("<words>")
+        """
+        args = extract_words(arg)
+        if len(args) < 1:
+            print("** class name missing **")
+        elif args[0] not in self.modelnames:
+            print("** class doesn't exist **")
+        elif len(args) < 2:
+            print("** search text missing **")
+        else:
+            try:
+                found = storage.search(args[0], " ".join(args[1:]))
+            except ValueError as err:
+                print(f"** {err} **")
+            else:
+                print([str(obj) for obj in found])
+
     def do_update(self, arg):
         """updates an instance attribute
         update <classname> <id> <attribute> <value>
@@ -204,8 +269,8 @@ on class name:
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            objs = storage.all()
-            if f"{args[0]}.{args[1]}" not in objs.keys():
+            obj = storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
             elif len(args) < 3:
                 print("** attribute name missing **")
@@ -214,21 +279,29 @@ on class name:
             else:  # NOTE: id, created_at and updated_at aren't updated
                 regexp = r"({.*?})"  # dicts only
                 matches = re.findall(regexp, arg)
-                obj = objs[f"{args[0]}.{args[1]}"]
                 if matches:  # UPDATE id {name: John}
                     dict_ = json.loads(matches[0])  # Only 1 dict expected
-                    for key, value in dict_.items():
-                        # Get the type of the dit item, default type is str
-                        type_ = type(dict_.get(key) or "")
-                        v = type_(value)
-                        setattr(objs[f"{args[0]}.{args[1]}"], key, v)
+                    fixed = [key for key in dict_ if read_only(obj, key)]
+                    if fixed:  # checked before any attribute is set
+                        print(f"** {fixed[0]} can't be updated **")
+                        return
+                    # All the attributes are saved at once, or none is
+                    with storage.batch():
+                        for key, value in dict_.items():
+                            # Get the type of the dit item, default is str
+                            type_ = type(dict_.get(key) or "")
+                            v = type_(value)
+                            setattr(obj, key, v)
+                        storage.save()
+                elif read_only(obj, args[2]):
+                    print(f"** {args[2]} can't be updated **")
                 else:  # UPDATE id first_name michael
                     type_ = type(getattr(obj, args[2], ""))
                     v = type_(args[3])
                     if type_ is str:
                         v = get_type(args[3])(args[3])
-                    setattr(objs[f"{args[0]}.{args[1]}"], args[2], v)
-                storage.save_changes(objs)
+                    setattr(obj, args[2], v)
+                    storage.save()
 
     def do_cls(self, arg):
         """clears the screen: CLS"""
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""Converts a FileStorage snapshot from one format to another:
+
+    ./convert.py <source> <target> <json|pickle|mmap>
+
+The source can be in any format and compression. Importing models reloads
+the storage, which is set lazy here so that ./file.json isn't read for
+nothing.
+"""
+import os
+import sys
+
+os.environ.setdefault("HBNB_LAZY", "1")
+from models.engine.serializers import convert, formats  # noqa: E402
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[3] not in formats:
+        print("usage: ./convert.py <source> <target> <{}>".format(
+            "|".join(formats)))
+        sys.exit(2)
+    convert(*sys.argv[1:])
@@ -1,6 +1,24 @@
 #!/usr/bin/env python3
 """The models package"""
 from models.engine.file_storage import FileStorage
+from os import getenv
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(getenv("HBNB_SQLITE_PATH", "hbnb.db"))
+else:
+    shards = getenv("HBNB_SHARDS")  # "1", or such as "Review=8,Place=4"
+    if shards is not None:
+        shards = {name: int(count) for name, _, count in
+                  (item.partition("=") for item in shards.split(","))
+                  if count}
+    storage = FileStorage(journal=getenv("HBNB_JOURNAL") == "1",
+                          lazy=getenv("HBNB_LAZY") == "1",
+                          compact=getenv("HBNB_COMPACT") == "1",
+                          columnar=getenv("HBNB_COLUMNAR") == "1",
+                          checksum=getenv("HBNB_CHECKSUM") == "1",
+                          background=getenv("HBNB_ASYNC") == "1",
+                          shards=shards,
+                          serializer=getenv("HBNB_SERIALIZER", "json"),
+                          compress=getenv("HBNB_COMPRESS") or None)
 storage.reload()
@@ -6,3 +6,9 @@ from models.base_model import BaseModel
 class Amenity(BaseModel):
     """The Amenity class"""
     name = ""
+
+    @property
+    def places(self):
+        """The Place instances offering this Amenity"""
+        from models import storage
+        return storage.related("Place", "amenity_ids", self.id)
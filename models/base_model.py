@@ -3,6 +3,7 @@
 
 
 from datetime import datetime
+from models.timestamps import isoformat, parse
 import uuid
 
 
@@ -25,10 +26,52 @@ class BaseModel:
             if key == "__class__":
                 continue
             if key == "created_at" or key == "updated_at":
-                setattr(self, key, datetime.fromisoformat(value))
+                if isinstance(value, str):
+                    value = parse(value)
+                setattr(self, key, value)
                 continue
             setattr(self, key, value)
 
+    @classmethod
+    def from_dict(cls, dic):
+        """builds the instance described by dic, a to_dict() result, as
+        the kwargs constructor would"""
+        return cls.from_records((dic,))[0]
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the list of the instances described by the dicts of
+        records, in bulk: the attributes of each go to __dict__ at once,
+        without a setattr (and its storage hooks) per key"""
+        global storage
+        from models import storage
+
+        new = object.__new__
+        install = object.__setattr__
+        objs = []
+        for dic in records:
+            attrs = dic.copy()
+            attrs.pop("__class__", None)
+            created = attrs.get("created_at")
+            if type(created) is str:
+                attrs["created_at"] = parse(created)
+            updated = attrs.get("updated_at")
+            if type(updated) is str:
+                attrs["updated_at"] = parse(updated)
+            obj = new(cls)
+            install(obj, "__dict__", attrs)
+            objs.append(obj)
+        return objs
+
+    def __setattr__(self, name, value):
+        """sets the attribute and flags the instance as changed so the
+        storage engine only re-serializes what was touched"""
+        if storage.batching and "id" in self.__dict__:
+            storage.changing(self, name)
+        super().__setattr__(name, value)
+        if "id" in self.__dict__:
+            storage.modified(self, name)
+
     def __str__(self):
         """str representation of the object"""
         return f"""[{self.__class__.__name__}] ({self.id}) {self.__dict__}"""
@@ -43,6 +86,6 @@ class BaseModel:
         all keys/values of __dict__"""
         dic = self.__dict__.copy()
         dic['__class__'] = self.__class__.__name__
-        dic['created_at'] = dic['created_at'].isoformat()
-        dic['updated_at'] = dic['updated_at'].isoformat()
+        dic['created_at'] = isoformat(dic['created_at'])
+        dic['updated_at'] = isoformat(dic['updated_at'])
         return dic
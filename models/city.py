@@ -7,3 +7,9 @@ class City(BaseModel):
     """The City class"""
     name = ""
     state_id = ""  # will be State.id
+
+    @property
+    def places(self):
+        """The Place instances located in this City"""
+        from models import storage
+        return storage.related("Place", "city_id", self.id)
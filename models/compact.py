@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Compact, __slots__ based variants of the model classes.
+
+compact(Place) returns a class standing in for Place, still named Place,
+whose declared attributes (city_id, name, ...) live in slots, and whose
+instances have no __dict__ at all. It is not a subclass of Place: any base
+without __slots__, as the model classes are, would give every instance a
+__dict__ again, so the methods and properties of Place and its bases are
+copied onto a class deriving from Compact alone. Its created_at/updated_at
+are kept as integer
+microseconds since the epoch and only turned into datetime objects when
+read. Attributes that are not declared on the class, such as those set by
+the console's update, go to a dict of extras only created when needed. A
+declared OwnList, such as amenity_ids, holds an OwnedList in its slot, as
+the regular class does in __dict__.
+"""
+from models import base_model
+from models.place import OwnList
+from models.timestamps import from_micros, isoformat, to_micros
+
+_compacts = {}
+
+
+def compact(cls):
+    """Returns the compact variant of the model class cls"""
+    if cls in _compacts:
+        return _compacts[cls]
+    defaults = {}
+    namespace = {}
+    for klass in reversed(cls.__mro__[:-1]):
+        for name, value in vars(klass).items():
+            if name in vars(Compact) or name in ("__dict__", "__weakref__"):
+                continue  # what Compact does differently, or a __dict__
+            if name.startswith("_") or callable(value) or isinstance(
+                    value, (property, classmethod, staticmethod)):
+                namespace[name] = value
+            else:
+                defaults[name] = getattr(klass, name)
+    slots = ("id", "_created", "_updated", "_extra") + tuple(defaults)
+    namespace.update({"__slots__": slots, "__doc__": cls.__doc__,
+                      "__module__": __name__,
+                      "__qualname__": cls.__qualname__,
+                      "_defaults": defaults})
+    _compacts[cls] = type(cls.__name__, (Compact,), namespace)
+    return _compacts[cls]
+
+
+class Compact:
+    """Base of all compact model classes, holding what they do unlike
+    BaseModel"""
+    __slots__ = ()
+    _defaults = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the list of the instances described by the dicts of
+        records: they have no __dict__ to install, so each is built by
+        the kwargs constructor"""
+        return [cls(**dic) for dic in records]
+
+    def __getattr__(self, name):
+        """looks up the extra attributes, then falls back on the class
+        default of a declared attribute whose slot was never set"""
+        if not name.startswith("_"):
+            try:
+                return self._extra[name]
+            except (AttributeError, KeyError):
+                pass
+        try:
+            value = self._defaults[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        if isinstance(value, OwnList):  # a list of its own, once changed
+            return value.default(self)
+        return value
+
+    def __setattr__(self, name, value):
+        """sets the attribute and flags the instance as changed"""
+        storage = base_model.storage
+        if storage.batching and hasattr(self, "id"):
+            storage.changing(self, name)
+        if name in self._defaults or \
+                name in ("id", "created_at", "updated_at"):
+            default = self._defaults.get(name)
+            if isinstance(default, OwnList):
+                value = default.own(self, value, self.__slot(name))
+            object.__setattr__(self, name, value)
+        else:
+            try:
+                self._extra[name] = value
+            except AttributeError:
+                object.__setattr__(self, "_extra", {name: value})
+        try:
+            object.__getattribute__(self, "id")
+        except AttributeError:
+            return
+        storage.modified(self, name)
+
+    def __delattr__(self, name):
+        """deletes a declared or an extra attribute"""
+        if name in self._defaults:
+            old = self.__slot(name)
+            object.__delattr__(self, name)
+            default = self._defaults[name]
+            if isinstance(default, OwnList):
+                default.own(self, None, old)
+        else:
+            try:
+                del self._extra[name]
+            except (AttributeError, KeyError):
+                raise AttributeError(name) from None
+
+    def _assigned(self, name):
+        """False if the declared attribute name still is the class
+        default"""
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    def __slot(self, name):
+        """the value in the slot name, None if it is not set"""
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            return None
+
+    @property
+    def created_at(self):
+        """creation time, as a datetime"""
+        return from_micros(self._created)
+
+    @created_at.setter
+    def created_at(self, value):
+        """stores the creation time as microseconds"""
+        object.__setattr__(self, "_created", to_micros(value))
+
+    @property
+    def updated_at(self):
+        """time of the last update, as a datetime"""
+        return from_micros(self._updated)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        """stores the time of the last update as microseconds"""
+        object.__setattr__(self, "_updated", to_micros(value))
+
+    def attrs(self):
+        """the attributes that a regular instance would hold in __dict__"""
+        dic = {"id": self.id, "created_at": self.created_at,
+               "updated_at": self.updated_at}
+        for name in self._defaults:
+            try:
+                dic[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        try:
+            dic.update(self._extra)
+        except AttributeError:
+            pass
+        return dic
+
+    def __str__(self):
+        """str representation of the object"""
+        return f"""[{self.__class__.__name__}] ({self.id}) {self.attrs()}"""
+
+    def to_dict(self):
+        """returns a dictionary containing all the attributes"""
+        dic = self.attrs()
+        dic['__class__'] = self.__class__.__name__
+        dic['created_at'] = isoformat(dic['created_at'])
+        dic['updated_at'] = isoformat(dic['updated_at'])
+        return dic
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Membership bitmaps over a list attribute of the stored instances.
+
+A Bitmaps index gives each instance a row number, reused once the instance
+is dropped, and keeps for every value found in the lists (such as an
+Amenity id in Place.amenity_ids) the set of the rows holding it as the
+bits of a Python int. "Has WiFi and a pool" is then the AND of two ints,
+"has WiFi or a pool" their OR, run over a machine word of rows at a time
+instead of testing the list of every instance. Setting a bit copies the
+whole int, so additions are held apart until the next lookup, and set in
+one pass over a byte array per value.
+"""
+
+
+class Bitmaps:
+    """The instances holding each value in a list attribute, as bitmaps
+    of their rows"""
+
+    def __init__(self):
+        """an empty index"""
+        self.bits = {}  # value -> int, bit <row> set if the row holds it
+        self.pending = {}  # value -> rows not set in bits yet
+        self.held = {}  # id -> the values it holds
+        self.rows = {}  # id -> row
+        self.objs = []  # row -> obj, None when the row is free
+        self.free = []
+
+    def __len__(self):
+        """the number of instances indexed"""
+        return len(self.rows)
+
+    def add(self, obj, values):
+        """indexes obj under the strings in the list values"""
+        self.discard(obj.id)
+        if not isinstance(values, list):
+            return
+        values = tuple(dict.fromkeys(
+            value for value in values if value and isinstance(value, str)))
+        if self.free:
+            row = self.free.pop()
+            self.objs[row] = obj
+        else:
+            row = len(self.objs)
+            self.objs.append(obj)
+        self.rows[obj.id] = row
+        self.held[obj.id] = values
+        for value in values:
+            self.pending.setdefault(value, []).append(row)
+
+    def discard(self, id_):
+        """drops the instance of id_, if indexed"""
+        row = self.rows.pop(id_, None)
+        if row is None:
+            return
+        self.settle()
+        bit = 1 << row
+        for value in self.held.pop(id_):
+            bits = self.bits[value] & ~bit
+            if bits:
+                self.bits[value] = bits
+            else:
+                del self.bits[value]
+        self.objs[row] = None
+        self.free.append(row)
+
+    @property
+    def settled(self):
+        """False while there are additions to set"""
+        return not self.pending
+
+    def settle(self):
+        """sets the bits of the pending additions"""
+        pending, self.pending = self.pending, {}
+        size = (len(self.objs) + 7) // 8
+        for value, rows in pending.items():
+            buffer = bytearray(size)
+            for row in rows:
+                buffer[row >> 3] |= 1 << (row & 7)
+            self.bits[value] = self.bits.get(value, 0) | \
+                int.from_bytes(buffer, "little")
+
+    def having(self, all_of=(), any_of=None):
+        """Returns the instances holding every value of all_of and, if
+        any_of is given, at least one of any_of, in the order of their
+        rows. The index must be settled"""
+        mask = None
+        for value in dict.fromkeys(all_of):
+            bits = self.bits.get(value, 0)
+            mask = bits if mask is None else mask & bits
+            if not mask:
+                return []
+        if any_of is not None:
+            bits = 0
+            for value in dict.fromkeys(any_of):
+                bits |= self.bits.get(value, 0)
+            mask = bits if mask is None else mask & bits
+        if mask is None:
+            mask = (1 << len(self.objs)) - 1
+        return [self.objs[row] for row in self.__members(mask)
+                if self.objs[row] is not None]
+
+    @staticmethod
+    def __members(mask):
+        """yields the rows whose bit is set in mask, lowest first, in one
+        pass over its binary digits"""
+        digits = format(mask, "b")[::-1]
+        row = digits.find("1")
+        while row != -1:
+            yield row
+            row = digits.find("1", row + 1)
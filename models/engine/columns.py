@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Columnar storage of the numeric Place attributes.
+
+FileStorage mirrors number_rooms, number_bathrooms, max_guest,
+price_by_night, latitude and longitude of every stored Place into one
+contiguous array of doubles per attribute, so that scans such as
+"price_by_night < 100 and max_guest >= 4" run over the arrays (with numpy
+when it is installed) instead of looking attributes up on every instance.
+
+view(Place) returns a Place subclass whose instances keep those attributes
+in the columns only, as thin views over their row. scan() runs the same
+conditions over the instances themselves, for a storage keeping no
+columns.
+"""
+from array import array
+from itertools import compress, repeat
+import math
+import operator
+from models.compact import Compact
+from models.timestamps import isoformat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+operators = {"lt": operator.lt, "le": operator.le, "gt": operator.gt,
+             "ge": operator.ge, "eq": operator.eq,
+             "ne": lambda a, b: (a != b) & (a == a)}  # NaN is no number
+NAN = math.nan
+_views = {}
+
+
+def is_number(value):
+    """True if value can be stored in a column"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def tests(conditions):
+    """the (attribute, operator, value) of the conditions given to select,
+    raises ValueError on those it can't run"""
+    found = []
+    for cond, value in conditions.items():
+        name, _, op = cond.partition("__")
+        if name not in Columns.fields or (op or "eq") not in operators:
+            raise ValueError("can't scan on {}".format(cond))
+        found.append((name, operators[op or "eq"], value))
+    return found
+
+
+def scan(objs, **conditions):
+    """Returns the instances of objs matching every condition, as
+    Columns.select() would: an attribute that isn't a number never
+    matches"""
+    found = tests(conditions)
+    matching = []
+    for obj in objs:
+        for name, op, value in found:
+            attr = getattr(obj, name, None)
+            if not is_number(attr) or not op(float(attr), value):
+                break
+        else:
+            matching.append(obj)
+    return matching
+
+
+class Columns:
+    """The numeric attributes of a set of Place instances, one row each.
+    An attribute that was never assigned holds the class default, with its
+    bit set in the row's unset mask"""
+    fields = {"number_rooms": int, "number_bathrooms": int,
+              "max_guest": int, "price_by_night": int,
+              "latitude": float, "longitude": float}
+    bits = {name: 1 << i for i, name in enumerate(fields)}
+
+    def __init__(self):
+        """starts with no rows"""
+        self.data = {name: array("d") for name in self.fields}
+        self.unset = array("B")
+        self.objs = []  # row -> obj, None when the row is free
+        self.rows = {}  # obj.id -> row
+        self.free = []
+
+    def __len__(self):
+        """the number of rows in use"""
+        return len(self.rows)
+
+    def attach(self, obj):
+        """gives obj a row holding its current numeric attributes"""
+        if obj.id in self.rows:
+            self.detach(obj)
+        if self.free:
+            row = self.free.pop()
+            self.objs[row] = obj
+        else:
+            row = len(self.objs)
+            self.objs.append(obj)
+            for col in self.data.values():
+                col.append(NAN)
+            self.unset.append(0)
+        self.rows[obj.id] = row
+        for name in self.fields:
+            if isinstance(obj, (PlaceView, Compact)):
+                assigned = obj._assigned(name)
+            else:
+                assigned = name in obj.__dict__
+            self.put(row, name, getattr(obj, name, None), assigned)
+        if isinstance(obj, PlaceView):
+            obj._bind(self, row)
+
+    def detach(self, obj):
+        """frees the row of obj, a view gets its values back first"""
+        row = self.rows.pop(obj.id, None)
+        if row is None:
+            return
+        if isinstance(obj, PlaceView) and obj._row == row:
+            obj._unbind()
+        self.objs[row] = None
+        for col in self.data.values():
+            col[row] = NAN
+        self.free.append(row)
+
+    def update(self, obj, name):
+        """copies the attribute name of obj into its row"""
+        row = self.rows.get(obj.id)
+        if row is not None and name in self.fields:
+            self.put(row, name, getattr(obj, name, None))
+
+    def put(self, row, name, value, assigned=True):
+        """stores value, NaN standing for anything that isn't a number"""
+        self.data[name][row] = float(value) if is_number(value) else NAN
+        if assigned:
+            self.unset[row] &= ~self.bits[name]
+        else:
+            self.unset[row] |= self.bits[name]
+
+    def value(self, row, name):
+        """the value at row as the attribute's type, None if unassigned"""
+        value = self.data[name][row]
+        if self.unset[row] & self.bits[name] or value != value:
+            return None
+        return self.fields[name](value)
+
+    def select(self, **conditions):
+        """Returns the instances matching every condition, given as
+        <attribute>__<lt|le|gt|ge|eq|ne>=<number> (or <attribute>=<number>
+        for eq). Rows whose attribute isn't a number never match."""
+        found = [(self.data[name], op, value)
+                 for name, op, value in tests(conditions)]
+        if numpy is not None:
+            rows = self.__numpy_rows(found)
+        else:
+            rows = self.__rows(found)
+        return [self.objs[row] for row in rows if self.objs[row] is not None]
+
+    def __numpy_rows(self, tests):
+        """the matching rows, computed over numpy views of the arrays"""
+        mask = numpy.ones(len(self.objs), dtype=bool)
+        for col, op, value in tests:
+            mask &= op(numpy.frombuffer(col, dtype=numpy.float64), value)
+        return numpy.flatnonzero(mask).tolist()
+
+    def __rows(self, tests):
+        """the matching rows, each test run as one C level pass"""
+        rows = range(len(self.objs))
+        mask = None
+        for col, op, value in tests:
+            test = map(op, col, repeat(value))
+            mask = test if mask is None else map(operator.and_, mask, test)
+        return rows if mask is None else compress(rows, mask)
+
+
+def view(cls):
+    """Returns the class of the instances of cls (Place) that are views
+    over their row of Columns"""
+    if cls not in _views:
+        _views[cls] = type(cls.__name__, (PlaceView, cls),
+                           {"__slots__": (), "__doc__": cls.__doc__,
+                            "__module__": __name__})
+    return _views[cls]
+
+
+def _column(name, typ):
+    """the property reading and writing the attribute name of a view"""
+    def getter(self):
+        if name in self.__dict__ or self._row is None:
+            return self.__dict__.get(name, typ())
+        value = self._columns.data[name][self._row]
+        return typ() if value != value else typ(value)
+
+    def setter(self, value):
+        if self._row is None:
+            self.__dict__[name] = value
+            return
+        self._columns.put(self._row, name, value)
+        if type(value) is typ:
+            self.__dict__.pop(name, None)
+        else:
+            self.__dict__[name] = value
+    return property(getter, setter, doc="{} of the Place".format(name))
+
+
+class PlaceView:
+    """Mixin turning a Place into a view over its row of Columns"""
+    __slots__ = ("_columns", "_row")
+
+    def __init__(self, *args, **kwargs):
+        """starts unbound, with the values in __dict__"""
+        object.__setattr__(self, "_row", None)
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the list of the unbound views described by the dicts of
+        records"""
+        objs = super().from_records(records)
+        for obj in objs:
+            object.__setattr__(obj, "_row", None)
+        return objs
+
+    def _bind(self, columns, row):
+        """moves the values that columns can hold exactly to row"""
+        for name, typ in Columns.fields.items():
+            if type(self.__dict__.get(name)) is typ:
+                del self.__dict__[name]
+        object.__setattr__(self, "_columns", columns)
+        object.__setattr__(self, "_row", row)
+
+    def _unbind(self):
+        """copies the values back from the row into __dict__"""
+        for name in Columns.fields:
+            value = self._columns.value(self._row, name)
+            if name not in self.__dict__ and value is not None:
+                self.__dict__[name] = value
+        object.__setattr__(self, "_row", None)
+
+    def _assigned(self, name):
+        """False if the attribute name still is the class default"""
+        if name in self.__dict__:
+            return True
+        if self._row is None:
+            return False
+        return not self._columns.unset[self._row] & Columns.bits[name]
+
+    def attrs(self):
+        """the attributes that a regular instance would hold in __dict__"""
+        dic = self.__dict__.copy()
+        if self._row is not None:
+            for name in Columns.fields:
+                value = self._columns.value(self._row, name)
+                if name not in dic and value is not None:
+                    dic[name] = value
+        return dic
+
+    def __str__(self):
+        """str representation of the object"""
+        return f"""[{self.__class__.__name__}] ({self.id}) {self.attrs()}"""
+
+    def to_dict(self):
+        """returns a dictionary containing all the attributes"""
+        dic = self.attrs()
+        dic['__class__'] = self.__class__.__name__
+        dic['created_at'] = isoformat(dic['created_at'])
+        dic['updated_at'] = isoformat(dic['updated_at'])
+        return dic
+
+
+for name, typ in Columns.fields.items():
+    setattr(PlaceView, name, _column(name, typ))
@@ -1,59 +1,1287 @@
 #!/usr/bin/env python3
 """FileStorage module"""
+import atexit
+import hashlib
+import heapq
 import json
+import multiprocessing
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.compact import Compact, compact
+from models.engine.bitmaps import Bitmaps
+from models.engine.columns import Columns, PlaceView, scan, view
+from models.engine.locks import RWLock
+from models.engine.mapped import MappedClass, Snapshot
+from models.engine.query import Query
+from models.engine.ranges import SortedIndex
+from models.engine.spatial import Grid
+from models.engine.text import TextIndex
+from models.engine.serializers import JSONFormat, MmapFormat, codecs, \
+    detect, formats, isoformat, load, paused_gc, plain, read_all
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # no advisory locks on this platform
+    fcntl = None
+
+# foreign keys: <classname> -> {attribute: class name it refers to}
+relations = {
+    "City": {"state_id": "State"},
+    "Place": {"city_id": "City", "user_id": "User",
+              "amenity_ids": "Amenity"},
+    "Review": {"place_id": "Place", "user_id": "User"},
+}
+# ordered indexes: <classname> -> {attribute: type of its values}, the
+# attributes of BaseModel being those of every class
+ordered = {
+    "BaseModel": {"updated_at": datetime},
+    "Place": {"price_by_night": int, "max_guest": int},
+}
+# full-text indexes: <classname> -> the text attributes searched
+searchable = {
+    "Amenity": ("name",),
+    "Place": ("name", "description"),
+    "Review": ("text",),
+}
+# membership bitmaps: <classname> -> the list attributes indexed
+listed = {
+    "Place": ("amenity_ids",),
+}
+MISSING = object()  # an attribute not set on the instance itself
+FOOTER = "\n#sha256:{}\n"  # optional last line of a snapshot
+FOOTER_RE = re.compile(rb"\n#sha256:([0-9a-f]{64})\n$")
+PARALLEL = 1 << 22  # bytes of shards worth reading with a process pool
+
 
 class FileStorage:
     """The FileStorage class"""
     __file_path = "file.json"  # path to the json file
     __objects = {}  # will store all objects by <classname>.id as key
+    __dirty = {}  # <classname>.id -> obj, or None when deleted
+    __cache = {}  # <classname>.id -> (obj, its JSON) when clean
+    __packs = {}  # <classname>.id -> (obj, format, its record) when clean
+    __classes = {}  # <classname> -> {id: obj}, mirrors __objects
+    __refs = {}  # (<classname>, foreign key) -> {value: {id: obj}}
+    __links = {}  # (<classname>, foreign key) -> {id: values in __refs}
+    __columns = Columns()  # numeric attributes of every Place
+    __sorted = {}  # (<classname>, attribute) -> SortedIndex, see ordered
+    __grid = Grid()  # every Place by latitude and longitude
+    __texts = {}  # <classname> -> TextIndex, see searchable
+    __bitmaps = {}  # (<classname>, attribute) -> Bitmaps, see listed
+    __built = set()  # the kinds of indexes kept up to date, see __ensure
+    __indexed = None  # the __objects dict the indexes were built from
+    __raw = {}  # <classname> -> {<classname>.id: dict} not yet built
+    __mutable = {}  # <classname>.id -> (obj, JSON of its lists and dicts)
+    __lock = RWLock()  # read for lookups, write for changes
+    __saving = threading.RLock()  # one save at a time
+    __flocked = threading.local()  # nesting of __locked() per thread
+    __seen = {}  # path -> (stat of the snapshot, {journal inode: offset})
+
+    def __init__(self, journal=False, threshold=1 << 20, lazy=False,
+                 compact=False, columnar=False, checksum=False,
+                 background=False, interval=1.0, limit=1000, shards=None,
+                 workers=None, serializer="json", compress=None):
+        """Sets up the storage. With journal set, save() appends the changed
+        objects to <__file_path>.journal instead of rewriting the snapshot,
+        and the log is folded back into the snapshot in the background once
+        it grows past threshold bytes. With lazy set, reload() only takes
+        note of the file, which is read on first use, and instances are
+        built the first time they are looked up. With compact set, reloaded
+        instances use the __slots__ based classes of models.compact, and
+        with columnar set the numeric attributes of every place are kept
+        in columns, which select() scans, and reloaded places are views
+        over them. The other indexes are built by the first lookup that
+        needs them, and only then kept up to date.
+        With checksum set, snapshots end with a line holding their sha256,
+        checked by reload(). With background set, save() returns at once
+        and a writer thread does the writing, coalescing the saves of
+        interval seconds, or sooner once limit objects are dirty.
+        With shards set, a dict of class name -> number of shards, every
+        class is kept in a file of its own, <stem>.<classname>.json next to
+        __file_path, or spread over <stem>.<classname>.<n>.json by a hash
+        of the id if it has more than one shard; save() only rewrites the
+        files holding changes, and reload() reads big sets of files over a
+        pool of workers processes (one per CPU if None). serializer names
+        the format of the snapshots in models.engine.serializers.formats,
+        or is such a format; any of them is read back. With lazy, "mmap"
+        snapshots are mapped and their records decoded one by one as the
+        instances are looked up. compress names the codec, in
+        models.engine.serializers.codecs, or is the codec that compresses
+        the snapshots as they are written; compressed snapshots are
+        recognized as they are read whatever the setting"""
+        if journal and shards is not None:
+            raise ValueError("the journal doesn't go with shards")
+        if isinstance(compress, str):
+            if compress not in codecs:
+                raise ValueError("no {} codec here".format(compress))
+            compress = codecs[compress]
+        self.__journal = journal
+        self.__threshold = threshold
+        self.__lazy = lazy
+        self.__compact = compact
+        self.__columnar = columnar
+        self.__checksum = checksum
+        self.__shards = shards
+        self.__workers = workers
+        if isinstance(serializer, str):
+            serializer = formats[serializer]
+        self.__format = serializer
+        if compress is not None and isinstance(serializer, MmapFormat):
+            raise ValueError("mmap snapshots can't be compressed")
+        self.__codec = compress
+        self.__background = background
+        self.__interval = interval
+        self.__limit = limit
+        self.__writer = None
+        self.__wake = threading.Event()
+        self.__requested = False  # a save() the writer hasn't done yet
+        self.__closing = False
+        self.__error = None  # raised by the writer, reported by flush()
+        self.__pending = False
+        self.__compactor = None
+        self.__undo = None  # what to roll back, while in a batch
+        self.__deferred = False  # save() was called in the batch
+        if columnar:
+            with self.__lock.write():
+                self.__ensure("columns")
+
+    @property
+    def batching(self):
+        """True inside a batch() block"""
+        return self.__undo is not None
+
+    @contextmanager
+    def batch(self):
+        """Defers save() until the block ends, then saves once. If the
+        block raises, the objects created or deleted in it, and the
+        attributes set on stored objects, are rolled back. Nested blocks
+        join the outermost one"""
+        if self.__undo is not None:
+            yield self
+            return
+        with self.__saving:  # lets a save the writer is on end first
+            self.__undo = []
+        self.__deferred = False
+        dirty = dict(self.__dirty)
+        try:
+            yield self
+        except BaseException:
+            undo, self.__undo = self.__undo, None
+            with self.__lock.write():
+                self.__rollback(undo, dirty)
+            raise
+        self.__undo = None
+        if self.__deferred:
+            self.save()
 
     def reload(self):
         """deserializes the JSON file to __objects (only if the JSON file
-        (__file_path) exists ;"""
-        temp = {}
-        if not Path(self.__file_path).is_file():
+        (__file_path) exists ; Raises ValueError, loading nothing, if the
+        file is torn or fails its checksum"""
+        if self.__lazy:
+            self.__pending = True
             return
-        with open(self.__file_path, "r") as fil:
-            temp = json.load(fil)
-        for key, obj in temp.items():
-            self.__objects[key] = globals()[obj['__class__']](**obj)
+        added = []
+        with self.__locked(shared=True), self.__lock.write():
+            try:
+                for key, obj in self.__records():
+                    if obj is None:
+                        self.__drop(key)
+                    else:
+                        self.__add(key, self.__build(obj))
+                        added.append(key)
+            except ValueError:
+                for key in added:
+                    self.__drop(key)
+                raise
+            self.__mark()
 
     def save(self):
         """serializes __objects to the JSON file (path: __file_path)"""
+        if self.__undo is not None:
+            self.__deferred = True
+            return
+        if not self.__background:
+            self.__persist()
+            return
+        self.__requested = True
+        if self.__writer is None or not self.__writer.is_alive():
+            self.__closing = False
+            self.__writer = threading.Thread(target=self.__run, daemon=True)
+            self.__writer.start()
+            atexit.register(self.close)
+        if len(self.__dirty) >= self.__limit:
+            self.__wake.set()
+
+    def flush(self):
+        """writes what the background writer still has to, before
+        returning, and raises the error it last ran into if any"""
+        with self.__saving:
+            if self.__requested:
+                self.__requested = False
+                self.__persist()
+            error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """flushes, then stops the background writer and waits for the
+        journal to be compacted if it is"""
+        writer = self.__writer
+        if writer is not None:
+            self.__closing = True
+            self.__wake.set()
+            writer.join()
+            self.__writer = None
+            atexit.unregister(self.close)
+        if self.__compactor:
+            self.__compactor.join()
+        self.flush()
+
+    def __run(self):
+        """the loop of the background writer"""
+        while not self.__closing:
+            self.__wake.wait(self.__interval)
+            self.__wake.clear()
+            with self.__saving:
+                if not self.__requested or self.__undo is not None:
+                    continue  # nothing to do, or not before the batch ends
+                self.__requested = False
+                try:
+                    self.__persist()
+                except Exception as error:
+                    self.__error = error
+
+    def __persist(self, whole=False):
+        """writes the changes since the last save, to the journal or (if
+        whole) as a whole new snapshot. The objects are serialized with
+        the lock held for reading, then written once it is released"""
+        if self.__pending:
+            with self.__lock.write():
+                self.__unread()
+        if self.__stale():
+            with self.__lock.write():
+                self.__index()
+        if self.__mutable:
+            with self.__lock.write():
+                self.__restage()
+        with self.__saving, self.__locked():
+            self.__sync()
+            if whole or not self.__journal:
+                self.__snapshot()
+            else:
+                self.__append()
+
+    def refresh(self):
+        """applies what other processes saved since this one last read or
+        wrote the file. Costs a few stat() calls when nothing changed"""
+        with self.__saving, self.__locked(shared=True):
+            self.__sync()
+
+    @contextmanager
+    def __locked(self, shared=False):
+        """holds the advisory lock of the file, <__file_path>.lock, which
+        other processes take as well around their reads and writes. A
+        thread that holds it already just goes on, and so does a reader
+        of a store with no file yet, which leaves no lock file behind"""
+        depth = getattr(self.__flocked, "depth", 0)
         fil = Path(self.__file_path)
-        if fil.is_dir() or (not fil.parent.exists()):
-            # print("File Path: {}".format(self.__file_path))
+        if fcntl is None or depth or fil.is_dir() or \
+                not fil.parent.exists() or shared and not self.__stored():
+            self.__flocked.depth = depth + 1
+            try:
+                yield
+            finally:
+                self.__flocked.depth = depth
             return
+        with open(self.__file_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self.__flocked.depth = 1
+            try:
+                yield
+            finally:
+                self.__flocked.depth = 0
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __stored(self):
+        """True if a snapshot or a journal of the store exists"""
+        return any(os.path.exists(path)
+                   for path in self.__snapshots() + self.__journals())
 
+    @staticmethod
+    def __stat(path):
+        """what tells a new version of the file at path, None if missing"""
         try:
-            with open(self.__file_path, mode="w") as fil:
-                temp = {}
-                for key, obj in self.__objects.items():
-                    temp[key] = obj.to_dict()
-                json.dump(temp, fil)
-        except (FileNotFoundError, PermissionError) as error:
-            # print("Any Here")
-            pass
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def __mark(self):
+        """notes the files as they are now, known to be in the store"""
+        offsets = {}
+        for path in self.__journals():
+            stat = self.__stat(path)
+            if stat is not None:
+                offsets[stat[0]] = stat[2]
+        self.__seen[self.__file_path] = (
+            {path: self.__stat(path) for path in self.__snapshots()},
+            offsets)
+
+    def __sync(self):
+        """applies what other processes wrote since the files were last
+        marked: the new journal lines only if the snapshot is the same,
+        else the whole snapshot and journals, dropping what they no longer
+        hold (if they were marked before, and weren't removed). With shards,
+        only the shard files that changed are read. Only the records that
+        differ from the stored objects are built, and the changes not saved
+        yet win. Call with the file lock held"""
+        if self.__pending:
+            return  # nothing read yet, the first use reads the latest
+        seen = self.__seen.get(self.__file_path)
+        stats = {path: self.__stat(path) for path in self.__snapshots()}
+        known = seen[0] if seen is not None else {}
+        changed = [path for path in stats.keys() | known.keys()
+                   if stats.get(path) != known.get(path)]
+        offsets = seen[1] if seen is not None and not changed else {}
+        if not changed and all(
+                (st is None or offsets.get(st[0]) == st[2]) for st in
+                map(self.__stat, self.__journals())):
+            return
+        with self.__lock.write():
+            keys = {}  # changed snapshot -> the keys it holds
+            for path in changed:
+                if stats.get(path) is None:
+                    continue  # removed: what it held is kept
+                keys[path] = set()
+                self.__verify(path)
+                for key, obj in load(path):
+                    keys[path].add(key)
+                    self.__apply(key, obj)
+            found = keys.get(self.__file_path)
+            for path in self.__journals():
+                st = self.__stat(path)
+                if st is None:
+                    continue
+                for key, obj in self.__replay(path, offsets.get(st[0], 0)):
+                    if found is not None and obj is None:
+                        found.discard(key)
+                    elif found is not None:
+                        found.add(key)
+                    self.__apply(key, obj)
+            if seen is not None and keys:
+                stored = list(self.__objects)
+                for objs in self.__raw.values():
+                    stored.extend(objs)
+                for key in stored:
+                    held = keys.get(self.__shard(key))
+                    if held is not None and key not in held:
+                        self.__apply(key, None)
+            self.__mark()
+
+    def __apply(self, key, obj):
+        """sets the record at key to the dict obj (None if deleted) read
+        from the files, unless it has changes not saved yet"""
+        if key in self.__dirty:
+            return
+        name = key.split(".")[0]
+        old = self.__objects.get(key)
+        if obj is None:
+            self.__raw.get(name, {}).pop(key, None)
+            if old is not None:
+                self.__drop(key)
+                self.__cache.pop(key, None)
+                self.__packs.pop(key, None)
+        elif old is None and self.__lazy:
+            self.__raw.setdefault(name, {})[key] = obj
+        elif old is None or not self.__same(key, old, obj):
+            self.__add(key, self.__build(obj))
+
+    def __same(self, key, old, obj):
+        """True if the stored object old matches the dict obj"""
+        cached = self.__cache.get(key)
+        if cached and cached[0] is old:
+            return json.dumps(obj, default=isoformat) == cached[1]
+        return old.to_dict() == plain(obj)
+
+    def __append(self):
+        """appends the changes since the last save to the journal"""
+        fil = Path(self.__file_path)
+        if fil.is_dir() or (not fil.parent.exists()):
+            return
+        with self.__lock.read():
+            if not self.__dirty:
+                return
+            lines = []
+            for key, obj in self.__dirty.items():
+                if obj and self.__objects.get(key) is not obj:
+                    continue  # __objects was swapped out from under it
+                text = self.__serialize(key, obj) if obj else "null"
+                lines.append('{{"key": {}, "obj": {}}}\n'.format(
+                    json.dumps(key), text))
+            written = self.__take()
+        try:
+            with open(self.__journals()[-1], mode="a+b") as fil:
+                if fil.tell():
+                    fil.seek(-1, os.SEEK_END)
+                    if fil.read(1) != b"\n":
+                        lines.insert(0, "\n")  # ends a torn line
+                fil.write("".join(lines).encode())
+        except BaseException:
+            self.__restore(written)
+            raise
+        self.__mark()
+        if os.path.getsize(self.__journals()[-1]) >= self.__threshold:
+            self.compact(wait=False)
+
+    def compact(self, wait=True):
+        """folds the journal into the snapshot on a background thread"""
+        if self.__compactor and self.__compactor.is_alive():
+            if not wait:
+                return
+            self.__compactor.join()
+        sealed, journal = self.__journals()
+        with self.__locked():
+            if Path(journal).is_file() and not Path(sealed).exists():
+                os.replace(journal, sealed)
+        if not Path(sealed).is_file():
+            return
+        self.__compactor = threading.Thread(target=self.__fold, daemon=True)
+        self.__compactor.start()
+        if wait:
+            self.__compactor.join()
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         key = "{}.{}".format(obj.__class__.__name__, obj.id)
-        self.__objects[key] = obj
+        with self.__lock.write():
+            self.__raw.get(obj.__class__.__name__, {}).pop(key, None)
+            if self.__undo is not None:
+                self.__undo.append(("new", key, self.__objects.get(key)))
+            self.__add(key, obj)
+            self.__dirty[key] = obj
+
+    def delete(self, obj):
+        """removes obj from __objects, the change is written by save()"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with self.__lock.write():
+            if self.__drop(key):
+                if self.__undo is not None:
+                    self.__undo.append(("delete", key, obj))
+                self.__dirty[key] = None
+                self.__cache.pop(key, None)
+                self.__packs.pop(key, None)
+
+    def modified(self, obj, name=None):
+        """flags a stored obj as changed since the last save, called by
+        BaseModel whenever one of its attributes (name) is set"""
+        cls = obj.__class__.__name__
+        key = "{}.{}".format(cls, obj.id)
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock.write():
+            self.__dirty[key] = obj
+            self.__cache.pop(key, None)
+            self.__packs.pop(key, None)
+            if name is None or key in self.__mutable or \
+                    type(self.__peek(obj, name)) in (list, dict):
+                self.__watch(key, obj)
+            built = self.__built
+            if not built:
+                return
+            self.__index()
+            if name is None or name in relations.get(cls, ()) or \
+                    name in listed.get(cls, ()):
+                self.__link(obj, kinds=None if name is None else
+                            ("relations", "listed"))
+                return
+            if "columns" in built and name in Columns.fields and \
+                    cls == "Place":
+                self.__columns.update(obj, name)
+            if "grid" in built and name in ("latitude", "longitude") and \
+                    cls == "Place":
+                self.__grid.add(obj, obj.latitude, obj.longitude)
+            if "searchable" in built and name in searchable.get(cls, ()):
+                self.__search(obj)
+            if "ordered" in built and name in self.__ordered(cls):
+                self.__sorted[cls, name].add(obj, getattr(obj, name, None))
+
+    def changing(self, obj, name):
+        """records the attribute name of obj before it is set in a batch,
+        called by BaseModel"""
+        if self.__undo is not None:
+            old = self.__peek(obj, name)
+            if isinstance(old, list):  # may be changed in place
+                old = list(old)
+            self.__undo.append(("set", obj, (name, old)))
 
-    def all(self):
-        """Returns the private objects holding all the data"""
-        return self.__objects
+    def get(self, cls, id):
+        """Returns the instance of cls (a class or a class name) with the
+        given id, None if there is none"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        self.__prepare(name, "{}.{}".format(name, id))
+        with self.__lock.read():
+            return self.__classes.get(name, {}).get(id)
+
+    def select(self, cls, **conditions):
+        """Returns the instances of cls (Place, the only class with
+        columns) matching all the conditions, e.g. price_by_night__lt=100,
+        max_guest__ge=4. The scan runs over the numeric columns if they
+        are kept (see columnar), else over the instances"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name != "Place":
+            raise ValueError("{} has no numeric columns".format(name))
+        self.__prepare(name)
+        with self.__lock.read():
+            if "columns" in self.__built:
+                return self.__columns.select(**conditions)
+            places = list(self.__classes.get(name, {}).values())
+        return scan(places, **conditions)
+
+    def related(self, cls, name, value):
+        """Returns the instances of cls whose foreign key name holds value
+        (or, for a list attribute such as amenity_ids, contains it)"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        self.__prepare(cls, kind="relations")
+        with self.__lock.read():
+            return list(
+                self.__refs.get((cls, name), {}).get(value, {}).values())
+
+    def query(self, cls):
+        """Returns the Query (see models.engine.query) of the instances of
+        cls (a class or a class name)"""
+        return Query(self, cls)
+
+    def between(self, cls, name, reverse=False, limit=None, **bounds):
+        """Returns the instances of cls (every class if None) whose
+        attribute name, one with an ordered index, is within the bounds
+        (lt, le, gt, ge or eq=<value>), sorted by it, the highest first if
+        reverse, up to limit of them. Raises ValueError if name has no
+        ordered index"""
+        for key in bounds:
+            if key not in ("lt", "le", "gt", "ge", "eq"):
+                raise ValueError("no bound {}".format(key))
+        owner = "BaseModel" if cls is None else \
+            cls if isinstance(cls, str) else cls.__name__
+        if name not in self.__ordered(owner):
+            raise ValueError("{} has no ordered index".format(name))
+        self.__prepare(None if cls is None else owner, kind="ordered")
+        while True:
+            with self.__lock.read():
+                names = list(self.__classes) if cls is None else [owner]
+                indexes = [self.__sorted[each, name] for each in names
+                           if (each, name) in self.__sorted]
+                if all(index.settled for index in indexes):
+                    found = [index.between(reverse, limit, **bounds)
+                             for index in indexes]
+                    break
+            with self.__lock.write():  # sorts the additions in first
+                for index in indexes:
+                    index.settle()
+        if len(found) == 1:
+            return found[0]
+        merged = heapq.merge(*found, reverse=reverse,
+                             key=lambda obj: (getattr(obj, name), obj.id))
+        return list(islice(merged, limit))
+
+    def unordered(self, cls, name):
+        """Returns the instances of cls whose attribute name, one with an
+        ordered index, holds no value the index can sort: None, or one of
+        another type. Raises ValueError if name has no ordered index"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        if name not in self.__ordered(cls):
+            raise ValueError("{} has no ordered index".format(name))
+        self.__prepare(cls, kind="ordered")
+        with self.__lock.read():
+            index = self.__sorted.get((cls, name))
+            return list(index.others.values()) if index else []
+
+    def within(self, south, west, north, east):
+        """Returns the places within the bounding box, in degrees, which
+        spans the antimeridian if west is greater than east"""
+        self.__prepare("Place", kind="grid")
+        with self.__lock.read():
+            return self.__grid.box(south, west, north, east)
+
+    def near(self, latitude, longitude, km, limit=None):
+        """Returns the places within km of the position, the nearest
+        first, up to limit of them"""
+        self.__prepare("Place", kind="grid")
+        with self.__lock.read():
+            return self.__grid.near(latitude, longitude, km, limit)
+
+    def search(self, cls, text, limit=None):
+        """Returns the instances of cls (a class or a class name) whose
+        text attributes (see searchable) hold any word of text, the most
+        relevant first, up to limit of them. Raises ValueError if cls has
+        no full-text index"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in searchable:
+            raise ValueError("{} has no full-text index".format(name))
+        self.__prepare(name, kind="searchable")
+        with self.__lock.read():
+            index = self.__texts.get(name)
+            return index.search(text, limit) if index else []
+
+    def having(self, cls, name, all_of=(), any_of=None):
+        """Returns the instances of cls (a class or a class name) whose
+        list attribute name (see listed) holds every value of all_of and,
+        if any_of is given, at least one of any_of, as an intersection of
+        bitmaps. Raises ValueError if name has no bitmaps"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        if name not in listed.get(cls, ()):
+            raise ValueError("{}.{} has no bitmaps".format(cls, name))
+        self.__prepare(cls, kind="listed")
+        while True:
+            with self.__lock.read():
+                index = self.__bitmaps.get((cls, name))
+                if index is None:
+                    return []
+                if index.settled:
+                    return index.having(all_of, any_of)
+            with self.__lock.write():  # sets the additions first
+                index.settle()
+
+    def all(self, cls=None):
+        """Returns the private objects holding all the data, or a new dict
+        of only the instances of cls (a class or a class name). Threads
+        sharing the storage should iterate over all(cls), or a copy of
+        all(), as other threads may change the private dict meanwhile"""
+        if cls is None:
+            self.__prepare()
+            return self.__objects
+        name = cls if isinstance(cls, str) else cls.__name__
+        self.__prepare(name)
+        with self.__lock.read():
+            return {"{}.{}".format(name, id_): obj
+                    for id_, obj in self.__classes.get(name, {}).items()}
+
+    def count(self, cls=None):
+        """Returns the number of stored instances, of cls if given"""
+        if self.__pending or self.__stale():
+            with self.__lock.write():
+                self.__unread()
+                self.__index()
+        with self.__lock.read():
+            raw = self.__raw
+            if cls is None:
+                return len(self.__objects) + sum(map(len, raw.values()))
+            name = cls if isinstance(cls, str) else cls.__name__
+            return len(self.__classes.get(name, {})) + len(raw.get(name, ()))
 
     def save_changes(self, obj):
         """when deletion/update is made, updates __objects and file"""
-        self.__objects = obj
-        self.save()
+        with self.__lock.write():
+            self.__objects = obj
+        self.__persist(whole=True)
+
+    def __snapshot(self):
+        """rewrites the whole JSON file, dropping any journal on the way"""
+        fil = Path(self.__file_path)
+        if fil.is_dir() or (not fil.parent.exists()):
+            # print("File Path: {}".format(self.__file_path))
+            return
+
+        with self.__lock.read(), paused_gc():
+            if self.__shards is None:
+                files = {self.__file_path: [i for _, i in self.__items()]}
+            else:
+                files = self.__shard_items()
+            written = self.__take()
+        try:
+            for path, temp in files.items():
+                self.__write([self.__format.dump(temp)], path)
+        except BaseException:
+            self.__restore(written)
+            raise
+        for path in self.__journals():
+            if Path(path).is_file():
+                os.remove(path)
+        self.__mark()
+
+    def __items(self, names=None):
+        """yields the keys and packed records (see the serializers) of the
+        stored objects, and of the lazy index, of the classes names (every
+        class if None)"""
+        if names is None:
+            objs = self.__objects.items()
+        else:
+            objs = (("{}.{}".format(name, id_), obj) for name in names
+                    for id_, obj in self.__classes.get(name, {}).items())
+        text = isinstance(self.__format, JSONFormat)
+        for key, obj in objs:
+            if text:
+                yield key, "{}: {}".format(json.dumps(key),
+                                           self.__serialize(key, obj))
+            else:
+                yield key, self.__pack(key, obj)
+        for name, objs in self.__raw.items():
+            if names is None or name in names:
+                for key, obj in objs.items():
+                    yield key, self.__format.pack(key, obj)
+
+    def __pack(self, key, obj):
+        """the packed record of obj in a binary format, reused from the
+        cache while obj stays clean"""
+        cached = self.__packs.get(key)
+        if cached and cached[0] is obj and cached[1] is self.__format and \
+                key not in self.__dirty:
+            return cached[2]
+        packed = self.__format.pack(key, self.__attrs(obj))
+        self.__packs[key] = (obj, self.__format, packed)
+        return packed
+
+    @staticmethod
+    def __attrs(obj):
+        """the attributes of obj as to_dict() has them, times left as
+        datetime objects"""
+        if isinstance(obj, (Compact, PlaceView)):
+            attrs = obj.attrs()
+        else:
+            attrs = dict(obj.__dict__)
+        attrs["__class__"] = obj.__class__.__name__
+        return attrs
+
+    def __shard_items(self):
+        """the items of every shard file holding changes, by path. All of
+        them the first time, when no shard file exists yet"""
+        if any(path != self.__file_path for path in self.__snapshots()):
+            files = {self.__shard(key): [] for key in self.__dirty}
+            names = {key.split(".")[0] for key in self.__dirty}
+        else:
+            files, names = {}, None
+        for key, item in self.__items(names):
+            path = self.__shard(key)
+            if names is None:
+                files.setdefault(path, [])
+            if path in files:
+                files[path].append(item)
+        return files
+
+    def __snapshots(self):
+        """paths of the snapshot files: __file_path, or the shard files
+        that exist (__file_path again if none does, to move it to shards)"""
+        if self.__shards is None:
+            return [self.__file_path]
+        fil = Path(self.__file_path)
+        paths = []
+        if fil.parent.is_dir():
+            for path in sorted(fil.parent.glob(fil.stem + ".*.json")):
+                name = path.name[len(fil.stem) + 1:].split(".")[0]
+                if isinstance(globals().get(name), type) and \
+                        issubclass(globals()[name], BaseModel):
+                    paths.append(str(path))
+        if not paths and fil.is_file():
+            paths.append(self.__file_path)
+        return paths
+
+    def __shard(self, key):
+        """path of the file holding key: __file_path, or its shard"""
+        if self.__shards is None:
+            return self.__file_path
+        name, _, id_ = key.partition(".")
+        count = self.__shards.get(name, 1)
+        if count > 1:
+            name = "{}.{}".format(name, zlib.crc32(id_.encode()) % count)
+        fil = Path(self.__file_path)
+        return str(fil.with_name("{}.{}.json".format(fil.stem, name)))
+
+    def __take(self):
+        """empties __dirty, returning what it held. Called with the lock
+        held for reading and __saving, which keep every other thread off"""
+        written = dict(self.__dirty)
+        self.__dirty.clear()
+        return written
+
+    def __restore(self, written):
+        """flags the changes taken by a save that failed as pending again,
+        unless they were changed since"""
+        with self.__lock.write():
+            for key, obj in written.items():
+                self.__dirty.setdefault(key, obj)
+
+    def __rollback(self, undo, dirty):
+        """undoes the batch changes recorded in undo, latest first, then
+        puts back the pending changes of before the batch"""
+        touched = {}
+        for action, target, value in reversed(undo):
+            if action == "new":
+                self.__drop(target)
+                if value is not None:
+                    self.__add(target, value)
+                self.__cache.pop(target, None)
+                self.__packs.pop(target, None)
+            elif action == "delete":
+                self.__add(target, value)
+            else:
+                name, old = value
+                touched[id(target)] = target
+                try:
+                    if old is MISSING:
+                        delattr(target, name)
+                    else:
+                        setattr(target, name, old)
+                except AttributeError:
+                    pass
+        for obj in touched.values():
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            if self.__objects.get(key) is obj:
+                self.__link(obj)
+        self.__dirty.clear()
+        self.__dirty.update(dirty)
+
+    @staticmethod
+    def __peek(obj, name):
+        """the attribute name of obj, MISSING if it is the class default"""
+        if isinstance(getattr(type(obj), name, None), property):
+            return getattr(obj, name)
+        if isinstance(obj, Compact):
+            try:
+                return object.__getattribute__(obj, name)
+            except AttributeError:
+                extra = getattr(obj, "_extra", {})
+                return extra.get(name, MISSING)
+        return obj.__dict__.get(name, MISSING)
+
+    def __add(self, key, obj):
+        """puts obj in __objects and in the per-class index"""
+        classes = self.__index()
+        old = self.__objects.get(key)
+        if old is not None and old is not obj:
+            self.__link(old, keep=False)
+        self.__objects[key] = obj
+        classes.setdefault(obj.__class__.__name__, {})[obj.id] = obj
+        self.__watch(key, obj)
+        self.__link(obj)
+
+    def __build(self, obj):
+        """the instance described by the dict obj"""
+        cls = globals()[obj['__class__']]
+        if self.__columnar and cls is Place:
+            return view(cls).from_dict(obj)
+        return (compact(cls) if self.__compact else cls).from_dict(obj)
+
+    def __records(self, maps=None):
+        """yields the (key, dict or None if deleted) records of the snapshot
+        followed by those of the journals, in the order to apply them.
+        Snapshots in the mmap format are mapped instead, if maps is given,
+        as a MappedClass per class name in maps"""
+        paths = [path for path in self.__snapshots() if Path(path).is_file()]
+        for path in paths:
+            self.__verify(path)
+        workers = self.__workers or os.cpu_count() or 1
+        if maps is not None:
+            for path in paths:
+                with open(path, "rb") as fil:
+                    mapped = isinstance(detect(fil), MmapFormat)
+                if not mapped:
+                    yield from load(path)
+                    continue
+                snapshot = Snapshot.open(path)
+                for name in snapshot.names():
+                    if name not in maps:
+                        maps[name] = MappedClass(snapshot, name)
+                    else:
+                        maps[name].update(MappedClass(snapshot, name))
+        elif workers > 1 and len(paths) > 1 and \
+                "fork" in multiprocessing.get_all_start_methods() and \
+                sum(map(os.path.getsize, paths)) >= PARALLEL:
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(min(workers, len(paths)),
+                                     mp_context=context) as pool:
+                for records in pool.map(read_all, paths):
+                    yield from records
+        else:
+            for path in paths:
+                yield from load(path)
+        for path in self.__journals():
+            yield from self.__replay(path)
+
+    def __unread(self):
+        """the dicts of the lazy index, reading the file on first use"""
+        if self.__pending:
+            self.__pending = False
+            raw = {}
+            with self.__locked(shared=True):
+                for key, obj in self.__records(maps=raw):
+                    objs = raw.setdefault(key.split(".")[0], {})
+                    if key in objs:
+                        del objs[key]  # without decoding a mapped record
+                    if obj is not None and key not in self.__objects:
+                        objs[key] = obj
+                self.__mark()
+            for key in self.__objects:
+                objs = raw.get(key.split(".")[0], ())
+                if key in objs:
+                    del objs[key]
+            for name, objs in raw.items():
+                if self.__raw.get(name):
+                    self.__raw[name].update(objs)
+                else:
+                    self.__raw[name] = objs
+        return self.__raw
+
+    def __unpack(self, name=None, key=None):
+        """builds the instances of class name (of every class if None, only
+        the one at key if given) still waiting in the lazy index"""
+        raw = self.__unread()
+        if not raw:
+            return
+        for name in list(raw) if name is None else [name]:
+            objs = raw.get(name, {})
+            keys = list(objs) if key is None else [key]
+            for key in keys:
+                obj = objs.pop(key, None)
+                if obj is not None:
+                    self.__add(key, self.__build(obj))
+
+    def __prepare(self, name=None, key=None, kind=None):
+        """builds the instances of the lazy index that a lookup of class
+        name (or of key) needs, and brings the indexes up to date, the
+        indexes of kind first built if they weren't, taking the lock for
+        writing only if there is anything to do"""
+        raw = self.__raw
+        if name is None:
+            waiting = any(raw.values())
+        else:
+            waiting = key in raw.get(name, ()) if key else raw.get(name)
+        if self.__pending or waiting or self.__stale() or \
+                kind is not None and kind not in self.__built:
+            with self.__lock.write():
+                self.__unpack(name, key)
+                self.__index()
+                if kind is not None:
+                    self.__ensure(kind)
+
+    def __stale(self):
+        """True if the indexes no longer match __objects"""
+        return self.__indexed is not self.__objects or \
+            sum(map(len, self.__classes.values())) != len(self.__objects)
+
+    def __drop(self, key):
+        """takes key out of __objects and the indexes, returns the object"""
+        classes = self.__index()
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            classes.get(obj.__class__.__name__, {}).pop(obj.id, None)
+            self.__mutable.pop(key, None)
+            self.__link(obj, keep=False)
+        return obj
+
+    def __index(self):
+        """the per-class index, rebuilt along with the indexes built so far
+        whenever __objects was replaced or changed behind the engine's back"""
+        classes = FileStorage.__classes
+        if self.__stale():
+            classes.clear()
+            self.__refs.clear()
+            self.__links.clear()
+            self.__sorted.clear()
+            self.__texts.clear()
+            self.__bitmaps.clear()
+            self.__mutable.clear()
+            FileStorage.__columns = Columns()
+            FileStorage.__grid = Grid()
+            for key, obj in self.__objects.items():
+                classes.setdefault(obj.__class__.__name__, {})[obj.id] = obj
+                self.__watch(key, obj)
+                self.__link(obj)
+            FileStorage.__indexed = self.__objects
+        return classes
+
+    def __ensure(self, kind):
+        """builds the indexes of kind over the stored instances if they
+        weren't, and keeps them up to date from then on. The kinds are
+        "relations", "ordered", "searchable" and "listed" (see the dicts of
+        these names), "grid", the position of the places, and "columns",
+        their numeric attributes. Call with the lock held for writing"""
+        self.__index()
+        if kind not in self.__built:
+            self.__built.add(kind)
+            for obj in self.__objects.values():
+                self.__link(obj, kinds=(kind,))
+
+    def __link(self, obj, keep=True, kinds=None):
+        """(re)indexes the foreign keys of obj, its ordered attributes, its
+        text, its lists, and its columns and position if it is a Place, in
+        the indexes built so far (of kinds only, if given, see __ensure),
+        only drops them if not keep"""
+        cls = obj.__class__.__name__
+        built = self.__built
+        kinds = built if kinds is None else built.intersection(kinds)
+        if not kinds:
+            return
+        for name in listed.get(cls, ()) if "listed" in kinds else ():
+            index = self.__bitmaps.get((cls, name))
+            if index is None:
+                index = self.__bitmaps[cls, name] = Bitmaps()
+            if keep:
+                index.add(obj, self.__peek(obj, name))
+            else:
+                index.discard(obj.id)
+        if "searchable" in kinds and cls in searchable:
+            self.__search(obj, keep)
+        for name, typ in self.__ordered(cls).items() \
+                if "ordered" in kinds else ():
+            index = self.__sorted.get((cls, name))
+            if index is None:
+                index = self.__sorted[cls, name] = SortedIndex(typ)
+            if keep:
+                index.add(obj, getattr(obj, name, None))
+            else:
+                index.discard(obj.id)
+        if cls == "Place" and "columns" in kinds:
+            if keep:
+                self.__columns.attach(obj)
+            else:
+                self.__columns.detach(obj)
+        if cls == "Place" and "grid" in kinds:
+            if keep:
+                self.__grid.add(obj, obj.latitude, obj.longitude)
+            else:
+                self.__grid.discard(obj.id)
+        for name in relations.get(cls, ()) if "relations" in kinds else ():
+            refs = self.__refs.setdefault((cls, name), {})
+            links = self.__links.setdefault((cls, name), {})
+            for value in links.pop(obj.id, ()):
+                refs[value].pop(obj.id, None)
+                if not refs[value]:
+                    del refs[value]
+            if not keep:
+                continue
+            value = self.__peek(obj, name)
+            values = value if isinstance(value, list) else [value]
+            values = tuple(dict.fromkeys(
+                v for v in values if v and isinstance(v, str)))
+            if values:
+                links[obj.id] = values
+            for value in values:
+                refs.setdefault(value, {})[obj.id] = obj
+
+    @staticmethod
+    def __mutables(obj):
+        """the JSON of the lists and dicts obj holds, None if it holds
+        none"""
+        if isinstance(obj, (Compact, PlaceView)):
+            attrs = obj.attrs()
+        else:
+            attrs = obj.__dict__
+        mutables = {name: value for name, value in attrs.items()
+                    if type(value) in (list, dict)}
+        if not mutables:
+            return None
+        return json.dumps(mutables, default=isoformat, sort_keys=True)
+
+    def __watch(self, key, obj):
+        """keeps in __mutable the JSON of the lists and dicts of obj as
+        they are now, to tell at the next save if they were changed in
+        place"""
+        text = self.__mutables(obj)
+        if text is None:
+            self.__mutable.pop(key, None)
+        else:
+            self.__mutable[key] = (obj, text)
+
+    def __restage(self):
+        """flags as changed the objects whose lists or dicts were changed
+        in place since they were watched: appending to a list sets no
+        attribute, so neither modified() nor the cached JSON know of it"""
+        for key, (obj, text) in list(self.__mutable.items()):
+            if self.__objects.get(key) is not obj:
+                del self.__mutable[key]
+            elif self.__mutables(obj) != text:
+                self.__dirty[key] = obj
+                self.__cache.pop(key, None)
+                self.__packs.pop(key, None)
+                self.__watch(key, obj)
+
+    def __search(self, obj, keep=True):
+        """(re)indexes the text attributes of obj, only drops them if not
+        keep"""
+        cls = obj.__class__.__name__
+        index = self.__texts.get(cls)
+        if index is None:
+            index = self.__texts[cls] = TextIndex()
+        if not keep:
+            index.discard(obj.id)
+            return
+        texts = (getattr(obj, name, None) for name in searchable[cls])
+        index.add(obj, " ".join(text for text in texts
+                                if isinstance(text, str)))
+
+    @staticmethod
+    def __ordered(cls):
+        """the ordered attributes of the class name cls, with their types"""
+        return dict(ordered["BaseModel"], **ordered.get(cls, {}))
+
+    def __serialize(self, key, obj):
+        """JSON text of obj, reused from the cache while obj stays clean"""
+        cached = self.__cache.get(key)
+        if cached and cached[0] is obj and key not in self.__dirty:
+            return cached[1]
+        text = json.dumps(obj.to_dict())
+        self.__cache[key] = (obj, text)
+        return text
+
+    def __journals(self):
+        """paths of the sealed (being compacted) and the active journal,
+        in the order they are to be replayed"""
+        return [self.__file_path + ".journal.1", self.__file_path + ".journal"]
+
+    @staticmethod
+    def __replay(path, offset=0):
+        """yields the (key, dict or None if deleted) records of the journal
+        at path, from the byte offset on. Torn lines, left by a crash
+        mid-append, are skipped"""
+        if not Path(path).is_file():
+            return
+        with open(path, "rb") as fil:
+            fil.seek(offset)
+            for line in fil:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield record["key"], record["obj"]
+
+    def __fold(self):
+        """merges the sealed journal into a new snapshot, then drops it.
+        The snapshot is streamed through, only the journal is held whole.
+        The merge goes to a file of its own without the file lock, which
+        is only held to swap it in, so that saves go on meanwhile: they
+        append to the active journal. It is dropped if the snapshot or
+        the sealed journal changed under it"""
+        path, sealed = self.__file_path, self.__journals()[0]
+        before = self.__stat(path), self.__stat(sealed)
+        if before[1] is None:
+            return  # folded by another process
+        fold = "{}.{}.fold".format(path, os.getpid())
+        records = self.__merge(dict(self.__replay(sealed)))
+        if isinstance(self.__format, JSONFormat):
+            self.__write(self.__stream(records), fold)
+        else:
+            self.__write([self.__format.dump(
+                self.__format.pack(key, obj) for key, obj in records)], fold)
+        with self.__locked():
+            if (self.__stat(path), self.__stat(sealed)) != before:
+                os.remove(fold)
+                return
+            seen = self.__seen.get(path)
+            current = seen is not None and seen[0] == {path: before[0]}
+            os.replace(fold, path)
+            self.__durable(path)
+            os.remove(sealed)
+            if current:
+                self.__seen[path] = ({path: self.__stat(path)}, seen[1])
+
+    def __merge(self, temp):
+        """yields the records of the snapshot with those of temp, a dict
+        of (key, dict or None if deleted), applied over them"""
+        if Path(self.__file_path).is_file():
+            self.__verify()
+            for key, obj in load(self.__file_path):
+                obj = temp.pop(key, obj)
+                if obj is not None:
+                    yield key, obj
+        for key, obj in temp.items():
+            if obj is not None:
+                yield key, obj
+
+    @staticmethod
+    def __stream(records):
+        """yields the text of the JSON object of records, bit by bit"""
+        sep = "{"
+        for key, obj in records:
+            yield "{}{}: {}".format(
+                sep, json.dumps(key), json.dumps(obj, default=isoformat))
+            sep = ", "
+        yield "{}" if sep == "{" else "}"
+
+    def __write(self, chunks, path=None):
+        """writes the chunks, texts or bytes, as the new snapshot (at path,
+        a shard, if given), atomically: they go to a temporary file, synced
+        to disk, which then replaces the snapshot, so that a crash leaves
+        either the old or the new file. They are compressed on the way if
+        a codec is set, and the checksum is that of the compressed bytes.
+        Errors are raised once the temporary file is removed"""
+        path = path or self.__file_path
+        tmp = path + ".tmp"
+        digest = hashlib.sha256()
+        packer = self.__codec and self.__codec.compressor()
+        try:
+            with open(tmp, mode="wb") as fil:
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    if packer:
+                        chunk = packer.compress(chunk)
+                    fil.write(chunk)
+                    if self.__checksum:
+                        digest.update(chunk)
+                if packer:
+                    chunk = packer.flush()
+                    fil.write(chunk)
+                    if self.__checksum:
+                        digest.update(chunk)
+                if self.__checksum:
+                    fil.write(FOOTER.format(digest.hexdigest()).encode())
+                fil.flush()
+                os.fsync(fil.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.__durable(path)
+
+    @staticmethod
+    def __durable(path):
+        """syncs the directory of path, which makes a rename to it
+        durable"""
+        try:
+            fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        except OSError:
+            return  # no directory handles on this platform
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __verify(self, path=None):
+        """raises ValueError if the snapshot (at path, a shard, if given)
+        ends with a checksum line its content doesn't match. A snapshot
+        without one is only checked as it is parsed"""
+        path = path or self.__file_path
+        with open(path, "rb") as fil:
+            start = max(0, fil.seek(0, os.SEEK_END) - 80)
+            fil.seek(start)
+            match = FOOTER_RE.search(fil.read())
+            if match is None:
+                return
+            left = start + match.start()
+            fil.seek(0)
+            digest = hashlib.sha256()
+            while left > 0:
+                chunk = fil.read(min(left, 1 << 16))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                left -= len(chunk)
+        if digest.hexdigest() != match.group(1).decode():
+            raise ValueError("{} fails its checksum".format(path))
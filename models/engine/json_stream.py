@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Incremental reading of the JSON object FileStorage writes to disk"""
+import json
+
+decoder = json.JSONDecoder()
+WHITESPACE = " \t\n\r"
+
+
+def iter_items(fil, size=1 << 16):
+    """Yields the (key, value) pairs of the JSON object in the open text
+    file fil one at a time, reading it size characters at a time, so that
+    only one record is held in memory besides the current chunk.
+    Raises ValueError if the object is malformed or cut short."""
+    reader = _Reader(fil, size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+        yield key, reader.decode()
+        if reader.expect(",}") == "}":
+            return
+
+
+class _Reader:
+    """A buffer over a text file with just enough of a tokenizer for
+    iter_items"""
+
+    def __init__(self, fil, size):
+        """wraps fil, to be read size characters at a time"""
+        self.fil = fil
+        self.size = size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        """reads the next chunk, dropping what was already consumed;
+        returns False at the end of the file"""
+        chunk = "" if self.eof else self.fil.read(self.size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """the next non blank character, without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and \
+                    self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                raise ValueError("unexpected end of JSON data")
+
+    def expect(self, chars):
+        """consumes and returns the next non blank character, which has
+        to be one of chars"""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError("expected one of {!r} at {!r}".format(
+                chars, self.buf[self.pos:self.pos + 20]))
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """decodes the next JSON value. A value ending right at the end of
+        the buffer may be cut short (e.g. a number), so more is read before
+        trusting it unless the file is exhausted"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.more():
+                    raise
+                continue
+            if end < len(self.buf) or not self.more():
+                self.pos = end
+                return value
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""A readers-writer lock for the storage engines"""
+import threading
+
+
+class RWLock:
+    """Any number of threads may hold the lock for reading at once, or a
+    single thread for writing. Both sides are reentrant, and the writer may
+    also read. Threads waiting to write go before new readers, so that a
+    stream of reads can't starve them"""
+
+    def __init__(self):
+        """starts unlocked"""
+        self.__mutex = threading.Lock()  # guards the counts below
+        self.__cond = threading.Condition(self.__mutex)
+        self.__sleeping = 0  # threads waiting on __cond
+        self.__readers = 0  # threads holding the lock for reading
+        self.__waiting = 0  # threads waiting to write
+        self.__writer = None  # ident of the thread writing
+        self.__depth = 0  # nesting of write() in the writer
+        self.__local = threading.local()  # nesting of read() per thread
+        self.__reading = _Held(self.__acquire_read, self.__release_read)
+        self.__writing = _Held(self.__acquire_write, self.__release_write)
+
+    def read(self):
+        """holds the lock for reading for the duration of the with block"""
+        return self.__reading
+
+    def write(self):
+        """holds the lock for writing for the duration of the with block.
+        Raises RuntimeError if the thread is reading, which would wait for
+        itself forever"""
+        return self.__writing
+
+    def __acquire_read(self):
+        """takes the lock for reading, unless the thread holds it already"""
+        local = self.__local
+        depth = getattr(local, "depth", 0)
+        if not depth and self.__writer != threading.get_ident():
+            with self.__mutex:
+                while self.__writer is not None or self.__waiting:
+                    self.__sleep()
+                self.__readers += 1
+            local.outer = True
+        elif not depth:
+            local.outer = False  # reading within its own write()
+        local.depth = depth + 1
+
+    def __release_read(self):
+        """lets the lock go when the outermost read() ends"""
+        local = self.__local
+        local.depth -= 1
+        if not local.depth and local.outer:
+            with self.__mutex:
+                self.__readers -= 1
+                if not self.__readers and self.__sleeping:
+                    self.__cond.notify_all()
+
+    def __acquire_write(self):
+        """takes the lock for writing, unless the thread holds it already"""
+        me = threading.get_ident()
+        if self.__writer != me:
+            if getattr(self.__local, "depth", 0):
+                raise RuntimeError("can't write while reading")
+            with self.__mutex:
+                self.__waiting += 1
+                while self.__writer is not None or self.__readers:
+                    self.__sleep()
+                self.__waiting -= 1
+                self.__writer = me
+        self.__depth += 1
+
+    def __release_write(self):
+        """lets the lock go when the outermost write() ends"""
+        self.__depth -= 1
+        if not self.__depth:
+            with self.__mutex:
+                self.__writer = None
+                if self.__sleeping:
+                    self.__cond.notify_all()
+
+    def __sleep(self):
+        """waits for a change of the counts, with __mutex held"""
+        self.__sleeping += 1
+        try:
+            self.__cond.wait()
+        finally:
+            self.__sleeping -= 1
+
+
+class _Held:
+    """The context manager of one side of an RWLock, made once: the state
+    lives in the lock, so that entering costs no new generator"""
+    __slots__ = ("acquire", "release")
+
+    def __init__(self, acquire, release):
+        """calls acquire on entering the block, release on leaving it"""
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        """takes the lock"""
+        self.acquire()
+
+    def __exit__(self, *exc):
+        """lets the lock go"""
+        self.release()
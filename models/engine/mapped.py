@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Snapshots laid out to be read in place through mmap.
+
+The file holds a header, a table of fixed size entries sorted by key, and
+the keys and records they point to, each record being the JSON of the
+to_dict() of an instance:
+
+    magic (16 bytes) | count (u64) | count x (key offset u64, key size u32,
+    record offset u64, record size u32) | keys and records
+
+A key is found by a binary search over the table, and the keys of a class
+(<classname>.<id>) are a range of it, so that nothing but the table and
+the records read need to be touched. The pages of a file mapped by many
+processes are shared through the page cache.
+"""
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+MAGIC = b"HBNB-MMAP-1\n\0\0\0\0"
+COUNT = struct.Struct("<Q")
+ENTRY = struct.Struct("<QIQI")
+HEADER = len(MAGIC) + COUNT.size
+
+
+def pack(records):
+    """the bytes of the snapshot of the (key, record) pairs, both bytes"""
+    records = sorted(records)
+    table = bytearray()
+    blob = bytearray()
+    start = HEADER + ENTRY.size * len(records)
+    for key, record in records:
+        offset = start + len(blob)
+        table += ENTRY.pack(offset, len(key), offset + len(key), len(record))
+        blob += key
+        blob += record
+    return MAGIC + COUNT.pack(len(records)) + bytes(table) + bytes(blob)
+
+
+class Snapshot:
+    """The records of a snapshot held in buffer (a mmap, or bytes)"""
+
+    def __init__(self, buffer):
+        """reads the header of buffer, raises ValueError if it isn't a
+        snapshot in this format"""
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a mapped snapshot")
+        self.buffer = buffer
+        self.count = COUNT.unpack_from(buffer, len(MAGIC))[0]
+        if HEADER + ENTRY.size * self.count > len(buffer):
+            raise ValueError("mapped snapshot cut short")
+
+    @classmethod
+    def open(cls, path):
+        """maps the file at path, read only"""
+        with open(path, "rb") as fil:
+            return cls(mmap.mmap(fil.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        """the number of records"""
+        return self.count
+
+    def __getitem__(self, i):
+        """the key of the i-th record, as bytes"""
+        offset, size, _, _ = ENTRY.unpack_from(
+            self.buffer, HEADER + ENTRY.size * i)
+        return self.buffer[offset:offset + size]
+
+    def key(self, i):
+        """the key of the i-th record"""
+        return self[i].decode()
+
+    def record(self, i):
+        """the dict of the i-th record"""
+        _, _, offset, size = ENTRY.unpack_from(
+            self.buffer, HEADER + ENTRY.size * i)
+        return json.loads(self.buffer[offset:offset + size])
+
+    def find(self, key, lo=0, hi=None):
+        """the index of key between lo and hi, -1 if it isn't there"""
+        key = key.encode()
+        hi = self.count if hi is None else hi
+        i = bisect_left(self, key, lo, hi)
+        return i if i < hi and self[i] == key else -1
+
+    def span(self, name):
+        """the range of the indexes of the records of class name"""
+        lo = bisect_left(self, name.encode() + b".")
+        return lo, bisect_left(self, name.encode() + b"/", lo)
+
+    def names(self):
+        """the class names of the records, in order"""
+        names = []
+        i = 0
+        while i < self.count:
+            names.append(self.key(i).split(".")[0])
+            i = self.span(names[-1])[1]
+        return names
+
+    def items(self):
+        """yields every (key, dict) record, in order"""
+        for i in range(self.count):
+            yield self.key(i), self.record(i)
+
+
+class MappedClass(MutableMapping):
+    """The records of the class name in a Snapshot, as the dict of key ->
+    record the lazy index of FileStorage keeps. A record is only decoded
+    when asked for; the changes are held apart from the snapshot"""
+
+    def __init__(self, snapshot, name):
+        """the records of name in snapshot, unchanged"""
+        self.snapshot = snapshot
+        self.lo, self.hi = snapshot.span(name)
+        self.removed = set()  # keys of the snapshot taken out or replaced
+        self.added = {}
+
+    def __mapped(self, key):
+        """the index of key in the snapshot, -1 if gone or not there"""
+        if key in self.removed:
+            return -1
+        return self.snapshot.find(key, self.lo, self.hi)
+
+    def __getitem__(self, key):
+        """the record at key"""
+        if key in self.added:
+            return self.added[key]
+        i = self.__mapped(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.snapshot.record(i)
+
+    def __contains__(self, key):
+        """True if there is a record at key, without decoding it"""
+        return key in self.added or self.__mapped(key) >= 0
+
+    def __setitem__(self, key, record):
+        """sets the record at key, over the snapshot's if any"""
+        if key not in self.added and self.__mapped(key) >= 0:
+            self.removed.add(key)
+        self.added[key] = record
+
+    def __delitem__(self, key):
+        """takes the record at key out"""
+        if key in self.added:
+            del self.added[key]
+        elif self.__mapped(key) >= 0:
+            self.removed.add(key)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        """the keys of the records, the snapshot's first"""
+        for i in range(self.lo, self.hi):
+            key = self.snapshot.key(i)
+            if key not in self.removed:
+                yield key
+        yield from list(self.added)
+
+    def __len__(self):
+        """the number of records"""
+        return self.hi - self.lo - len(self.removed) + len(self.added)
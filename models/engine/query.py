@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Queries over the instances of a class in a storage engine.
+
+    storage.query(Place).where(price_by_night__lt=100, city_id=city.id)
+        .order_by("-price_by_night").limit(20)
+
+Conditions are given as <attribute>__<operator>=<value>, or
+<attribute>=<value> for eq; all and any take a list of values, every one
+or one of which a list attribute must hold. A query is built step by
+step, each step returning a new query, and only runs when it is iterated
+over. It starts from the narrowest set of candidates the engine's indexes
+give: the bitmaps of a list attribute (see listed), the instances holding
+a foreign key (see relations), a range of an ordered index (see
+ordered), which also gives them in order if the query is sorted by that
+attribute alone (then followed by the instances without a value, unless
+some hold values the index can't sort), or the Place scan over the
+numeric columns for the comparisons (lt, le, gt, ge, eq) to numbers,
+else every instance of the class. The other conditions are tested on
+each candidate as the results are streamed: ne in particular, as the
+values the columns can't hold (None, text) differ from any number.
+"""
+import operator
+from itertools import chain, islice
+from models.engine.columns import Columns
+
+operators = {"lt": operator.lt, "le": operator.le, "gt": operator.gt,
+             "ge": operator.ge, "eq": operator.eq, "ne": operator.ne,
+             "in": lambda a, b: a in b,
+             "contains": lambda a, b: b in a,
+             "all": lambda a, b: all(value in a for value in b),
+             "any": lambda a, b: any(value in a for value in b)}
+MISSING = object()  # an attribute the instance doesn't have
+
+
+class Query:
+    """The instances of a class of a storage matching conditions, in some
+    order, up to some number"""
+
+    def __init__(self, storage, cls, conditions=(), order=(), count=None):
+        """the instances of cls (a class or a class name) in storage"""
+        self.storage = storage
+        self.name = cls if isinstance(cls, str) else cls.__name__
+        self.conditions = tuple(conditions)  # (name, op, value)
+        self.order = tuple(order)  # (name, descending)
+        self.count = count
+
+    def where(self, **conditions):
+        """the query narrowed to the instances matching conditions too.
+        Raises ValueError on an unknown operator"""
+        added = []
+        for cond, value in conditions.items():
+            name, _, op = cond.partition("__")
+            if not name or (op or "eq") not in operators:
+                raise ValueError("can't select on {}".format(cond))
+            added.append((name, op or "eq", value))
+        return Query(self.storage, self.name, self.conditions + tuple(added),
+                     self.order, self.count)
+
+    def order_by(self, *names):
+        """the query sorted by the attributes names, the first one first;
+        a name starting with "-" sorts in descending order. Instances
+        without the attribute come last"""
+        order = tuple((name.lstrip("-"), name.startswith("-"))
+                      for name in names)
+        return Query(self.storage, self.name, self.conditions, order,
+                     self.count)
+
+    def limit(self, count):
+        """the query stopping after count results"""
+        return Query(self.storage, self.name, self.conditions, self.order,
+                     count)
+
+    def __iter__(self):
+        """yields the results"""
+        candidates, rest, done = self.__plan()
+        results = self.__results(candidates, rest)
+        if self.order and not done:
+            results = self.__sorted(results)
+        return islice(results, self.count)
+
+    def values(self, *names):
+        """yields, for each result, the dict of its attributes names"""
+        for obj in self:
+            yield {name: getattr(obj, name, None) for name in names}
+
+    def first(self):
+        """the first result, None if there is none"""
+        return next(iter(self.limit(1)), None)
+
+    @staticmethod
+    def __results(candidates, rest):
+        """yields the candidates that match every condition of rest"""
+        for obj in candidates:
+            for name, op, value in rest:
+                try:
+                    have = getattr(obj, name, MISSING)
+                    if have is MISSING or not operators[op](have, value):
+                        break
+                except TypeError:  # such as None < 100
+                    break
+            else:
+                yield obj
+
+    def __plan(self):
+        """the candidates the indexes give, the conditions left to test on
+        them, and whether they come in the order of the query"""
+        from models.engine.file_storage import listed, ordered, relations
+        for name in listed.get(self.name, ()):
+            all_of, any_of, rest = self.__members(name)
+            if all_of or any_of is not None:
+                return self.storage.having(self.name, name, all_of,
+                                           any_of), rest, False
+        keys = relations.get(self.name, {})
+        for i, (name, op, value) in enumerate(self.conditions):
+            if not value or not isinstance(value, str):
+                continue  # the relations only index ids
+            if name in keys and (op == "eq" and name != "amenity_ids" or
+                                 op == "contains" and name == "amenity_ids"):
+                rest = self.conditions[:i] + self.conditions[i + 1:]
+                return self.storage.related(self.name, name, value), rest, \
+                    False
+        sortable = dict(ordered["BaseModel"], **ordered.get(self.name, {}))
+        if len(self.order) == 1 and self.order[0][0] in sortable:
+            name, descending = self.order[0]
+            bounds, rest = self.__bounds(name, sortable[name])
+            # the instances the index doesn't hold come last if they have
+            # no value; any other value needs the full sort
+            others = [] if bounds else \
+                self.storage.unordered(self.name, name)
+            if all(getattr(obj, name, None) is None for obj in others):
+                found = self.storage.between(
+                    self.name, name, reverse=descending,
+                    limit=None if rest else self.count, **bounds)
+                return chain(found, others), rest, True
+        for name, typ in sortable.items():
+            bounds, rest = self.__bounds(name, typ)
+            if bounds:
+                return self.storage.between(self.name, name, **bounds), \
+                    rest, False
+        if self.name == "Place":
+            scan = {"{}__{}".format(name, op): value
+                    for name, op, value in self.conditions
+                    if name in Columns.fields and
+                    op in ("lt", "le", "gt", "ge", "eq") and
+                    type(value) in (int, float)}
+            if scan:
+                rest = [cond for cond in self.conditions if "{}__{}".format(
+                    *cond[:2]) not in scan]
+                return self.storage.select(self.name, **scan), rest, False
+        return self.storage.all(self.name).values(), self.conditions, False
+
+    def __members(self, name):
+        """the values that the conditions require the list attribute name
+        to hold all of, and one of (None if they don't), and the other
+        conditions"""
+        all_of, any_of, rest = [], None, []
+        for cond in self.conditions:
+            attr, op, value = cond
+            if attr == name and op == "contains" and isinstance(value, str):
+                all_of.append(value)
+            elif attr == name and op == "all" and \
+                    isinstance(value, (list, tuple)):
+                all_of.extend(value)
+            elif attr == name and op == "any" and any_of is None and \
+                    isinstance(value, (list, tuple)):
+                any_of = list(value)
+            else:
+                rest.append(cond)
+        return all_of, any_of, rest
+
+    def __bounds(self, name, typ):
+        """the bounds on the attribute name, whose ordered index holds
+        values of typ, that the conditions give, and the other
+        conditions"""
+        bounds, rest = {}, []
+        for cond in self.conditions:
+            attr, op, value = cond
+            if typ in (int, float):
+                fits = type(value) in (int, float)
+            else:
+                fits = isinstance(value, typ)
+            if attr == name and op in ("lt", "le", "gt", "ge", "eq") and \
+                    op not in bounds and fits:
+                bounds[op] = value
+            else:
+                rest.append(cond)
+        return bounds, rest
+
+    def __sorted(self, results):
+        """the list of results in the order of the query"""
+        results = list(results)
+        for name, descending in reversed(self.order):
+            def key(obj):
+                value = getattr(obj, name, None)
+                return (value is None) != descending, value
+            try:
+                results.sort(key=key, reverse=descending)
+            except TypeError:
+                raise ValueError("can't order {} by {}".format(
+                    self.name, name)) from None
+        return results
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Ordered indexes over an attribute of the stored instances.
+
+A SortedIndex keeps the (value, id) pairs of the instances sorted in a
+list, so that a range of values, or the k lowest or highest, is found by
+bisection in O(log N + k). A change is an insertion into the list, with a
+memmove of the pointers after it. Additions are held apart until the
+next lookup, and sorted in at once if there are many of them, as when
+the indexes are rebuilt.
+"""
+from bisect import bisect_left, insort
+
+
+class _Top:
+    """Greater than any id: (value, TOP) bisects past every key of value,
+    as (value,) bisects before them, with no key function (Python 3.10)"""
+
+    def __lt__(self, other):
+        """nothing is greater"""
+        return False
+
+    def __gt__(self, other):
+        """anything else is lower"""
+        return other is not self
+
+
+TOP = _Top()
+
+
+class SortedIndex:
+    """The instances whose attribute holds a value of a type (int stands
+    for every number), sorted by it, then by id"""
+
+    def __init__(self, typ):
+        """an empty index of the values of typ"""
+        self.typ = (int, float) if typ in (int, float) else typ
+        self.keys = []  # (value, id), sorted
+        self.pending = []  # (value, id) not in keys yet
+        self.values = {}  # id -> value, in keys or pending
+        self.objs = {}  # id -> obj
+        self.others = {}  # id -> obj whose value can't be indexed
+
+    def __len__(self):
+        """the number of instances indexed"""
+        return len(self.values)
+
+    def accepts(self, value):
+        """True if value can be indexed: it compares with the others"""
+        return isinstance(value, self.typ) and not isinstance(value, bool)
+
+    def add(self, obj, value):
+        """indexes obj at value, or among the others if value can't be"""
+        self.discard(obj.id)
+        if self.accepts(value):
+            self.values[obj.id] = value
+            self.objs[obj.id] = obj
+            self.pending.append((value, obj.id))
+        else:
+            self.others[obj.id] = obj
+
+    def discard(self, id_):
+        """drops the instance of id_, if indexed"""
+        self.others.pop(id_, None)
+        value = self.values.pop(id_, None)
+        if value is None:
+            return
+        del self.objs[id_]
+        self.settle()
+        del self.keys[bisect_left(self.keys, (value, id_))]
+
+    @property
+    def settled(self):
+        """False while there are additions to sort in"""
+        return not self.pending
+
+    def settle(self):
+        """sorts the pending additions in"""
+        pending, self.pending = self.pending, []
+        if len(pending) * 32 > len(self.keys):
+            self.keys.extend(pending)
+            self.keys.sort()
+        else:
+            for key in pending:
+                insort(self.keys, key)
+
+    def between(self, reverse=False, limit=None, lt=None, le=None, gt=None,
+                ge=None, eq=None):
+        """Returns the instances whose value is within the bounds, sorted
+        by it (the highest first if reverse), up to limit of them. The
+        index must be settled. Raises ValueError on a bound of another
+        type"""
+        for bound in (lt, le, gt, ge, eq):
+            if bound is not None and not self.accepts(bound):
+                raise ValueError("{!r} is no bound here".format(bound))
+        keys = self.keys
+        if eq is not None:
+            ge = le = eq
+        lo = 0
+        if ge is not None:
+            lo = bisect_left(keys, (ge,))
+        if gt is not None:
+            lo = max(lo, bisect_left(keys, (gt, TOP)))
+        hi = len(keys)
+        if le is not None:
+            hi = min(hi, bisect_left(keys, (le, TOP), lo))
+        if lt is not None:
+            hi = min(hi, bisect_left(keys, (lt,), lo))
+        if limit is not None and hi - lo > limit:
+            lo, hi = (hi - limit, hi) if reverse else (lo, lo + limit)
+        found = keys[lo:hi] if hi > lo else []
+        if reverse:
+            found.reverse()
+        return [self.objs[id_] for _, id_ in found]
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Formats of the FileStorage snapshots.
+
+The default is JSON: one object mapping <classname>.id to the to_dict()
+of each instance. PickleFormat is a binary alternative holding a table of
+the class names and one tuple per instance: the index of its class in the
+table, its id, created_at and updated_at as integer microseconds since the
+epoch, and a dict of its other attributes, pickled with protocol 5.
+MmapFormat lays the JSON records out to be looked up in place, see
+models.engine.mapped.
+
+Any of them may be compressed, as a gzip stream or, if the zstandard
+package is installed, a zstd frame (see codecs).
+
+The formats and codecs are told apart by the first bytes of the file, so a
+file can be read without knowing which one wrote it. To convert a file:
+
+    ./convert.py <source> <target> <format>
+"""
+import gc
+import io
+import json
+import os
+import pickle
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from models import timestamps
+from models.timestamps import from_micros, parse, to_micros
+from models.engine import mapped
+from models.engine.json_stream import iter_items
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip comes with Python
+    zstandard = None
+
+SKIP = ("__class__", "id", "created_at", "updated_at")  # outside attrs
+
+
+def isoformat(value):
+    """the JSON form of the datetimes that binary records hold, as the
+    default of json.dumps"""
+    if isinstance(value, datetime):
+        return timestamps.isoformat(value)
+    raise TypeError("{!r} is not JSON serializable".format(value))
+
+
+def plain(attrs):
+    """the record attrs as to_dict() would give it, with ISO times"""
+    return {name: timestamps.isoformat(value) if isinstance(value, datetime)
+            else value for name, value in attrs.items()}
+
+
+@contextmanager
+def paused_gc():
+    """turns the cyclic garbage collector off for the block: building
+    many containers at once would otherwise set off collections that
+    walk every stored object, for nothing as the records hold no cycles"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def micros(value):
+    """the datetime, or ISO time, value as microseconds since the epoch"""
+    if type(value) is str:
+        value = parse(value)
+    return None if value is None else to_micros(value)
+
+
+class JSONFormat:
+    """The JSON object of the to_dict() of every instance by key"""
+    name = "json"
+    magic = b""  # what the file starts with, anything for JSON
+
+    def pack(self, key, attrs):
+        """the form of the record (key, attrs) that dump() takes, which
+        the storage keeps until the instance changes"""
+        return "{}: {}".format(json.dumps(key),
+                               json.dumps(attrs, default=isoformat))
+
+    def dump(self, packed):
+        """the text of the file holding the packed records"""
+        return "{" + ", ".join(packed) + "}"
+
+    def load(self, fil):
+        """yields the (key, attributes) records of the binary file fil"""
+        text = io.TextIOWrapper(fil, encoding="utf-8")
+        try:
+            yield from iter_items(text)
+        finally:
+            text.detach()  # fil is the caller's to close
+
+
+class PickleFormat:
+    """Pickled tuples with integer times and tags for the class names"""
+    name = "pickle"
+    magic = b"HBNB-PICKLE-5\n"
+
+    def pack(self, key, attrs):
+        """the form of the record (key, attrs) that dump() takes, which
+        the storage keeps until the instance changes"""
+        return (attrs.get("__class__") or key.split(".")[0], attrs["id"],
+                micros(attrs.get("created_at")),
+                micros(attrs.get("updated_at")),
+                {attr: list(value) if isinstance(value, list) else value
+                 for attr, value in attrs.items() if attr not in SKIP})
+
+    def dump(self, packed):
+        """the bytes of the file holding the packed records"""
+        tags = {}
+        with paused_gc():
+            rows = [(tags.setdefault(row[0], len(tags)),) + row[1:]
+                    for row in packed]
+            return self.magic + pickle.dumps((list(tags), rows), protocol=5)
+
+    def load(self, fil):
+        """yields the (key, attributes) records of the binary file fil.
+        The attributes hold the times as datetime objects"""
+        fil.read(len(self.magic))
+        with paused_gc():
+            names, rows = _Unpickler(fil).load()
+        for tag, id_, created, updated, attrs in rows:
+            record = {"id": id_}
+            if created is not None:
+                record["created_at"] = from_micros(created)
+            if updated is not None:
+                record["updated_at"] = from_micros(updated)
+            record.update(attrs)
+            record["__class__"] = names[tag]
+            yield "{}.{}".format(names[tag], id_), record
+
+
+class MmapFormat:
+    """A table of the keys, sorted, over the JSON of the records, which
+    a lazy FileStorage maps and reads in place (see models.engine.mapped)"""
+    name = "mmap"
+    magic = mapped.MAGIC
+
+    def pack(self, key, attrs):
+        """the form of the record (key, attrs) that dump() takes, which
+        the storage keeps until the instance changes"""
+        return key.encode(), json.dumps(attrs, default=isoformat).encode()
+
+    def dump(self, packed):
+        """the bytes of the file holding the packed records"""
+        return mapped.pack(packed)
+
+    def load(self, fil):
+        """yields the (key, attributes) records of the binary file fil"""
+        yield from mapped.Snapshot(fil.read()).items()
+
+
+class _Unpickler(pickle.Unpickler):
+    """Loads plain data only: records never refer to any class, so that
+    a crafted file can't run code"""
+
+    def find_class(self, module, name):
+        """refuses every class"""
+        raise pickle.UnpicklingError("{}.{} is not allowed".format(
+            module, name))
+
+
+formats = {"json": JSONFormat(), "pickle": PickleFormat(),
+           "mmap": MmapFormat()}
+
+
+class GzipCodec:
+    """Compresses the snapshots as a gzip stream, level 1 (fastest) to 9
+    (smallest)"""
+    name = "gzip"
+    magic = b"\x1f\x8b"
+
+    def __init__(self, level=6):
+        """compresses at level"""
+        self.level = level
+
+    def compressor(self):
+        """an object whose compress() and flush() give the stream"""
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def decompressor(self):
+        """an object whose decompress() reads the stream back"""
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class ZstdCodec:
+    """Compresses the snapshots as a zstd frame, level 1 to 22, with the
+    zstandard package"""
+    name = "zstd"
+    magic = b"\x28\xb5\x2f\xfd"
+
+    def __init__(self, level=3):
+        """compresses at level"""
+        self.level = level
+
+    def compressor(self):
+        """an object whose compress() and flush() give the frame"""
+        return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def decompressor(self):
+        """an object whose decompress() reads the frame back"""
+        return zstandard.ZstdDecompressor().decompressobj()
+
+
+codecs = {"gzip": GzipCodec()}
+if zstandard is not None:
+    codecs["zstd"] = ZstdCodec()
+
+
+class _Inflating(io.RawIOBase):
+    """The content of a compressed binary file, read as it is decompressed.
+    Whatever follows the compressed data, such as a checksum line, is left
+    out"""
+
+    def __init__(self, fil, decompressor, size=1 << 16):
+        """reads fil size bytes at a time through decompressor"""
+        self.__fil = fil
+        self.__decompressor = decompressor
+        self.__size = size
+        self.__left = b""  # decompressed, not read yet
+
+    def readable(self):
+        """True"""
+        return True
+
+    def readinto(self, buffer):
+        """fills buffer with what comes next, returns how many bytes"""
+        while not self.__left and not self.__decompressor.eof:
+            data = self.__fil.read(self.__size)
+            if not data:
+                raise ValueError("compressed snapshot cut short")
+            self.__left = self.__decompressor.decompress(data)
+        size = min(len(buffer), len(self.__left))
+        buffer[:size] = self.__left[:size]
+        self.__left = self.__left[size:]
+        return size
+
+
+def decompressed(fil):
+    """the binary file fil, or its content read through the codec that
+    compressed it"""
+    head = fil.peek(4)
+    for codec in codecs.values():
+        if head.startswith(codec.magic):
+            return io.BufferedReader(_Inflating(fil, codec.decompressor()))
+    if head.startswith(ZstdCodec.magic):
+        raise ValueError("zstd snapshots need the zstandard package")
+    return fil
+
+
+def detect(fil):
+    """the format of the binary file fil (a buffered reader), which is
+    left at its start"""
+    head = fil.peek(max(len(fmt.magic) for fmt in formats.values()))
+    for fmt in formats.values():
+        if fmt.magic and head.startswith(fmt.magic):
+            return fmt
+    return formats["json"]
+
+
+def load(path):
+    """yields the (key, attributes) records of the file at path, in
+    whichever format and compression it is"""
+    with open(path, "rb") as fil:
+        fil = decompressed(fil)
+        yield from detect(fil).load(fil)
+
+
+def read_all(path):
+    """Returns the list of the records of the file at path, as the workers
+    of a process pool can send it back"""
+    return list(load(path))
+
+
+def convert(source, target, name):
+    """writes the records of the file at source to target in the format
+    name"""
+    fmt = formats[name]
+    data = fmt.dump(fmt.pack(key, attrs) for key, attrs in load(source))
+    mode = "w" if isinstance(data, str) else "wb"
+    with open(target + ".tmp", mode) as fil:
+        fil.write(data)
+    os.replace(target + ".tmp", target)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""A spatial index of the places by latitude and longitude.
+
+The globe is cut into a grid of square cells of a few hundredths of a
+degree, and each place sits in the cell holding its position. A bounding
+box or a radius only looks at the cells it overlaps (or at the occupied
+cells, if fewer), instead of every place, then checks the exact position
+of the places found there: the cost grows with the area searched and the
+places in it, not with the size of the store.
+"""
+import math
+
+RADIUS = 6371.0088  # mean radius of the Earth, in km
+KM_PER_DEGREE = math.pi * RADIUS / 180  # along a meridian
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """the great-circle distance between two positions, in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) \
+        * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounds(lat, lon, km):
+    """the (south, west, north, east) box holding every position within
+    km of the one given; west is greater than east if it spans the
+    antimeridian"""
+    dlat = km / KM_PER_DEGREE
+    south, north = max(-90, lat - dlat), min(90, lat + dlat)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    if north == 90 or south == -90 or dlat >= 180 * widest:
+        return south, -180, north, 180
+    dlon = dlat / widest
+    return south, (lon - dlon + 180) % 360 - 180, north, \
+        (lon + dlon + 180) % 360 - 180
+
+
+def inside(lat, lon, south, west, north, east):
+    """True if the position is within the box"""
+    return south <= lat <= north and (
+        west <= lon <= east if west <= east else lon >= west or lon <= east)
+
+
+class Grid:
+    """The instances at a position, in cells of size degrees a side"""
+
+    def __init__(self, size=0.02):
+        """an empty grid of cells of size degrees"""
+        self.size = size
+        self.cells = {}  # (row, column) -> {id: (lat, lon, obj)}
+        self.where = {}  # id -> (row, column)
+
+    def __len__(self):
+        """the number of instances indexed"""
+        return len(self.where)
+
+    def cell(self, lat, lon):
+        """the (row, column) of the cell holding the position"""
+        return math.floor(lat / self.size), math.floor(lon / self.size)
+
+    def add(self, obj, lat, lon):
+        """indexes obj at the position, or drops it if that's none"""
+        self.discard(obj.id)
+        if type(lat) not in (int, float) or type(lon) not in (int, float) \
+                or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return
+        cell = self.cell(lat, lon)
+        self.cells.setdefault(cell, {})[obj.id] = (lat, lon, obj)
+        self.where[obj.id] = cell
+
+    def discard(self, id_):
+        """drops the instance of id_, if indexed"""
+        cell = self.where.pop(id_, None)
+        if cell is not None:
+            held = self.cells[cell]
+            del held[id_]
+            if not held:
+                del self.cells[cell]
+
+    def box(self, south, west, north, east):
+        """Returns the instances within the bounding box, which spans the
+        antimeridian if west is greater than east"""
+        return [obj for lat, lon, obj in self.__scan(south, west, north, east)
+                if inside(lat, lon, south, west, north, east)]
+
+    def near(self, lat, lon, km, limit=None):
+        """Returns the instances within km of the position, the nearest
+        first, up to limit of them"""
+        found = []
+        for lat2, lon2, obj in self.__scan(*bounds(lat, lon, km)):
+            away = distance(lat, lon, lat2, lon2)
+            if away <= km:
+                found.append((away, obj.id, obj))
+        found.sort(key=lambda item: item[:2])
+        return [obj for _, _, obj in found[:limit]]
+
+    def __scan(self, south, west, north, east):
+        """yields the (lat, lon, obj) of the cells the box overlaps"""
+        rows = range(math.floor(south / self.size),
+                     math.floor(north / self.size) + 1)
+        first, last = math.floor(west / self.size), \
+            math.floor(east / self.size)
+        if west <= east:
+            columns = [range(first, last + 1)]
+        else:
+            columns = [range(first, math.floor(180 / self.size) + 1),
+                       range(math.floor(-180 / self.size), last + 1)]
+        if len(rows) * sum(map(len, columns)) > len(self.cells):
+            for (row, column), held in self.cells.items():
+                if row in rows and any(column in cols for cols in columns):
+                    yield from held.values()
+            return
+        cells = self.cells
+        for row in rows:
+            for cols in columns:
+                for column in cols:
+                    held = cells.get((row, column))
+                    if held:
+                        yield from held.values()
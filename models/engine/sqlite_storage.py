@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""SQLiteStorage module"""
+import heapq
+import json
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.engine.file_storage import listed, relations, searchable
+from models.engine.query import Query
+from models.engine.spatial import bounds, distance
+from models.engine.text import TextIndex
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
+           "Place": Place, "Review": Review, "State": State, "User": User}
+operators = {"lt": "<", "le": "<=", "gt": ">", "ge": ">=", "eq": "=",
+             "ne": "!="}
+
+
+class SQLiteStorage:
+    """The SQLiteStorage class: a drop-in alternative to FileStorage that
+    keeps every class in its own table of a SQLite database, in WAL mode.
+    Only the instances in use are held in memory.
+
+    Each table row holds the object's to_dict() as JSON, plus one indexed
+    column per scalar foreign key. Place.amenity_ids go to a link table.
+    Changes are written to the open transaction before any query
+    (autoflush), and save() commits them."""
+
+    def __init__(self, path="hbnb.db"):
+        """Sets up the storage over the database file at path"""
+        self.__path = path
+        self.__db = None
+        self.__objects = weakref.WeakValueDictionary()  # identity map
+        self.__dirty = {}  # <classname>.id -> obj, or None when deleted
+        self.__depth = 0  # nesting of batch() blocks
+        self.__deferred = False  # save() was called in the batch
+
+    @property
+    def batching(self):
+        """False: a failed batch is only rolled back in the database, so
+        BaseModel need not report attributes before they change"""
+        return False
+
+    @contextmanager
+    def batch(self):
+        """Defers the commit of save() until the block ends. If the block
+        raises, the transaction is rolled back and the instances in memory
+        are forgotten, to be read again from the database"""
+        if not self.__depth:
+            self.__deferred = False
+        self.__depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if not self.__depth:
+                self.__connection().rollback()
+                self.__dirty = {}
+                self.__objects = weakref.WeakValueDictionary()
+            raise
+        self.__depth -= 1
+        if not self.__depth and self.__deferred:
+            self.__connection().commit()
+
+    def reload(self):
+        """opens the database, creating the tables it misses, and forgets
+        the instances loaded so far"""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+        self.__connection()
+        self.__objects = weakref.WeakValueDictionary()
+        self.__dirty = {}
+
+    def __connection(self):
+        """the open database, opened (and its tables created) if it was
+        closed, which keeps the storage usable after close()"""
+        if self.__db is not None:
+            return self.__db
+        db = sqlite3.connect(self.__path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        for name in classes:
+            keys = [key for key in relations.get(name, ())
+                    if key != "amenity_ids"]
+            columns = "".join(", {} TEXT".format(key) for key in keys)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL{})".format(name, columns))
+            for key in keys:
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})".format(
+                        name, key))
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS place_amenity (place_id TEXT, "
+            "amenity_id TEXT, PRIMARY KEY (place_id, amenity_id))")
+        db.execute("CREATE INDEX IF NOT EXISTS place_amenity_amenity "
+                   "ON place_amenity (amenity_id)")
+        db.commit()
+        self.__db = db
+        return db
+
+    def flush(self):
+        """nothing to do: save() has committed by the time it returns"""
+
+    def refresh(self):
+        """nothing to do: every query reads the shared database"""
+
+    def close(self):
+        """closes the database, dropping what was not committed. It is
+        opened again by the next use"""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def new(self, obj):
+        """adds obj to the storage, written by the next save()"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects[key] = obj
+        self.__dirty[key] = obj
+
+    def delete(self, obj):
+        """removes obj from the storage, written by the next save()"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects.pop(key, None)
+        self.__dirty[key] = None
+
+    def modified(self, obj, name=None):
+        """flags a stored obj as changed since the last save"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if self.__objects.get(key) is obj:
+            self.__dirty[key] = obj
+
+    def save(self):
+        """writes the changes since the last save and commits them"""
+        self.__flush()
+        if self.__depth:
+            self.__deferred = True
+        else:
+            self.__connection().commit()
+
+    def save_changes(self, obj):
+        """saves every object of the dict obj"""
+        for value in obj.values():
+            self.new(value)
+        self.save()
+
+    def get(self, cls, id):
+        """Returns the instance of cls (a class or a class name) with the
+        given id, None if there is none"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in classes:
+            return None
+        key = "{}.{}".format(name, id)
+        if key in self.__dirty:
+            return self.__dirty[key]
+        obj = self.__objects.get(key)
+        if obj is None:
+            row = self.__connection().execute(
+                "SELECT id, data FROM {} WHERE id = ?".format(name),
+                (id,)).fetchone()
+            obj = row and self.__build(name, row)
+        return obj
+
+    def all(self, cls=None):
+        """Returns a dict of all the instances, or of those of cls (a class
+        or a class name), by <classname>.id"""
+        names = classes if cls is None else \
+            [cls if isinstance(cls, str) else cls.__name__]
+        objs = {}
+        for name in names:
+            if name in classes:
+                objs.update(self.__query(name, ""))
+        return objs
+
+    def count(self, cls=None):
+        """Returns the number of stored instances, of cls if given"""
+        self.__flush()
+        names = classes if cls is None else \
+            [cls if isinstance(cls, str) else cls.__name__]
+        db = self.__connection()
+        return sum(db.execute("SELECT COUNT(*) FROM {}".format(name))
+                   .fetchone()[0] for name in names if name in classes)
+
+    def related(self, cls, name, value):
+        """Returns the instances of cls whose foreign key name holds value
+        (or, for a list attribute such as amenity_ids, contains it)"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        if name not in relations.get(cls, ()):
+            raise ValueError("{}.{} is no foreign key".format(cls, name))
+        if name == "amenity_ids":
+            where = "WHERE id IN (SELECT place_id FROM place_amenity " \
+                "WHERE amenity_id = ?)"
+        else:
+            where = "WHERE {} = ?".format(name)
+        return list(self.__query(cls, where, (value,)).values())
+
+    def having(self, cls, name, all_of=(), any_of=None):
+        """Returns the instances of cls whose list attribute name (see
+        listed) holds every value of all_of and, if any_of is given, at
+        least one of any_of, looked up in the place_amenity table"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        if name not in listed.get(cls, ()):
+            raise ValueError("{}.{} has no bitmaps".format(cls, name))
+        tests, params = [], []
+        all_of = list(dict.fromkeys(all_of))
+        if all_of:
+            tests.append("id IN (SELECT place_id FROM place_amenity WHERE "
+                         "amenity_id IN ({}) GROUP BY place_id HAVING "
+                         "COUNT(*) = ?)".format(", ".join("?" * len(all_of))))
+            params += all_of + [len(all_of)]
+        if any_of is not None:
+            any_of = list(any_of)
+            tests.append("id IN (SELECT place_id FROM place_amenity WHERE "
+                         "amenity_id IN ({}))".format(
+                             ", ".join("?" * len(any_of))))
+            params += any_of
+        where = "WHERE " + " AND ".join(tests) if tests else ""
+        return list(self.__query(cls, where, params).values())
+
+    def select(self, cls, **conditions):
+        """Returns the instances of cls matching all the conditions, given
+        as <attribute>__<lt|le|gt|ge|eq|ne>=<value>"""
+        cls = cls if isinstance(cls, str) else cls.__name__
+        tests, params = [], []
+        for cond, value in conditions.items():
+            name, _, op = cond.partition("__")
+            if not name.isidentifier() or (op or "eq") not in operators:
+                raise ValueError("can't select on {}".format(cond))
+            tests.append("json_extract(data, '$.{}') {} ?".format(
+                name, operators[op or "eq"]))
+            params.append(value)
+        where = "WHERE " + " AND ".join(tests) if tests else ""
+        return list(self.__query(cls, where, params).values())
+
+    def between(self, cls, name, reverse=False, limit=None, **bounds):
+        """Returns the instances of cls (every class if None) whose
+        attribute name is within the bounds (lt, le, gt, ge or
+        eq=<value>), sorted by it, the highest first if reverse, up to
+        limit of them"""
+        if not name.isidentifier():
+            raise ValueError("can't order by {}".format(name))
+        names = classes if cls is None else \
+            [cls if isinstance(cls, str) else cls.__name__]
+        column = "json_extract(data, '$.{}')".format(name)
+        tests, params = ["{} IS NOT NULL".format(column)], []
+        for op, value in bounds.items():
+            if op not in operators or op == "ne":
+                raise ValueError("no bound {}".format(op))
+            tests.append("{} {} ?".format(column, operators[op]))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            params.append(value)
+        where = "WHERE {0} ORDER BY {1} {2}, id {2}".format(
+            " AND ".join(tests), column, "DESC" if reverse else "ASC")
+        if limit is not None:
+            where += " LIMIT {:d}".format(limit)
+        found = [list(self.__query(each, where, params).values())
+                 for each in names if each in classes]
+        if len(found) == 1:
+            return found[0]
+        merged = heapq.merge(*found, reverse=reverse,
+                             key=lambda obj: (getattr(obj, name), obj.id))
+        return list(islice(merged, limit))
+
+    def unordered(self, cls, name):
+        """Returns the instances of cls whose attribute name is null or
+        missing from their row, which between() leaves out"""
+        if not name.isidentifier():
+            raise ValueError("can't order by {}".format(name))
+        cls = cls if isinstance(cls, str) else cls.__name__
+        return list(self.__query(cls, "WHERE json_extract(data, '$.{}') "
+                                 "IS NULL".format(name)).values())
+
+    def within(self, south, west, north, east):
+        """Returns the places within the bounding box, in degrees, which
+        spans the antimeridian if west is greater than east"""
+        where = "WHERE json_extract(data, '$.latitude') BETWEEN ? AND ? " \
+            "AND (json_extract(data, '$.longitude') BETWEEN ? AND ?"
+        if west <= east:
+            params = [south, north, west, east]
+        else:
+            where += " OR json_extract(data, '$.longitude') BETWEEN ? AND ?"
+            params = [south, north, west, 180, -180, east]
+        return list(self.__query("Place", where + ")", params).values())
+
+    def near(self, latitude, longitude, km, limit=None):
+        """Returns the places within km of the position, the nearest
+        first, up to limit of them"""
+        found = []
+        for place in self.within(*bounds(latitude, longitude, km)):
+            away = distance(latitude, longitude, place.latitude,
+                            place.longitude)
+            if away <= km:
+                found.append((away, place.id, place))
+        found.sort(key=lambda item: item[:2])
+        return [place for _, _, place in found[:limit]]
+
+    def search(self, cls, text, limit=None):
+        """Returns the instances of cls (a class or a class name) whose
+        text attributes (see searchable) hold any word of text, the most
+        relevant first, up to limit of them. The ranking is computed over
+        every row of the class, there being no index kept"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in searchable:
+            raise ValueError("{} has no full-text index".format(name))
+        index = TextIndex()
+        for obj in self.all(name).values():
+            texts = (getattr(obj, key, None) for key in searchable[name])
+            index.add(obj, " ".join(text for text in texts
+                                    if isinstance(text, str)))
+        return index.search(text, limit)
+
+    def query(self, cls):
+        """Returns the Query (see models.engine.query) of the instances of
+        cls (a class or a class name)"""
+        return Query(self, cls)
+
+    def __query(self, name, where, params=()):
+        """the instances of the rows of table name matching where"""
+        self.__flush()
+        objs = {}
+        for row in self.__connection().execute(
+                "SELECT id, data FROM {} {}".format(name, where), params):
+            key = "{}.{}".format(name, row[0])
+            objs[key] = self.__objects.get(key) or self.__build(name, row)
+        return objs
+
+    def __build(self, name, row):
+        """the instance of class name for the (id, data) row, now tracked"""
+        obj = classes[name](**json.loads(row[1]))
+        self.__objects["{}.{}".format(name, row[0])] = obj
+        return obj
+
+    def __flush(self):
+        """writes the pending changes to the open transaction"""
+        dirty, self.__dirty = self.__dirty, {}
+        db = self.__connection()
+        for key, obj in dirty.items():
+            name, id = key.split(".", 1)
+            if obj is None:
+                db.execute("DELETE FROM {} WHERE id = ?".format(name), (id,))
+            else:
+                keys = [k for k in relations.get(name, ())
+                        if k != "amenity_ids"]
+                values = [getattr(obj, k, None) for k in keys]
+                values = [v if isinstance(v, str) else None for v in values]
+                db.execute(
+                    "INSERT INTO {0} (id, data{1}) VALUES (?, ?{2}) "
+                    "ON CONFLICT (id) DO UPDATE SET data = excluded.data{3}"
+                    .format(name, "".join(", " + k for k in keys),
+                            ", ?" * len(keys),
+                            "".join(", {0} = excluded.{0}".format(k)
+                                    for k in keys)),
+                    [id, json.dumps(obj.to_dict())] + values)
+            if name == "Place":
+                db.execute(
+                    "DELETE FROM place_amenity WHERE place_id = ?", (id,))
+                ids = getattr(obj, "amenity_ids", None) or []
+                db.executemany(
+                    "INSERT OR IGNORE INTO place_amenity VALUES (?, ?)",
+                    [(id, a) for a in ids if isinstance(a, str)])
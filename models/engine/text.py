@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Full-text search over text attributes of the stored instances.
+
+A TextIndex splits the text of each instance into lowercase words and
+keeps, for every word, the posting list of the instances holding it with
+the number of times they do. A search only reads the posting lists of
+its words, and ranks the instances by BM25: words found in few instances
+weigh more than common ones, and repeated words count less and less, the
+more so in long texts.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+WORD = re.compile(r"\w+")
+K1 = 1.2  # how fast repeating a word stops adding to the score
+B = 0.75  # how much long texts are penalized
+
+
+def words(text):
+    """the lowercase words of text"""
+    return WORD.findall(text.lower())
+
+
+class TextIndex:
+    """The words of the text of each instance, as posting lists"""
+
+    def __init__(self):
+        """an empty index"""
+        self.postings = {}  # word -> {id: times it occurs}
+        self.lengths = {}  # id -> number of words
+        self.terms = {}  # id -> its distinct words
+        self.total = 0  # words of every text
+        self.objs = {}  # id -> obj
+
+    def __len__(self):
+        """the number of instances indexed"""
+        return len(self.lengths)
+
+    def add(self, obj, text):
+        """indexes obj under the words of text"""
+        self.discard(obj.id)
+        counts = Counter(words(text))
+        for word, times in counts.items():
+            self.postings.setdefault(word, {})[obj.id] = times
+        self.lengths[obj.id] = sum(counts.values())
+        self.terms[obj.id] = tuple(counts)
+        self.total += self.lengths[obj.id]
+        self.objs[obj.id] = obj
+
+    def discard(self, id_):
+        """drops the instance of id_, if indexed"""
+        obj = self.objs.pop(id_, None)
+        if obj is None:
+            return
+        self.total -= self.lengths.pop(id_)
+        for word in self.terms.pop(id_):
+            posting = self.postings[word]
+            del posting[id_]
+            if not posting:
+                del self.postings[word]
+
+    def search(self, text, limit=None):
+        """Returns the instances holding any word of text, the most
+        relevant first, up to limit of them"""
+        count = len(self.lengths)
+        if not count:
+            return []
+        average = self.total / count or 1
+        lengths = self.lengths
+        base, scale = K1 * (1 - B), K1 * B / average
+        scores = {}
+        for word in set(words(text)):
+            posting = self.postings.get(word, {})
+            idf = math.log(1 + (count - len(posting) + 0.5) /
+                           (len(posting) + 0.5)) * (K1 + 1)
+            get = scores.get
+            for id_, times in posting.items():
+                scores[id_] = get(id_, 0) + idf * times / (
+                    times + base + scale * lengths[id_])
+
+        def rank(item):
+            return -item[1], item[0]
+        if limit is None:
+            ranked = sorted(scores.items(), key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=rank)
+        return [self.objs[id_] for id_, _ in ranked]
@@ -1,8 +1,103 @@
 #!/usr/bin/env python3
 """Models place module"""
+import functools
 from models.base_model import BaseModel
 
 
+class OwnedList(list):
+    """The list of an OwnList attribute. Changing it in place (append,
+    remove, slice assignment...) flags its instance as changed, as setting
+    the attribute does, so that the storage reindexes and saves it"""
+    __slots__ = ("owner", "name", "fresh")
+
+    def __init__(self, values=(), owner=None, name=None, fresh=False):
+        """a list of values held as the attribute name of owner, fresh
+        while it is the default of an owner that was never assigned one"""
+        super().__init__(values)
+        self.owner = owner
+        self.name = name
+        self.fresh = fresh
+
+    def __reduce_ex__(self, protocol):
+        """copies and pickles as a plain list, without the owner"""
+        return list, (list(self),)
+
+
+def _changing(method):
+    """wraps the list method so that it reports the change to the owner"""
+    @functools.wraps(method)
+    def change(self, *args, **kwargs):
+        owner = self.owner
+        if owner is None or getattr(owner, "id", None) is None:
+            return method(self, *args, **kwargs)
+        if self.fresh:  # becomes the list of owner, through its setattr
+            result = method(self, *args, **kwargs)
+            setattr(owner, self.name, self)
+            return result
+        from models import storage
+        if storage.batching:
+            storage.changing(owner, self.name)
+        result = method(self, *args, **kwargs)
+        storage.modified(owner, self.name)
+        return result
+    return change
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear",
+              "sort", "reverse", "__setitem__", "__delitem__", "__iadd__",
+              "__imul__"):
+    setattr(OwnedList, _name, _changing(getattr(list, _name)))
+
+
+class OwnList:
+    """A list attribute whose default is a new empty list for each
+    instance, instead of one list that every instance would share (and
+    grow). The lists are OwnedList, so that changing one in place is seen
+    by the storage; the default is only set on the instance once changed"""
+
+    def __set_name__(self, owner, name):
+        """takes note of the attribute name"""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """the list of obj, the descriptor itself on the class"""
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            return self.default(obj)
+
+    def __set__(self, obj, value):
+        """sets value, as an OwnedList if a list, as the list of obj"""
+        obj.__dict__[self.name] = self.own(obj, value,
+                                           obj.__dict__.get(self.name))
+
+    def __delete__(self, obj):
+        """drops the list of obj, back to the default"""
+        try:
+            self.own(obj, None, obj.__dict__.pop(self.name))
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def default(self, obj):
+        """a new empty list for obj, only set on it once changed"""
+        return OwnedList(owner=obj, name=self.name, fresh=True)
+
+    def own(self, obj, value, old=None):
+        """value as the attribute of obj replacing old, which no longer
+        reports its changes to obj"""
+        if isinstance(old, OwnedList) and old is not value:
+            old.owner = None
+        if isinstance(value, OwnedList) and value.owner is obj and \
+                value.name == self.name:
+            value.fresh = False
+            return value
+        if isinstance(value, list):
+            return OwnedList(value, obj, self.name)
+        return value
+
+
 class Place(BaseModel):
     """The Place class"""
     city_id = ""  # will be City.id
@@ -15,4 +110,29 @@ class Place(BaseModel):
     price_by_night = 0  # int
     latitude = 0.0  # float
     longitude = 0.0  # float
-    amenity_ids = []  # list of strings
+    amenity_ids = OwnList()  # list of strings (Amenity.id)
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the list of the instances described by the dicts of
+        records, their amenity_ids lists turned into OwnedList"""
+        objs = super().from_records(records)
+        own = Place.amenity_ids.own
+        for obj in objs:
+            ids = obj.__dict__.get("amenity_ids")
+            if isinstance(ids, list):
+                obj.__dict__["amenity_ids"] = own(obj, ids)
+        return objs
+
+    @property
+    def reviews(self):
+        """The Review instances of this Place"""
+        from models import storage
+        return storage.related("Review", "place_id", self.id)
+
+    @property
+    def amenities(self):
+        """The Amenity instances listed in amenity_ids"""
+        from models import storage
+        amenities = (storage.get("Amenity", id) for id in self.amenity_ids)
+        return [amenity for amenity in amenities if amenity is not None]
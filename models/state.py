@@ -6,3 +6,9 @@ from models.base_model import BaseModel
 class State(BaseModel):
     """The State class"""
     name = ""
+
+    @property
+    def cities(self):
+        """The City instances of this State"""
+        from models import storage
+        return storage.related("City", "state_id", self.id)
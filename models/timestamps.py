@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Parsing and formatting of the created_at/updated_at timestamps, cached.
+
+The instances created or saved together share their timestamps, so the
+texts parsed and the datetimes formatted are remembered: equal texts give
+the very same datetime object and equal naive datetimes the very same ISO
+text, without parsing or formatting again. The compact classes keep their times
+as integer microseconds since EPOCH, turned into datetimes when read
+through the same caches. Equal datetimes give the very same int too, or
+every compact instance would hold two ints of its own where the regular
+ones share their datetimes: the ints are interned, which keeps no
+datetime alive.
+"""
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+LIMIT = 1 << 16  # entries a cache holds before it starts over
+_parsed = {}  # ISO text -> datetime
+_texts = {}  # naive datetime -> ISO text
+_times = {}  # microseconds -> datetime
+_ints = {}  # microseconds -> the same microseconds
+
+
+def parse(text):
+    """the datetime of the ISO time text"""
+    try:
+        return _parsed[text]
+    except KeyError:
+        pass
+    if len(_parsed) >= LIMIT:
+        _parsed.clear()
+    value = _parsed[text] = datetime.fromisoformat(text)
+    return value
+
+
+def isoformat(value):
+    """the ISO text of the datetime value. Only naive ones are cached:
+    aware datetimes are equal across timezones, their texts are not"""
+    if value.tzinfo is not None:
+        return value.isoformat()
+    try:
+        return _texts[value]
+    except KeyError:
+        pass
+    if len(_texts) >= LIMIT:
+        _texts.clear()
+    text = _texts[value] = value.isoformat()
+    return text
+
+
+def to_micros(value):
+    """microseconds between EPOCH and the naive datetime value"""
+    micros = (value - EPOCH) // MICROSECOND
+    try:
+        return _ints[micros]
+    except KeyError:
+        pass
+    if len(_ints) >= LIMIT:
+        _ints.clear()
+    _ints[micros] = micros
+    return micros
+
+
+def from_micros(value):
+    """the naive datetime value microseconds after EPOCH"""
+    try:
+        return _times[value]
+    except KeyError:
+        pass
+    if len(_times) >= LIMIT:
+        _times.clear()
+    time = _times[value] = EPOCH + timedelta(0, 0, value)
+    return time
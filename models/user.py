@@ -9,3 +9,15 @@ class User(BaseModel):
     password = ""
     first_name = ""
     last_name = ""
+
+    @property
+    def places(self):
+        """The Place instances owned by this User"""
+        from models import storage
+        return storage.related("Place", "user_id", self.id)
+
+    @property
+    def reviews(self):
+        """The Review instances written by this User"""
+        from models import storage
+        return storage.related("Review", "user_id", self.id)
@@ -193,6 +193,8 @@ class TestHBNBCommand(Helpers):
         self.t_cmd_assert_false("help quit")
         self.t_cmd_assert_false("help show")
         self.t_cmd_assert_false("help update")
+        self.t_cmd_assert_false("help where")
+        self.t_cmd_assert_false("help search")
 
     def test_update_command(self):
         """Tests update command"""
@@ -320,6 +322,59 @@ class TestHBNBCommand(Helpers):
         for model, uuid in zip(self.models, uuids):
             self.t_cmd_output_test(f'all {model}', uuid)
 
+    def test_where_command(self):
+        """Tests for the where command"""
+        self.t_cmd_output_test("where", "* class name missing **")
+        self.t_cmd_output_test("where xyz", "** class doesn't exist **")
+        self.t_cmd_output_test("Place.where(price__about=1)",
+                               "** can't select on price__about **")
+        self.t_cmd_output_test("Place.where(limit=x)", "** invalid literal")
+        uuid = self.t_cmd_output("create Place")
+        self.t_cmd_assert_false(f"update Place {uuid} price_by_night 90")
+        self.t_cmd_output_test("Place.where(price_by_night__lt=100)", uuid)
+        self.t_cmd_output_test('where Place name="My house"', "[]")
+        output = self.t_cmd_output(
+            "Place.where(price_by_night__ge=0, order_by=-price_by_night, "
+            "limit=1)")
+        self.assertIn(uuid, output)
+        self.t_cmd_assert_false(f"destroy Place {uuid}")
+
+    def test_update_read_only(self):
+        """Tests update refuses the relationship properties"""
+        uuid = self.t_cmd_output("create User")
+        self.t_cmd_output_test(f"update User {uuid} places foo",
+                               "** places can't be updated **")
+        self.t_cmd_output_test(
+            f'User.update("{uuid}", {{"first_name": "Al", "reviews": "x"}})',
+            "** reviews can't be updated **")
+        self.t_cmd_output_test(f"show User {uuid}", uuid)
+        self.assertNotIn("first_name", self.t_cmd_output(f"show User {uuid}"))
+        self.t_cmd_assert_false(f"destroy User {uuid}")
+
+    def test_where_listed(self):
+        """Tests for the where command on amenity_ids"""
+        uuid = self.t_cmd_output("create Place")
+        self.t_cmd_assert_false(
+            f'update Place {uuid} {{"amenity_ids": ["wifi", "pool"]}}')
+        self.t_cmd_output_test("where Place amenity_ids__all=pool|wifi", uuid)
+        self.t_cmd_output_test("where Place amenity_ids__all=pool|gym", "[]")
+        self.t_cmd_output_test('Place.where("amenity_ids__any=gym|wifi")',
+                               uuid)
+        self.t_cmd_assert_false(f"destroy Place {uuid}")
+
+    def test_search_command(self):
+        """Tests for the search command"""
+        self.t_cmd_output_test("search", "* class name missing **")
+        self.t_cmd_output_test("search xyz", "** class doesn't exist **")
+        self.t_cmd_output_test("search Review", "** search text missing **")
+        self.t_cmd_output_test('User.search("quiet")',
+                               "** User has no full-text index **")
+        uuid = self.t_cmd_output("create Review")
+        self.t_cmd_assert_false(f'update Review {uuid} text "Very quiet"')
+        self.t_cmd_output_test('Review.search("quiet")', uuid)
+        self.t_cmd_output_test('search Review "noisy"', "[]")
+        self.t_cmd_assert_false(f"destroy Review {uuid}")
+
     def test_count_command(self):
         """Tests for the count command"""
 
@@ -2,6 +2,7 @@
 """Models amenities test module"""
 from models.amenity import Amenity
 from models.base_model import BaseModel
+from models.place import Place
 import unittest
 
 
@@ -39,3 +40,12 @@ class TestAmenityClass(unittest.TestCase):
         amenity = Amenity()
         string = "[Amenity] ({}) {}".format(amenity.id, amenity.__dict__)
         self.assertEqual(string, str(amenity))
+
+    def test_places(self):
+        """test the places of an amenity follow Place.amenity_ids"""
+        amenity = Amenity()
+        place = Place()
+        place.amenity_ids = [amenity.id]
+        self.assertEqual(amenity.places, [place])
+        place.amenity_ids = []
+        self.assertEqual(amenity.places, [])
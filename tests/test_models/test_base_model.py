@@ -114,3 +114,20 @@ class TestBaseModel(unittest.TestCase):
         self.assertNotEqual(old_updated_at, new_updated_at)
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.save.called)
+
+    def test_from_dict(self):
+        """from_dict and from_records build what the kwargs constructor
+        does, leaving the dicts as they were"""
+        inst = BaseModel()
+        inst.name = "Holberton"
+        dic = inst.to_dict()
+        built = BaseModel.from_dict(dic)
+        self.assertIs(type(built), BaseModel)
+        self.assertEqual(built.__dict__, BaseModel(**dic).__dict__)
+        self.assertIs(type(built.__dict__["created_at"]), datetime)
+        self.assertEqual(built.to_dict(), dic)
+        self.assertIn("__class__", dic)
+        objs = BaseModel.from_records([dic, dict(dic, id="x")])
+        self.assertEqual([obj.id for obj in objs], [inst.id, "x"])
+        objs[1].name = "changed"
+        self.assertEqual(objs[0].name, "Holberton")
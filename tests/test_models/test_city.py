@@ -2,6 +2,7 @@
 """Models city test module"""
 from models.city import City
 from models.base_model import BaseModel
+from models.place import Place
 import unittest
 
 
@@ -45,3 +46,10 @@ class TestCityClass(unittest.TestCase):
         city = City()
         string = "[City] ({}) {}".format(city.id, city.__dict__)
         self.assertEqual(string, str(city))
+
+    def test_places(self):
+        """test the places of a city follow Place.city_id"""
+        city = City()
+        place = Place()
+        place.city_id = city.id
+        self.assertEqual(city.places, [place])
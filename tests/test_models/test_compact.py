@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Models compact test module"""
+from models.compact import compact, Compact
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models import storage
+import os
+import unittest
+
+
+class TestCompact(unittest.TestCase):
+    """tests for the compact model classes"""
+
+    def test_class(self):
+        """the compact class stands in for the model class"""
+        cls = compact(Place)
+        self.assertIs(compact(Place), cls)
+        self.assertEqual(cls.__name__, "Place")
+        self.assertIn("price_by_night", cls.__slots__)
+        self.assertFalse(hasattr(cls(), "__dict__"))
+        self.assertIsInstance(cls.reviews, property)
+        self.assertEqual(cls().reviews, [])
+
+    def test_columns(self):
+        """compact places are scanned through the columns like the
+        regular ones"""
+        small = compact(Place)()
+        small.price_by_night = 31337
+        self.assertEqual(storage.select(Place, price_by_night__eq=31337),
+                         [small])
+        storage.delete(small)
+
+    def test_round_trip(self):
+        """a compact instance serializes like the regular one"""
+        place = Place()
+        place.name = "Loft"
+        place.price_by_night = 80
+        place.extra = "kept"
+        small = compact(Place)(**place.to_dict())
+        self.assertEqual(small.to_dict(), place.to_dict())
+        self.assertEqual(small.created_at, place.created_at)
+        self.assertEqual(small.updated_at, place.updated_at)
+        self.assertEqual(str(small), str(place))
+        self.assertEqual(small.extra, "kept")
+
+    def test_from_dict(self):
+        """from_dict builds compact instances too"""
+        place = Place()
+        place.name = "Loft"
+        small = compact(Place).from_dict(place.to_dict())
+        self.assertIsInstance(small, Compact)
+        self.assertEqual(small.to_dict(), place.to_dict())
+
+    def test_defaults(self):
+        """unset declared attributes read as the class default"""
+        small = compact(Place)()
+        self.assertEqual(small.number_rooms, 0)
+        self.assertEqual(small.latitude, 0.0)
+        self.assertNotIn("number_rooms", small.to_dict())
+        with self.assertRaises(AttributeError):
+            small.nothing
+        small.amenity_ids.append("wifi")
+        self.assertEqual(compact(Place)().amenity_ids, [])
+        self.assertEqual(small.to_dict()["amenity_ids"], ["wifi"])
+
+    def test_tracked(self):
+        """changes to compact instances reach the storage indexes"""
+        small = compact(Review)()
+        small.place_id = "p1"
+        self.assertEqual(storage.related(Review, "place_id", "p1"), [small])
+        self.assertIsInstance(storage.get(Review, small.id), Compact)
+
+    def test_reload(self):
+        """a compact storage reloads into compact instances"""
+        path = FileStorage._FileStorage__file_path
+        objects = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__file_path = "compact_test.json"
+        FileStorage._FileStorage__objects = {}
+        try:
+            place = Place()
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            strg = FileStorage(compact=True)
+            strg.reload()
+            self.assertIsInstance(strg.get(Place, place.id), Compact)
+            self.assertEqual(strg.get(Place, place.id).to_dict(),
+                             place.to_dict())
+        finally:
+            FileStorage._FileStorage__file_path = path
+            FileStorage._FileStorage__objects = objects
+            for suffix in ("", ".lock"):
+                if os.path.isfile("compact_test.json" + suffix):
+                    os.remove("compact_test.json" + suffix)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""The membership bitmaps test module"""
+from models.engine.bitmaps import Bitmaps
+import unittest
+
+
+class Obj:
+    """a stand-in for an instance"""
+
+    def __init__(self, id_):
+        """the instance of id_"""
+        self.id = id_
+
+
+class TestBitmaps(unittest.TestCase):
+    """tests for the bitmaps of the values in lists"""
+
+    def setUp(self):
+        """a few places and their amenities"""
+        self.index = Bitmaps()
+        lists = {"a": ["wifi", "pool"], "b": ["wifi"],
+                 "c": ["pool", "sauna", "pool"], "d": []}
+        for id_, values in lists.items():
+            self.index.add(Obj(id_), values)
+        self.assertFalse(self.index.settled)
+        self.index.settle()
+
+    def ids(self, objs):
+        """the ids of objs"""
+        return [obj.id for obj in objs]
+
+    def test_having(self):
+        """AND of all_of, OR of any_of, in the order of the rows"""
+        having = self.index.having
+        self.assertEqual(self.ids(having(["wifi", "pool"])), ["a"])
+        self.assertEqual(self.ids(having(["pool"])), ["a", "c"])
+        self.assertEqual(self.ids(having(any_of=["wifi", "sauna"])),
+                         ["a", "b", "c"])
+        self.assertEqual(self.ids(having(["pool"], ["wifi"])), ["a"])
+        self.assertEqual(self.ids(having()), ["a", "b", "c", "d"])
+        self.assertEqual(having(["wifi", "gym"]), [])
+        self.assertEqual(having(any_of=[]), [])
+
+    def test_changes(self):
+        """lists change, and are dropped, their rows being reused"""
+        self.index.add(Obj("b"), ["pool", "gym"])
+        self.index.discard("a")
+        self.index.discard("x")
+        self.index.add(Obj("e"), ["wifi", 7, "", None])
+        self.index.add(Obj("f"), "wifi")
+        self.index.settle()
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(len(self.index.objs), 4)
+        self.assertEqual(self.ids(self.index.having(["pool"])), ["b", "c"])
+        self.assertEqual(self.ids(self.index.having(["wifi"])), ["e"])
+        self.assertNotIn("sauna", self.index.held["e"])
+        self.index.discard("c")
+        self.assertNotIn("sauna", self.index.bits)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""The columns test module"""
+from models.engine.columns import Columns, PlaceView, view
+from models.place import Place
+import unittest
+
+
+class TestColumns(unittest.TestCase):
+    """tests for Columns and the Place views over them"""
+
+    def setUp(self):
+        """a few places in a fresh set of columns"""
+        self.columns = Columns()
+        self.places = []
+        for price, guests in ((50, 2), (80, 4), (120, 6), (90, 5)):
+            place = Place()
+            place.price_by_night = price
+            place.max_guest = guests
+            self.columns.attach(place)
+            self.places.append(place)
+
+    def test_select(self):
+        """select applies every condition"""
+        p = self.places
+        self.assertEqual(self.columns.select(price_by_night__lt=100,
+                                             max_guest__ge=4), [p[1], p[3]])
+        self.assertEqual(self.columns.select(max_guest=6), [p[2]])
+        self.assertEqual(self.columns.select(price_by_night__ne=50),
+                         p[1:])
+        self.assertEqual(self.columns.select(), p)
+        with self.assertRaises(ValueError):
+            self.columns.select(name="x")
+        with self.assertRaises(ValueError):
+            self.columns.select(max_guest__in=2)
+
+    def test_update_detach(self):
+        """rows follow updates and detached objects stop matching"""
+        p = self.places
+        p[0].price_by_night = 500
+        self.columns.update(p[0], "price_by_night")
+        self.assertEqual(self.columns.select(price_by_night__gt=100),
+                         [p[0], p[2]])
+        self.columns.detach(p[2])
+        self.assertEqual(self.columns.select(price_by_night__gt=100), [p[0]])
+        self.assertEqual(len(self.columns), 3)
+
+    def test_not_a_number(self):
+        """values that are not numbers never match"""
+        self.places[0].max_guest = "many"
+        self.columns.update(self.places[0], "max_guest")
+        self.assertNotIn(self.places[0],
+                         self.columns.select(max_guest__ne=4))
+
+    def test_view(self):
+        """a view keeps its numeric attributes in its row only"""
+        place = view(Place)(**self.places[1].to_dict())
+        self.assertIsInstance(place, PlaceView)
+        self.assertEqual(place.__class__.__name__, "Place")
+        self.columns.attach(place)
+        self.assertNotIn("price_by_night", place.__dict__)
+        self.assertEqual(place.price_by_night, 80)
+        self.assertIs(type(place.price_by_night), int)
+        self.assertEqual(place.number_rooms, 0)
+        self.assertEqual(place.to_dict(), self.places[1].to_dict())
+        place.price_by_night = 10
+        self.assertIn(place, self.columns.select(price_by_night__lt=20))
+        place.latitude = 3
+        self.assertIs(type(place.latitude), int)
+        self.columns.detach(place)
+        self.assertEqual(place.__dict__["price_by_night"], 10)
+        self.assertNotIn("number_rooms", place.__dict__)
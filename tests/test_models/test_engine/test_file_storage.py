@@ -6,16 +6,57 @@ from models.place import Place
 from models.state import State
 from models.review import Review
 from models.amenity import Amenity
+from models.engine.mapped import Snapshot
+from models.engine.columns import Columns
 from models.engine.file_storage import FileStorage
+from models.engine.spatial import Grid
 from models.base_model import BaseModel
 import os
+import subprocess
+import sys
 import json
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import threading
 import unittest
+import unittest.mock
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class ScratchStorage:
+    """Mixin pointing FileStorage at the scratch file scratch, on an empty
+    state, for each test: every class-level attribute of the storage is
+    saved in setUp and put back in tearDown, and the files whose name
+    starts like the scratch file's (journals, locks, shards) are removed"""
+    scratch = "scratch_test.json"
+    state = ("file_path", "objects", "dirty", "cache", "packs", "classes",
+             "refs", "links", "columns", "sorted", "grid", "texts",
+             "bitmaps", "built", "indexed", "raw", "mutable", "seen")
+
+    def setUp(self):
+        """saves the storage state and starts on an empty one"""
+        self.saved = {name: getattr(FileStorage, "_FileStorage__" + name)
+                      for name in self.state}
+        for name, value in self.saved.items():
+            if isinstance(value, (dict, set)):
+                setattr(FileStorage, "_FileStorage__" + name, type(value)())
+        FileStorage._FileStorage__file_path = self.scratch
+        FileStorage._FileStorage__indexed = None
+        FileStorage._FileStorage__columns = Columns()
+        FileStorage._FileStorage__grid = Grid()
+
+    def tearDown(self):
+        """puts the storage state back and removes the scratch files"""
+        for name, value in self.saved.items():
+            setattr(FileStorage, "_FileStorage__" + name, value)
+        stem = self.scratch.split(".")[0] + "."
+        for name in os.listdir("."):
+            if name.startswith(stem):
+                os.remove(name)
+
+
 class TestFileStorage(unittest.TestCase):
     """test for FileStorage class"""
 
@@ -90,3 +131,1089 @@ class TestFileStorage(unittest.TestCase):
         new_strg = FileStorage()
         new_strg.reload()
         self.assertEqual(new_strg.all()[obj_name].some_attribute, "modified")
+
+
+class TestFileStorageJournal(ScratchStorage, unittest.TestCase):
+    """tests for the append-only journal mode of FileStorage"""
+    scratch = "journal_test.json"
+
+    def setUp(self):
+        """points the storage at a scratch file with an empty store"""
+        super().setUp()
+        self.strg = FileStorage(journal=True)
+
+    def test_save_appends(self):
+        """save writes one journal record per changed object only"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        self.assertFalse(os.path.isfile("journal_test.json"))
+        city = City()
+        self.strg.new(city)
+        self.strg.save()
+        with open("journal_test.json.journal") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["key"] for r in records],
+                         ["User." + user.id, "City." + city.id])
+
+    def test_reload_replays(self):
+        """reload rebuilds objects from the snapshot plus the journal"""
+        user, state = User(), State()
+        for obj in (user, state):
+            self.strg.new(obj)
+        self.strg.save()
+        user.first_name = "Betty"
+        self.strg.new(user)
+        self.strg.delete(state)
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        objs = self.strg.all()
+        self.assertEqual(list(objs.keys()), ["User." + user.id])
+        self.assertEqual(objs["User." + user.id].first_name, "Betty")
+
+    def test_torn_record(self):
+        """a half written last record is ignored by reload"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        with open("journal_test.json.journal", "a") as f:
+            f.write('{"key": "User.x", "obj": {"id"')
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual(list(self.strg.all().keys()), ["User." + user.id])
+
+    def test_compact(self):
+        """compact folds the journal into the snapshot"""
+        for cls in classes.values():
+            self.strg.new(cls())
+        self.strg.save()
+        keys = set(self.strg.all().keys())
+        self.strg.compact()
+        self.assertFalse(os.path.isfile("journal_test.json.journal"))
+        self.assertFalse(os.path.isfile("journal_test.json.journal.1"))
+        with open("journal_test.json") as f:
+            self.assertEqual(set(json.load(f).keys()), keys)
+
+    def test_compact_merges(self):
+        """compact applies updates and deletions to an existing snapshot"""
+        user, city = User(), City()
+        for obj in (user, city):
+            self.strg.new(obj)
+        self.strg.save_changes(self.strg.all())
+        user.first_name = "Betty"
+        self.strg.delete(city)
+        state = State()
+        self.strg.new(state)
+        self.strg.save()
+        self.strg.compact()
+        with open("journal_test.json") as f:
+            data = json.load(f)
+        self.assertEqual(set(data.keys()),
+                         {"User." + user.id, "State." + state.id})
+        self.assertEqual(data["User." + user.id]["first_name"], "Betty")
+
+    def test_save_while_folding(self):
+        """saves append to the active journal while the sealed one is
+        folded, without waiting for it, and both end up in the store"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        folding, go = threading.Event(), threading.Event()
+        merge = self.strg._FileStorage__merge
+
+        def slow(temp):
+            folding.set()
+            go.wait(10)
+            return merge(temp)
+        with unittest.mock.patch.object(
+                self.strg, "_FileStorage__merge", slow):
+            self.strg.compact(wait=False)
+            self.assertTrue(folding.wait(10))
+            city = City()
+            self.strg.new(city)
+            saver = threading.Thread(target=self.strg.save)
+            saver.start()
+            saver.join(5)
+            self.assertFalse(saver.is_alive())
+            go.set()
+            self.strg.close()
+        with open("journal_test.json") as f:
+            self.assertEqual(set(json.load(f)), {"User." + user.id})
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual(set(self.strg.all()),
+                         {"User." + user.id, "City." + city.id})
+
+    def test_threshold(self):
+        """the journal is compacted once it grows past the threshold"""
+        strg = FileStorage(journal=True, threshold=1)
+        strg.new(User())
+        strg.save()
+        strg.compact()
+        self.assertTrue(os.path.isfile("journal_test.json"))
+        self.assertFalse(os.path.isfile("journal_test.json.journal"))
+
+
+class TestFileStorageDirty(ScratchStorage, unittest.TestCase):
+    """tests for the dirty-object tracking of FileStorage"""
+    scratch = "dirty_test.json"
+
+    def setUp(self):
+        """points the storage at a scratch file with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_modified(self):
+        """setting an attribute flags only stored objects as dirty"""
+        user = User()
+        self.strg.new(user)
+        self.strg.save()
+        self.assertEqual(self.strg._FileStorage__dirty, {})
+        user.first_name = "Betty"
+        loose = User(**user.to_dict())
+        loose.first_name = "Holly"
+        self.assertEqual(self.strg._FileStorage__dirty,
+                         {"User." + user.id: user})
+
+    def test_clean_objects_not_serialized(self):
+        """save reuses the cached JSON of objects that did not change"""
+        user, city = User(), City()
+        for obj in (user, city):
+            self.strg.new(obj)
+        self.strg.save()
+        user.__dict__["first_name"] = "untracked"
+        city.name = "Lagos"
+        self.strg.save()
+        with open("dirty_test.json") as f:
+            data = json.load(f)
+        self.assertNotIn("first_name", data["User." + user.id])
+        self.assertEqual(data["City." + city.id]["name"], "Lagos")
+
+    def test_delete(self):
+        """deleted objects are dropped from the next snapshot"""
+        user, city = User(), City()
+        for obj in (user, city):
+            self.strg.new(obj)
+        self.strg.save()
+        self.strg.delete(user)
+        self.strg.save()
+        with open("dirty_test.json") as f:
+            self.assertEqual(list(json.load(f).keys()), ["City." + city.id])
+
+    def test_changed_in_place(self):
+        """lists and dicts changed in place, which sets no attribute, are
+        saved all the same, to the snapshot or to the journal"""
+        for strg in (self.strg, FileStorage(journal=True)):
+            user = User()
+            strg.new(user)
+            user.prefs = {"lang": "en"}
+            user.tags = ["x"]
+            strg.save()
+            user.prefs["lang"] = "fr"
+            user.tags.append("y")
+            strg.save()
+            FileStorage._FileStorage__objects = {}
+            strg.reload()
+            loaded = strg.get(User, user.id)
+            self.assertEqual(loaded.prefs, {"lang": "fr"})
+            self.assertEqual(loaded.tags, ["x", "y"])
+            loaded.tags.append("z")
+            strg.save()
+            FileStorage._FileStorage__objects = {}
+            strg.reload()
+            self.assertEqual(strg.get(User, user.id).tags, ["x", "y", "z"])
+
+
+class TestFileStorageClassIndex(ScratchStorage, unittest.TestCase):
+    """tests for the per-class index behind all(cls) and count(cls)"""
+    scratch = "index_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_all_cls(self):
+        """all(cls) only returns instances of cls, keyed as in all()"""
+        users = [User(), User()]
+        city = City()
+        expected = {"User." + u.id: u for u in users}
+        self.assertEqual(self.strg.all(User), expected)
+        self.assertEqual(self.strg.all("User"), expected)
+        self.assertEqual(self.strg.all(City), {"City." + city.id: city})
+        self.assertEqual(self.strg.all(Review), {})
+        self.assertEqual(self.strg.all("Nope"), {})
+
+    def test_count(self):
+        """count follows creation and deletion"""
+        users = [User() for i in range(3)]
+        State()
+        self.assertEqual(self.strg.count(), 4)
+        self.assertEqual(self.strg.count(User), 3)
+        self.assertEqual(self.strg.count("State"), 1)
+        self.strg.delete(users[0])
+        self.assertEqual(self.strg.count(User), 2)
+        self.assertEqual(self.strg.count(Place), 0)
+
+    def test_objects_swapped(self):
+        """the index follows __objects being replaced wholesale"""
+        User()
+        user = User()
+        FileStorage._FileStorage__objects = {"User." + user.id: user}
+        self.assertEqual(self.strg.count(User), 1)
+        del FileStorage._FileStorage__objects["User." + user.id]
+        self.assertEqual(self.strg.all(User), {})
+
+
+class TestFileStorageRelations(ScratchStorage, unittest.TestCase):
+    """tests for the foreign key indexes behind related()"""
+    scratch = "relations_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_built_on_first_use(self):
+        """an index is only built by the first lookup that needs it, and
+        kept up to date from then on"""
+        built = FileStorage._FileStorage__built
+        city = City()
+        place = Place()
+        place.city_id = city.id
+        self.assertEqual(built, set())
+        self.assertEqual(self.strg.related(Place, "city_id", city.id),
+                         [place])
+        self.assertEqual(built, {"relations"})
+        other = Place()
+        other.city_id = city.id
+        self.assertEqual(self.strg.related(Place, "city_id", city.id),
+                         [place, other])
+        self.assertEqual(self.strg.search(Place, "nothing"), [])
+        self.assertEqual(built, {"relations", "searchable"})
+        FileStorage._FileStorage__objects = dict(
+            FileStorage._FileStorage__objects)
+        self.assertEqual(self.strg.related(Place, "city_id", city.id),
+                         [place, other])
+        self.assertEqual(built, {"relations", "searchable"})
+
+    def test_get(self):
+        """get finds an instance by class and id"""
+        user = User()
+        self.assertIs(self.strg.get(User, user.id), user)
+        self.assertIs(self.strg.get("User", user.id), user)
+        self.assertIsNone(self.strg.get(City, user.id))
+
+    def test_related(self):
+        """related follows updates and deletion of the referencing side"""
+        place = Place()
+        reviews = [Review(), Review()]
+        for review in reviews:
+            review.place_id = place.id
+        self.assertCountEqual(
+            self.strg.related(Review, "place_id", place.id), reviews)
+        reviews[0].place_id = "other"
+        self.assertEqual(
+            self.strg.related("Review", "place_id", place.id), [reviews[1]])
+        self.assertEqual(
+            self.strg.related("Review", "place_id", "other"), [reviews[0]])
+        self.strg.delete(reviews[1])
+        self.assertEqual(self.strg.related(Review, "place_id", place.id), [])
+
+    def test_related_reload(self):
+        """related is rebuilt along with a replaced __objects"""
+        city = City(state_id="s1", id="c1", created_at="2024-01-01T00:00:00",
+                    updated_at="2024-01-01T00:00:00")
+        FileStorage._FileStorage__objects = {"City.c1": city}
+        self.assertEqual(self.strg.related(City, "state_id", "s1"), [city])
+
+
+class TestFileStorageLazy(ScratchStorage, unittest.TestCase):
+    """tests for the lazy reload mode of FileStorage"""
+    scratch = "lazy_test.json"
+
+    def setUp(self):
+        """saves a few objects to a scratch file and empties the store"""
+        super().setUp()
+        self.users = [User(), User()]
+        self.city = City()
+        FileStorage().save()
+        FileStorage._FileStorage__objects = {}
+        self.strg = FileStorage(lazy=True)
+        self.strg.reload()
+
+    def test_reload_builds_nothing(self):
+        """reload does not build any instance"""
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertTrue(self.strg._FileStorage__pending)
+
+    def test_count(self):
+        """count sees the unbuilt instances without building them"""
+        self.assertEqual(self.strg.count(User), 2)
+        self.assertEqual(self.strg.count(), 3)
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+
+    def test_get(self):
+        """get builds only the instance asked for"""
+        user = self.strg.get(User, self.users[0].id)
+        self.assertEqual(user.to_dict(), self.users[0].to_dict())
+        self.assertIs(self.strg.get(User, self.users[0].id), user)
+        self.assertEqual(list(FileStorage._FileStorage__objects),
+                         ["User." + user.id])
+        self.assertIsNone(self.strg.get(User, "missing"))
+
+    def test_all(self):
+        """all(cls) builds one class, all() builds the rest"""
+        self.assertEqual(list(self.strg.all(City)), ["City." + self.city.id])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+        self.assertEqual(len(self.strg.all()), 3)
+
+    def test_save_keeps_unbuilt(self):
+        """a snapshot keeps the instances that were never built"""
+        State()
+        self.strg.save()
+        with open("lazy_test.json") as f:
+            self.assertEqual(len(json.load(f)), 4)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+
+
+class TestFileStorageColumns(ScratchStorage, unittest.TestCase):
+    """tests for the numeric columns behind select()"""
+    scratch = "columns_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_select(self):
+        """select follows creation, updates and deletion of places, over
+        the instances or, if columnar, over the columns"""
+        for strg in (self.strg, FileStorage(columnar=True)):
+            cheap, dear = Place(), Place()
+            cheap.price_by_night = 40
+            dear.price_by_night = 400
+            self.assertEqual(strg.select(Place, price_by_night__lt=100),
+                             [cheap])
+            dear.price_by_night = 60
+            self.assertCountEqual(strg.select("Place", price_by_night=60),
+                                  [dear])
+            self.assertEqual(strg.select(Place, price_by_night__ne=40,
+                                         max_guest__ge=0), [dear])
+            strg.delete(dear)
+            self.assertEqual(strg.select(Place, price_by_night__gt=0),
+                             [cheap])
+            with self.assertRaises(ValueError):
+                strg.select(User, price_by_night=0)
+            with self.assertRaises(ValueError):
+                strg.select(Place, name=400)
+            strg.delete(cheap)
+
+    def test_columns_kept_if_columnar(self):
+        """the columns are only kept once a columnar storage is made"""
+        def rows():
+            return len(FileStorage._FileStorage__columns)
+        place = Place()
+        place.price_by_night = 40
+        self.assertEqual(rows(), 0)
+        FileStorage(columnar=True)
+        self.assertEqual(rows(), 1)
+        Place()
+        self.assertEqual(rows(), 2)
+
+    def test_columnar_reload(self):
+        """a columnar storage reloads places as views"""
+        place = Place()
+        place.max_guest = 3
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(columnar=True)
+        strg.reload()
+        loaded = strg.get(Place, place.id)
+        self.assertNotIn("max_guest", loaded.__dict__)
+        self.assertEqual(strg.select(Place, max_guest=3), [loaded])
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+
+class TestFileStorageBatch(ScratchStorage, unittest.TestCase):
+    """tests for FileStorage.batch()"""
+    scratch = "batch_test.json"
+
+    def setUp(self):
+        """points the storage at a scratch file with an empty store"""
+        super().setUp()
+        from models import storage
+        self.strg = storage
+
+    def test_one_flush(self):
+        """saves inside a batch are written once, when it ends"""
+        with self.strg.batch():
+            self.assertTrue(self.strg.batching)
+            for i in range(3):
+                User().save()
+            with self.strg.batch():
+                City().save()
+            self.assertFalse(os.path.isfile("batch_test.json"))
+        self.assertFalse(self.strg.batching)
+        with open("batch_test.json") as f:
+            self.assertEqual(len(json.load(f)), 4)
+
+    def test_no_save(self):
+        """a batch without save() writes nothing"""
+        with self.strg.batch():
+            User()
+        self.assertFalse(os.path.isfile("batch_test.json"))
+
+    def test_rollback(self):
+        """an exception undoes the changes made in the batch"""
+        kept, gone = User(), User()
+        kept.first_name = "Betty"
+        place = Place()
+        self.strg.save()
+        dirty = dict(self.strg._FileStorage__dirty)
+        before = dict(self.strg.all())
+        with self.assertRaises(KeyError):
+            with self.strg.batch():
+                City()
+                self.strg.delete(gone)
+                kept.first_name = "Holly"
+                kept.last_name = "Hopper"
+                place.user_id = kept.id
+                kept.save()
+                raise KeyError("oops")
+        self.assertEqual(self.strg.all(), before)
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertNotIn("last_name", kept.__dict__)
+        self.assertEqual(kept.places, [])
+        self.assertEqual(self.strg._FileStorage__dirty, dirty)
+        self.assertFalse(self.strg.batching)
+        with open("batch_test.json") as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+
+class TestFileStorageAtomic(ScratchStorage, unittest.TestCase):
+    """tests for the atomic, checksummed snapshots"""
+    scratch = "atomic_test.json"
+
+    def test_no_temp_file_left(self):
+        """save() replaces the file, leaving no temporary file behind"""
+        strg = FileStorage()
+        strg.new(User())
+        strg.save()
+        self.assertTrue(os.path.isfile("atomic_test.json"))
+        self.assertFalse(os.path.isfile("atomic_test.json.tmp"))
+
+    def test_failed_write_keeps_old_file(self):
+        """a write that fails leaves the previous snapshot untouched and
+        raises instead of passing silently"""
+        strg = FileStorage()
+        strg.new(User())
+        strg.save()
+        with open("atomic_test.json") as f:
+            before = f.read()
+        strg.new(City())
+        with unittest.mock.patch("os.fsync", side_effect=OSError("full")):
+            with self.assertRaises(OSError):
+                strg.save()
+        with open("atomic_test.json") as f:
+            self.assertEqual(f.read(), before)
+        self.assertFalse(os.path.isfile("atomic_test.json.tmp"))
+
+    def test_checksum(self):
+        """a checksummed snapshot reloads, a tampered one is rejected"""
+        strg = FileStorage(checksum=True)
+        user = User()
+        strg.new(user)
+        strg.save()
+        with open("atomic_test.json") as f:
+            text = f.read()
+        self.assertRegex(text, r"\n#sha256:[0-9a-f]{64}\n$")
+        FileStorage._FileStorage__objects = {}
+        strg.reload()
+        self.assertIn("User." + user.id, strg.all())
+        with open("atomic_test.json", "w") as f:
+            f.write(text.replace(user.id, "x" * len(user.id)))
+        FileStorage._FileStorage__objects = {}
+        with self.assertRaises(ValueError):
+            strg.reload()
+        self.assertEqual(strg.all(), {})
+
+    def test_torn_file(self):
+        """reload() rejects a truncated snapshot, loading nothing"""
+        strg = FileStorage()
+        for i in range(3):
+            strg.new(User())
+        strg.save()
+        with open("atomic_test.json") as f:
+            text = f.read()
+        with open("atomic_test.json", "w") as f:
+            f.write(text[:len(text) * 2 // 3])
+        FileStorage._FileStorage__objects = {}
+        with self.assertRaises(ValueError):
+            strg.reload()
+        self.assertEqual(strg.all(), {})
+
+
+class TestFileStorageBackground(ScratchStorage, unittest.TestCase):
+    """tests for the background writer"""
+    scratch = "async_test.json"
+
+    def test_flush(self):
+        """save() leaves the writing to the writer, flush() waits for it"""
+        strg = FileStorage(background=True, interval=60)
+        for i in range(3):
+            strg.new(User())
+            strg.save()
+        self.assertFalse(os.path.isfile("async_test.json"))
+        strg.flush()
+        with open("async_test.json") as f:
+            self.assertEqual(len(json.load(f)), 3)
+        strg.close()
+
+    def test_limit(self):
+        """the writer doesn't wait for the interval past limit objects"""
+        strg = FileStorage(background=True, interval=60, limit=2)
+        strg.new(User())
+        strg.new(User())
+        strg.save()
+        writer = strg._FileStorage__writer
+        for i in range(100):
+            if os.path.isfile("async_test.json"):
+                break
+            writer.join(0.05)
+        self.assertTrue(os.path.isfile("async_test.json"))
+        strg.close()
+
+    def test_close(self):
+        """close() writes what is pending and stops the writer"""
+        strg = FileStorage(background=True, interval=60)
+        strg.new(User())
+        strg.save()
+        writer = strg._FileStorage__writer
+        strg.close()
+        self.assertFalse(writer.is_alive())
+        with open("async_test.json") as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+    def test_batch(self):
+        """the writer leaves the changes of an open batch alone, so that
+        one rolled back never reaches the file"""
+        strg = FileStorage(background=True, interval=0.01)
+        with unittest.mock.patch("models.storage", strg):
+            user = User()
+            user.first_name = "Betty"
+            strg.save()
+            strg.flush()
+            city = City()
+            strg.save()
+            with self.assertRaises(KeyError):
+                with strg.batch():
+                    user.first_name = "Holly"
+                    for i in range(10):
+                        strg._FileStorage__writer.join(0.01)
+                    raise KeyError("oops")
+            strg.close()
+        self.assertEqual(user.first_name, "Betty")
+        with open("async_test.json") as f:
+            data = json.load(f)
+        self.assertEqual(data["User." + user.id]["first_name"], "Betty")
+        self.assertIn("City." + city.id, data)
+
+    def test_error(self):
+        """an error of the writer is raised by the next flush()"""
+        strg = FileStorage(background=True, interval=0.01)
+        strg.new(User())
+        with unittest.mock.patch("os.fsync", side_effect=OSError("full")):
+            strg.save()
+            for i in range(100):
+                if strg._FileStorage__error is not None:
+                    break
+                strg._FileStorage__writer.join(0.01)
+        with self.assertRaises(OSError):
+            strg.flush()
+        strg.close()
+
+
+class TestFileStorageThreads(ScratchStorage, unittest.TestCase):
+    """tests for the storage shared by threads"""
+    scratch = "threads_test.json"
+
+    def test_concurrent(self):
+        """writers, readers and saves running together lose nothing"""
+        strg = FileStorage()
+        errors = []
+
+        def write():
+            try:
+                for i in range(50):
+                    user = User()
+                    user.first_name = "n{}".format(i)
+                    strg.save()
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            try:
+                for i in range(100):
+                    for obj in strg.all(User).values():
+                        strg.get(User, obj.id)
+                    strg.count(User)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write) for i in range(4)] + \
+            [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(strg.count(User), 200)
+        with open("threads_test.json") as f:
+            self.assertEqual(len(json.load(f)), 200)
+
+
+class TestFileStorageProcesses(ScratchStorage, unittest.TestCase):
+    """tests for storages of several processes sharing one file"""
+    scratch = "procs_test.json"
+
+    def other(self, code, journal=False):
+        """runs code in another process sharing the file, which saves"""
+        script = "\n".join([
+            "from models.engine.file_storage import FileStorage",
+            "FileStorage._FileStorage__file_path = 'procs_test.json'",
+            "FileStorage._FileStorage__objects = {}",
+            "from models import storage",
+            "from models.user import User",
+            "storage.reload()",
+            code,
+            "storage.save()"])
+        env = dict(os.environ, HBNB_JOURNAL="1" if journal else "0")
+        result = subprocess.run([sys.executable, "-c", script], env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.strip()
+
+    def test_no_lost_update(self):
+        """a save keeps what another process saved meanwhile"""
+        strg = FileStorage()
+        mine = User()
+        strg.save()
+        theirs = self.other("print(User().id)")
+        later = User()
+        strg.save()
+        with open("procs_test.json") as f:
+            keys = set(json.load(f))
+        self.assertEqual(keys, {"User." + id for id in
+                                (mine.id, theirs, later.id)})
+
+    def test_refresh_changed_only(self):
+        """refresh() only rebuilds the records changed by another process"""
+        strg = FileStorage()
+        first, second = User(), User()
+        strg.save()
+        self.other("storage.get(User, '{}').first_name = 'Betty'".format(
+            first.id))
+        strg.refresh()
+        self.assertIsNot(strg.get(User, first.id), first)
+        self.assertEqual(strg.get(User, first.id).first_name, "Betty")
+        self.assertIs(strg.get(User, second.id), second)
+
+    def test_no_lock_file(self):
+        """reading a store with no file yet leaves no lock file, which the
+        first save makes"""
+        strg = FileStorage()
+        strg.reload()
+        strg.refresh()
+        self.assertFalse(os.path.exists("procs_test.json.lock"))
+        strg.new(User())
+        strg.save()
+        self.assertTrue(os.path.exists("procs_test.json.lock"))
+
+    def test_journal(self):
+        """deletions in another process' journal are picked up"""
+        strg = FileStorage(journal=True)
+        user, kept = User(), User()
+        strg.save()
+        self.other("storage.delete(storage.get(User, '{}'))".format(
+            user.id), journal=True)
+        strg.refresh()
+        self.assertIsNone(strg.get(User, user.id))
+        self.assertIs(strg.get(User, kept.id), kept)
+
+
+class TestFileStorageShards(ScratchStorage, unittest.TestCase):
+    """tests for the storage sharded over one file per class"""
+    scratch = "shards_test.json"
+
+    def load(self, path):
+        """the JSON object in the file at path"""
+        with open(path) as f:
+            return json.load(f)
+
+    def test_per_class(self):
+        """each class has its file, only the changed ones are rewritten"""
+        strg = FileStorage(shards={})
+        user, city = User(), City()
+        strg.save()
+        self.assertEqual(list(self.load("shards_test.User.json")),
+                         ["User." + user.id])
+        self.assertEqual(list(self.load("shards_test.City.json")),
+                         ["City." + city.id])
+        before = os.stat("shards_test.User.json")
+        city.name = "Lagos"
+        strg.save()
+        self.assertEqual(os.stat("shards_test.User.json"), before)
+        self.assertEqual(self.load("shards_test.City.json")[
+            "City." + city.id]["name"], "Lagos")
+        self.assertFalse(os.path.isfile("shards_test.json"))
+
+    def test_hash_shards(self):
+        """a class given several shards is spread over them by id"""
+        strg = FileStorage(shards={"Review": 4})
+        reviews = [Review() for i in range(20)]
+        strg.save()
+        keys = {}
+        for n in range(4):
+            path = "shards_test.Review.{}.json".format(n)
+            if os.path.isfile(path):
+                keys.update(dict.fromkeys(self.load(path), path))
+        self.assertEqual(set(keys), {"Review." + r.id for r in reviews})
+        self.assertGreater(len(set(keys.values())), 1)
+        FileStorage._FileStorage__objects = {}
+        strg.reload()
+        self.assertEqual(strg.count(Review), 20)
+
+    def test_from_single_file(self):
+        """a single file is read once, then split into shards"""
+        strg = FileStorage()
+        user = User()
+        strg.save()
+        FileStorage._FileStorage__objects = {}
+        sharded = FileStorage(shards={})
+        sharded.reload()
+        self.assertIsNotNone(sharded.get(User, user.id))
+        City()
+        sharded.save()
+        self.assertIn("User." + user.id, self.load("shards_test.User.json"))
+        FileStorage._FileStorage__objects = {}
+        sharded.reload()
+        self.assertEqual(sharded.count(), 2)
+
+    def test_parallel_reload(self):
+        """reload() reads the shards over a process pool"""
+        strg = FileStorage(shards={"User": 3}, workers=2)
+        users = [User() for i in range(10)]
+        Place()
+        strg.save()
+        FileStorage._FileStorage__objects = {}
+        with unittest.mock.patch(
+                "models.engine.file_storage.PARALLEL", 0), \
+                unittest.mock.patch(
+                    "models.engine.file_storage.ProcessPoolExecutor",
+                    wraps=ProcessPoolExecutor) as pool:
+            strg.reload()
+        pool.assert_called_once()
+        self.assertEqual(strg.count(User), 10)
+        self.assertEqual(strg.count(Place), 1)
+
+    def test_no_journal(self):
+        """the journal can't be used with shards"""
+        with self.assertRaises(ValueError):
+            FileStorage(journal=True, shards={})
+
+
+class TestFileStorageSerializer(ScratchStorage, unittest.TestCase):
+    """tests for the storage with a binary snapshot"""
+    scratch = "format_test.json"
+
+    def test_pickle(self):
+        """a pickle snapshot reloads the same objects, read by any storage"""
+        strg = FileStorage(serializer="pickle")
+        user = User()
+        user.first_name = "Betty"
+        place = Place()
+        place.amenity_ids = ["a"]
+        strg.save()
+        with open("format_test.json", "rb") as f:
+            self.assertFalse(f.read(1) == b"{")
+        FileStorage._FileStorage__objects = {}
+        FileStorage().reload()
+        loaded = strg.get(User, user.id)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertIs(type(loaded.created_at), datetime)
+        self.assertEqual(strg.get(Place, place.id).amenity_ids, ["a"])
+
+    def test_pickle_journal(self):
+        """the journal folds into a pickle snapshot"""
+        strg = FileStorage(serializer="pickle", journal=True)
+        user = User()
+        strg.save()
+        strg.compact()
+        user.first_name = "Betty"
+        strg.save()
+        strg.compact()
+        FileStorage._FileStorage__objects = {}
+        strg.reload()
+        self.assertEqual(strg.get(User, user.id).first_name, "Betty")
+
+    def test_mmap(self):
+        """a lazy storage maps an mmap snapshot and decodes only the
+        records it reads"""
+        strg = FileStorage(serializer="mmap", journal=True)
+        users = [User() for _ in range(20)]
+        strg.save()
+        strg.compact()
+        strg.delete(users[1])
+        users[2].first_name = "Betty"
+        strg.save()
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(serializer="mmap", journal=True, lazy=True)
+        strg.reload()
+        record = unittest.mock.patch.object(
+            Snapshot, "record", autospec=True, side_effect=Snapshot.record)
+        with record as rec:
+            self.assertEqual(strg.count(User), 19)
+            self.assertIsNone(strg.get(User, users[1].id))
+            self.assertEqual(strg.get(User, users[2].id).first_name, "Betty")
+            self.assertEqual(strg.get(User, users[3].id).id, users[3].id)
+            self.assertEqual(rec.call_count, 1)
+        self.assertEqual(len(strg.all(User)), 19)
+        strg.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage().reload()
+        self.assertEqual(len(FileStorage().all(User)), 19)
+
+    def test_gzip(self):
+        """a gzip snapshot, checksummed and journaled, reloads the same
+        objects, read by any storage"""
+        strg = FileStorage(compress="gzip", checksum=True, journal=True)
+        user = User()
+        user.first_name = "Betty"
+        strg.save()
+        strg.compact()
+        Place()
+        strg.save()
+        strg.compact()
+        with open("format_test.json", "rb") as f:
+            self.assertEqual(f.read(2), b"\x1f\x8b")
+        FileStorage._FileStorage__objects = {}
+        strg = FileStorage(lazy=True, checksum=True)
+        strg.reload()
+        self.assertEqual(strg.get(User, user.id).first_name, "Betty")
+        self.assertEqual(strg.count(Place), 1)
+        with self.assertRaises(ValueError):
+            FileStorage(compress="lz4")
+        with self.assertRaises(ValueError):
+            FileStorage(compress="gzip", serializer="mmap")
+
+
+class TestFileStorageOrdered(ScratchStorage, unittest.TestCase):
+    """tests for the ordered indexes behind between()"""
+    scratch = "ordered_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_between(self):
+        """between follows creation, updates and deletion of places"""
+        places = [Place() for _ in range(4)]
+        for place, price in zip(places, [150, 50, 120, 90]):
+            place.price_by_night = price
+        self.assertEqual(self.strg.between(Place, "price_by_night",
+                                           ge=50, le=120),
+                         [places[1], places[3], places[2]])
+        places[0].price_by_night = 60
+        self.strg.delete(places[3])
+        self.assertEqual(self.strg.between("Place", "price_by_night",
+                                           reverse=True, limit=2),
+                         [places[2], places[0]])
+        self.assertCountEqual(self.strg.between(Place, "max_guest", eq=0),
+                              places[:3])
+        with self.assertRaises(ValueError):
+            self.strg.between(Place, "name")
+        with self.assertRaises(ValueError):
+            self.strg.between(Place, "price_by_night", ne=1)
+
+    def test_updated_at(self):
+        """objects updated lately, of a class or of every one"""
+        user, city = User(), City()
+        start = datetime.now()
+        city.save()
+        self.assertEqual(self.strg.between(None, "updated_at", gt=start),
+                         [city])
+        user.save()
+        self.assertEqual(self.strg.between(None, "updated_at", gt=start),
+                         [city, user])
+        self.assertEqual(self.strg.between(User, "updated_at",
+                                           lt=start), [])
+        self.assertEqual(self.strg.between(None, "updated_at",
+                                           reverse=True, limit=1), [user])
+
+    def test_reload(self):
+        """the indexes are rebuilt from the reloaded objects"""
+        place = Place()
+        place.price_by_night = 75
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual([p.id for p in self.strg.between(
+            Place, "price_by_night", lt=100)], [place.id])
+
+    def test_unordered(self):
+        """the instances the index can't sort are kept apart"""
+        priced, free, odd = Place(), Place(), Place()
+        priced.price_by_night = 10
+        free.price_by_night = None
+        odd.price_by_night = "ask"
+        self.assertCountEqual(self.strg.unordered(Place, "price_by_night"),
+                              [free, odd])
+        odd.price_by_night = 5
+        self.assertEqual(self.strg.unordered("Place", "price_by_night"),
+                         [free])
+        self.strg.delete(free)
+        self.assertEqual(self.strg.unordered(Place, "price_by_night"), [])
+        with self.assertRaises(ValueError):
+            self.strg.unordered(Place, "name")
+
+
+class TestFileStorageSpatial(ScratchStorage, unittest.TestCase):
+    """tests for the spatial index behind within() and near()"""
+    scratch = "spatial_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_near(self):
+        """near and within follow creation, moves and deletion"""
+        ikeja, lekki = Place(), Place()
+        ikeja.latitude, ikeja.longitude = 6.6018, 3.3515
+        lekki.latitude, lekki.longitude = 6.4698, 3.5852
+        self.assertEqual(self.strg.near(6.6, 3.35, 5), [ikeja])
+        self.assertEqual(self.strg.near(6.6, 3.35, 50), [ikeja, lekki])
+        self.assertCountEqual(self.strg.within(6, 3, 7, 4), [ikeja, lekki])
+        lekki.latitude = 6.6
+        lekki.longitude = 3.36
+        self.assertEqual(self.strg.near(6.6, 3.36, 5), [lekki, ikeja])
+        self.strg.delete(ikeja)
+        self.assertEqual(self.strg.within(6, 3, 7, 4), [lekki])
+
+    def test_reload(self):
+        """the index is rebuilt from the reloaded places"""
+        place = Place()
+        place.latitude = 9.0765
+        place.longitude = 7.3986
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual([p.id for p in self.strg.near(9, 7.4, 10)],
+                         [place.id])
+
+
+class TestFileStorageSearch(ScratchStorage, unittest.TestCase):
+    """tests for the full-text indexes behind search()"""
+    scratch = "search_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_search(self):
+        """search follows creation, updates and deletion"""
+        calm, loud = Review(), Review()
+        calm.text = "Quiet and clean"
+        loud.text = "Noisy but clean"
+        place = Place()
+        place.name = "Loft"
+        place.description = "A quiet loft"
+        self.assertEqual(self.strg.search(Review, "quiet"), [calm])
+        self.assertEqual(self.strg.search("Place", "QUIET loft"), [place])
+        loud.text = "Quiet at night, quiet all day"
+        self.assertEqual(self.strg.search(Review, "quiet"), [loud, calm])
+        self.strg.delete(loud)
+        self.assertEqual(self.strg.search(Review, "quiet"), [calm])
+        self.assertEqual(self.strg.search(Amenity, "wifi"), [])
+        with self.assertRaises(ValueError):
+            self.strg.search(User, "quiet")
+
+    def test_reload(self):
+        """the indexes are rebuilt from the reloaded objects"""
+        amenity = Amenity()
+        amenity.name = "Wifi"
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual([a.id for a in self.strg.search(Amenity, "wifi")],
+                         [amenity.id])
+
+
+class TestFileStorageListed(ScratchStorage, unittest.TestCase):
+    """tests for the membership bitmaps behind having()"""
+    scratch = "listed_test.json"
+
+    def setUp(self):
+        """starts every test with an empty store"""
+        super().setUp()
+        self.strg = FileStorage()
+
+    def test_having(self):
+        """having follows creation, updates and deletion"""
+        wifi, pool = Amenity(), Amenity()
+        both, one, none = Place(), Place(), Place()
+        both.amenity_ids = [wifi.id, pool.id]
+        one.amenity_ids = [wifi.id]
+        having = self.strg.having
+        self.assertEqual(having(Place, "amenity_ids", [wifi.id, pool.id]),
+                         [both])
+        self.assertCountEqual(having("Place", "amenity_ids",
+                                     any_of=[pool.id, wifi.id]), [both, one])
+        self.assertEqual(wifi.places, [both, one])
+        one.amenity_ids = [pool.id]
+        self.assertCountEqual(having(Place, "amenity_ids", [pool.id]),
+                              [both, one])
+        self.strg.delete(both)
+        self.assertEqual(having(Place, "amenity_ids", [pool.id]), [one])
+        self.assertEqual(having(Place, "amenity_ids", [wifi.id]), [])
+        self.assertNotIn("amenity_ids", none.__dict__)
+        with self.assertRaises(ValueError):
+            having(Place, "city_id", ["x"])
+
+    def test_reload(self):
+        """the bitmaps are rebuilt from the reloaded objects"""
+        place = Place()
+        place.amenity_ids = ["wifi"]
+        self.strg.save()
+        FileStorage._FileStorage__objects = {}
+        self.strg.reload()
+        self.assertEqual([p.id for p in self.strg.having(
+            Place, "amenity_ids", ["wifi"])], [place.id])
+
+    def test_changed_in_place(self):
+        """having follows lists changed in place, on reloaded regular and
+        compact places, and a failed batch puts their values back"""
+        from models import storage
+        place = Place()
+        place.amenity_ids = ["wifi"]
+        self.strg.save()
+        for strg in (self.strg, FileStorage(compact=True)):
+            FileStorage._FileStorage__objects = {}
+            strg.reload()
+            loaded = strg.get(Place, place.id)
+            loaded.amenity_ids.append("pool")
+            self.assertEqual([p.id for p in strg.having(
+                Place, "amenity_ids", ["wifi", "pool"])], [place.id])
+            with self.assertRaises(KeyError):
+                with storage.batch():
+                    loaded.amenity_ids.remove("wifi")
+                    raise KeyError("rolled back")
+            self.assertEqual(loaded.amenity_ids, ["wifi", "pool"])
+            self.assertEqual(len(strg.having(Place, "amenity_ids",
+                                             ["wifi"])), 1)
+            loaded.amenity_ids.remove("pool")
+            strg.save()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""The json_stream test module"""
+from io import StringIO
+from models.engine.json_stream import iter_items
+import json
+import unittest
+
+
+class TestIterItems(unittest.TestCase):
+    """tests for iter_items"""
+
+    def test_items(self):
+        """the pairs come out in file order, whatever the chunk size"""
+        data = {"User.1": {"id": "1", "n": 12345, "f": [1.5, {"a": None}]},
+                "City.2": {"id": "2", "name": 'Abuja, "FCT" {}'},
+                "Place.3": 42}
+        text = json.dumps(data)
+        for size in (1, 2, 3, 7, 1 << 16):
+            with self.subTest(size=size):
+                items = list(iter_items(StringIO(text), size))
+                self.assertEqual(items, list(data.items()))
+
+    def test_empty(self):
+        """an empty object yields nothing"""
+        self.assertEqual(list(iter_items(StringIO(" { } "), 1)), [])
+
+    def test_lazy(self):
+        """records are handed out before the rest of the file is read"""
+        fil = StringIO(json.dumps({str(i): i for i in range(1000)}))
+        items = iter_items(fil, 16)
+        self.assertEqual(next(items), ("0", 0))
+        self.assertLess(fil.tell(), 64)
+
+    def test_truncated(self):
+        """a file cut short raises ValueError"""
+        text = json.dumps({"a": {"id": "1"}, "b": {"id": "2"}})
+        for end in (0, 1, 5, len(text) - 8, len(text) - 1):
+            with self.subTest(end=end):
+                with self.assertRaises(ValueError):
+                    list(iter_items(StringIO(text[:end]), 4))
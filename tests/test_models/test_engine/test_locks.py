@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""The locks test module"""
+from models.engine.locks import RWLock
+import threading
+import unittest
+
+
+class TestRWLock(unittest.TestCase):
+    """tests for RWLock"""
+
+    def setUp(self):
+        """a fresh lock"""
+        self.lock = RWLock()
+
+    def test_readers_share(self):
+        """a reader doesn't wait for another one"""
+        inside = threading.Event()
+        with self.lock.read():
+            thread = threading.Thread(target=self.read, args=(inside,))
+            thread.start()
+            self.assertTrue(inside.wait(5))
+        thread.join()
+
+    def test_writer_excludes(self):
+        """a reader waits for the writer to be done"""
+        inside = threading.Event()
+        with self.lock.write():
+            thread = threading.Thread(target=self.read, args=(inside,))
+            thread.start()
+            self.assertFalse(inside.wait(0.1))
+        self.assertTrue(inside.wait(5))
+        thread.join()
+
+    def test_reentrant(self):
+        """the writer may write and read again, a reader read again"""
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                pass
+        with self.lock.write():
+            pass
+
+    def test_no_upgrade(self):
+        """a reader can't become the writer"""
+        with self.lock.read():
+            with self.assertRaises(RuntimeError):
+                with self.lock.write():
+                    pass
+
+    def test_contention(self):
+        """writers exclude each other and the readers, which never see a
+        write half done, and every thread gets through"""
+        state = {"a": 0, "b": 0}
+        torn = []
+
+        def write():
+            for _ in range(500):
+                with self.lock.write():
+                    state["a"] += 1
+                    state["b"] += 1
+
+        def read():
+            for _ in range(500):
+                with self.lock.read():
+                    if state["a"] != state["b"]:
+                        torn.append(dict(state))
+
+        threads = [threading.Thread(target=target)
+                   for target in (write, read) * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(state, {"a": 2000, "b": 2000})
+        self.assertEqual(torn, [])
+
+    def read(self, event):
+        """takes the lock for reading and sets event"""
+        with self.lock.read():
+            event.set()
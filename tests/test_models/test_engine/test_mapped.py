@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""The mapped snapshot test module"""
+from models.engine.mapped import MappedClass, Snapshot, pack
+import json
+import os
+import unittest
+
+
+class TestMapped(unittest.TestCase):
+    """tests for the snapshots read in place"""
+
+    def setUp(self):
+        """a snapshot of a few records of two classes"""
+        records = [("User.{}".format(i), {"id": str(i), "n": i})
+                   for i in range(5)]
+        records.append(("Place.p", {"id": "p"}))
+        self.snapshot = Snapshot(pack(
+            (key.encode(), json.dumps(obj).encode()) for key, obj in records))
+
+    def tearDown(self):
+        """removes the scratch file"""
+        if os.path.isfile("mapped_test.bin"):
+            os.remove("mapped_test.bin")
+
+    def test_lookup(self):
+        """keys are found by their sorted position"""
+        snap = self.snapshot
+        self.assertEqual(len(snap), 6)
+        self.assertEqual(snap.names(), ["Place", "User"])
+        self.assertEqual(snap.span("User"), (1, 6))
+        self.assertEqual(snap.span("Review"), (1, 1))
+        i = snap.find("User.3")
+        self.assertEqual(snap.record(i), {"id": "3", "n": 3})
+        self.assertEqual(snap.find("User.9"), -1)
+        self.assertEqual(snap.find("User.3", 0, 2), -1)
+
+    def test_open(self):
+        """a file is mapped read only"""
+        with open("mapped_test.bin", "wb") as f:
+            f.write(self.snapshot.buffer)
+        snap = Snapshot.open("mapped_test.bin")
+        self.assertEqual(list(snap.items()), list(self.snapshot.items()))
+        with self.assertRaises(TypeError):
+            snap.buffer[0] = 0
+
+    def test_bad(self):
+        """anything else is refused"""
+        with self.assertRaises(ValueError):
+            Snapshot(b"{}")
+        with self.assertRaises(ValueError):
+            Snapshot(self.snapshot.buffer[:30])
+
+    def test_class(self):
+        """MappedClass holds the changes over the records of a class"""
+        users = MappedClass(self.snapshot, "User")
+        self.assertEqual(len(users), 5)
+        self.assertIn("User.1", users)
+        self.assertNotIn("Place.p", users)
+        users["User.1"] = {"id": "1", "n": 10}
+        users["User.7"] = {"id": "7"}
+        del users["User.2"]
+        self.assertEqual(len(users), 5)
+        self.assertEqual(users["User.1"]["n"], 10)
+        self.assertEqual(sorted(users), ["User.0", "User.1", "User.3",
+                                         "User.4", "User.7"])
+        self.assertEqual(users.pop("User.0"), {"id": "0", "n": 0})
+        with self.assertRaises(KeyError):
+            del users["User.2"]
+        self.assertEqual(len(users), 4)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""The query test module"""
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.engine.query import Query
+from models.place import Place
+from models.review import Review
+from models.user import User
+import operator
+import unittest
+from unittest import mock
+
+
+class TestQuery(unittest.TestCase):
+    """tests for the queries over the storage"""
+
+    def setUp(self):
+        """a few places in two cities, in an empty store"""
+        self.objects = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        self.strg = FileStorage()
+        self.city = City()
+        self.places = []
+        for i, price in enumerate([120, 80, 40, 80]):
+            place = Place()
+            place.city_id = self.city.id if i < 3 else "elsewhere"
+            place.name = "Place {}".format(i)
+            place.price_by_night = price
+            self.places.append(place)
+
+    def tearDown(self):
+        """restores the store"""
+        FileStorage._FileStorage__objects = self.objects
+
+    def test_where(self):
+        """conditions narrow the results down"""
+        query = self.strg.query(Place)
+        self.assertIsInstance(query, Query)
+        self.assertEqual(len(list(query)), 4)
+        cheap = query.where(price_by_night__lt=100)
+        self.assertCountEqual(cheap, self.places[1:])
+        self.assertEqual(list(cheap.where(name="Place 2")),
+                         [self.places[2]])
+        self.assertEqual(list(query.where(name__in=["Place 0"])),
+                         [self.places[0]])
+        self.assertEqual(list(query.where(nothing=1)), [])
+        self.assertEqual(list(self.strg.query("User")), [])
+        with self.assertRaises(ValueError):
+            query.where(price_by_night__about=1)
+
+    def test_order_limit(self):
+        """results come sorted and cut"""
+        query = self.strg.query(Place).order_by("price_by_night", "-name")
+        self.assertEqual(list(query), [self.places[i] for i in (2, 3, 1, 0)])
+        self.assertEqual(list(query.limit(2)), [self.places[2],
+                                                self.places[3]])
+        self.assertEqual(self.strg.query(Place).order_by(
+            "-price_by_night").first(), self.places[0])
+        self.places[0].rating = 5
+        self.assertEqual(list(self.strg.query(Place).order_by(
+            "-rating").limit(2))[0], self.places[0])
+        self.places[1].rating = "good"
+        with self.assertRaises(ValueError):
+            list(self.strg.query(Place).order_by("rating"))
+
+    def test_values(self):
+        """values() projects the results on some attributes"""
+        rows = self.strg.query(Place).where(price_by_night=40).values(
+            "name", "price_by_night")
+        self.assertEqual(list(rows), [{"name": "Place 2",
+                                       "price_by_night": 40}])
+
+    def test_indexes(self):
+        """the foreign keys and the columns give the candidates"""
+        query = self.strg.query(Place)
+        with mock.patch.object(self.strg, "all") as scan:
+            found = query.where(city_id=self.city.id,
+                                price_by_night__ge=80)
+            self.assertCountEqual(found, self.places[:2])
+            found = query.where(price_by_night__ge=80, name="Place 3")
+            self.assertEqual(list(found), [self.places[3]])
+            self.assertFalse(scan.called)
+        user = User()
+        review = Review()
+        review.user_id = user.id
+        with mock.patch.object(self.strg, "related",
+                               wraps=self.strg.related) as related:
+            found = self.strg.query(Review).where(user_id=user.id)
+            self.assertEqual(list(found), [review])
+            related.assert_called_once_with("Review", "user_id", user.id)
+
+    def test_scan_unindexed(self):
+        """the Place column scan gives what testing every place gives"""
+        for place, rooms in zip(self.places, (2, 3, None, "many")):
+            place.number_rooms = rooms
+        for op in ("ne", "lt", "le", "gt", "ge", "eq"):
+            with self.subTest(op):
+                test = getattr(operator, op)
+                expected = []
+                for place in self.places:
+                    try:
+                        if test(place.number_rooms, 3):
+                            expected.append(place)
+                    except TypeError:
+                        pass
+                with mock.patch.object(self.strg, "select",
+                                       wraps=self.strg.select) as select:
+                    found = list(self.strg.query(Place).where(
+                        **{"number_rooms__" + op: 3}))
+                self.assertCountEqual(found, expected)
+                self.assertEqual(select.called, op != "ne")
+
+    def test_related_unindexed(self):
+        """a foreign key equal to what the relations don't index, such as
+        "" or None, gives what testing every place gives"""
+        self.places[2].city_id = ""
+        self.places[3].city_id = None
+        for value in (self.city.id, "", None, 0):
+            with self.subTest(value):
+                expected = [place for place in self.places
+                            if operator.eq(place.city_id, value)]
+                found = self.strg.query(Place).where(city_id=value)
+                self.assertCountEqual(found, expected)
+
+    def test_listed(self):
+        """the bitmaps give the places holding amenities"""
+        for place, ids in zip(self.places, (["wifi", "pool"], ["wifi"],
+                                            ["pool"], [])):
+            place.amenity_ids = ids
+        query = self.strg.query(Place)
+        with mock.patch.object(self.strg, "all") as scan:
+            found = query.where(amenity_ids__all=["wifi", "pool"])
+            self.assertEqual(list(found), [self.places[0]])
+            found = query.where(amenity_ids__any=["pool", "sauna"],
+                                price_by_night__lt=100)
+            self.assertEqual(list(found), [self.places[2]])
+            found = query.where(amenity_ids__contains="wifi").order_by(
+                "-price_by_night")
+            self.assertEqual(list(found), self.places[:2])
+            self.assertEqual(list(query.where(amenity_ids__any=[])), [])
+            self.assertFalse(scan.called)
+
+    def test_ordered(self):
+        """the ordered indexes give ranges and the top of the order"""
+        query = self.strg.query(Place)
+        with mock.patch.object(self.strg, "all") as scan, \
+                mock.patch.object(self.strg, "between",
+                                  wraps=self.strg.between) as between:
+            top = query.order_by("-price_by_night").limit(2)
+            first, second = top
+            self.assertIs(first, self.places[0])
+            self.assertEqual(second.price_by_night, 80)
+            between.assert_called_with("Place", "price_by_night",
+                                       reverse=True, limit=2)
+            found = query.where(price_by_night__gt=50,
+                                price_by_night__le=80, name="Place 1")
+            self.assertEqual(list(found), [self.places[1]])
+            between.assert_called_with("Place", "price_by_night", gt=50,
+                                       le=80)
+            self.assertFalse(scan.called)
+
+    def test_ordered_unindexed(self):
+        """an order on an indexed attribute keeps the instances the index
+        doesn't hold, as the unindexed order does"""
+        self.places[3].price_by_night = None
+        query = self.strg.query(Place)
+        self.assertEqual(list(query.order_by("price_by_night")),
+                         [self.places[i] for i in (2, 1, 0, 3)])
+        self.assertEqual(list(query.order_by("-price_by_night")),
+                         [self.places[i] for i in (0, 1, 2, 3)])
+        self.assertEqual(list(query.order_by("price_by_night").limit(4))[3],
+                         self.places[3])
+        self.assertEqual(query.order_by("price_by_night").where(
+            name="Place 3").first(), self.places[3])
+        self.places[3].price_by_night = "cheap"
+        with self.assertRaises(ValueError):
+            list(query.order_by("price_by_night"))
+        self.places[3].price_by_night = True
+        self.assertEqual(list(query.order_by("price_by_night")),
+                         [self.places[i] for i in (3, 2, 1, 0)])
+
+    def test_lazy(self):
+        """nothing runs before the results are read"""
+        with mock.patch.object(self.strg, "all") as scan:
+            query = self.strg.query(City).where(name="Kano")
+            self.assertFalse(scan.called)
+            list(query)
+            self.assertTrue(scan.called)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""The ordered index test module"""
+from datetime import datetime
+from models.engine.ranges import SortedIndex
+import unittest
+
+
+class Obj:
+    """a stand-in for an instance"""
+
+    def __init__(self, id_):
+        """the instance of id_"""
+        self.id = id_
+
+
+class TestSortedIndex(unittest.TestCase):
+    """tests for the sorted indexes"""
+
+    def setUp(self):
+        """an index of prices"""
+        self.index = SortedIndex(int)
+        self.objs = [Obj(str(i)) for i in range(6)]
+        for obj, price in zip(self.objs, [50, 120, 80, 30, 80, 200]):
+            self.index.add(obj, price)
+
+    def ids(self, objs):
+        """the ids of objs"""
+        return [obj.id for obj in objs]
+
+    def test_between(self):
+        """ranges come sorted, by value then id"""
+        index = self.index
+        self.assertFalse(index.settled)
+        index.settle()
+        self.assertEqual(self.ids(index.between(ge=50, le=120)),
+                         ["0", "2", "4", "1"])
+        self.assertEqual(self.ids(index.between(gt=50, lt=120)), ["2", "4"])
+        self.assertEqual(self.ids(index.between(eq=80)), ["2", "4"])
+        self.assertEqual(self.ids(index.between(gt=79.5, le=80.0)),
+                         ["2", "4"])
+        self.assertEqual(self.ids(index.between(gt=30, lt=50)), [])
+        self.assertEqual(self.ids(index.between(gt=200)), [])
+        self.assertEqual(self.ids(index.between(ge=100, le=60)), [])
+        self.assertEqual(len(index.between()), 6)
+        with self.assertRaises(ValueError):
+            index.between(lt="100")
+
+    def test_top(self):
+        """the k lowest or highest"""
+        self.index.settle()
+        self.assertEqual(self.ids(self.index.between(limit=2)), ["3", "0"])
+        self.assertEqual(self.ids(self.index.between(reverse=True,
+                                                     limit=3)),
+                         ["5", "1", "4"])
+        self.assertEqual(self.ids(self.index.between(lt=80, reverse=True,
+                                                     limit=5)), ["0", "3"])
+
+    def test_changes(self):
+        """values move, and are dropped"""
+        index = self.index
+        index.add(self.objs[5], 10)
+        index.discard("1")
+        index.discard("9")
+        index.add(self.objs[0], "cheap")
+        index.settle()
+        self.assertEqual(len(index), 4)
+        self.assertEqual(self.ids(index.between()), ["5", "3", "2", "4"])
+        index.add(Obj("6"), 90)
+        index.settle()
+        self.assertEqual(self.ids(index.between(ge=85)), ["6"])
+        self.assertEqual(list(index.others), ["0"])
+        index.add(self.objs[0], 1)
+        self.assertEqual(index.others, {})
+
+    def test_types(self):
+        """an index takes the values of its type only"""
+        index = SortedIndex(datetime)
+        self.assertTrue(index.accepts(datetime.now()))
+        self.assertFalse(index.accepts(5))
+        self.assertTrue(self.index.accepts(5.5))
+        self.assertFalse(self.index.accepts(True))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""The serializers test module"""
+from datetime import datetime
+from models.engine.serializers import GzipCodec, codecs, convert, formats, \
+    load
+from models.place import Place
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+
+
+class TestSerializers(unittest.TestCase):
+    """tests for the snapshot formats"""
+
+    def setUp(self):
+        """a few records as to_dict() gives them"""
+        place = Place()
+        place.name = "Home"
+        place.amenity_ids = ["a", "b"]
+        place.price_by_night = 80
+        self.records = [("Place." + place.id, place.to_dict())]
+        self.records.append(("Place.x", dict(self.records[0][1], id="x")))
+
+    def tearDown(self):
+        """removes the scratch files"""
+        for path in ("fmt_test.json", "fmt_test.bin", "fmt_test.out"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def write(self, path, name):
+        """writes the records to path in the format name"""
+        fmt = formats[name]
+        data = fmt.dump(fmt.pack(key, attrs) for key, attrs in self.records)
+        with open(path, "w" if isinstance(data, str) else "wb") as f:
+            f.write(data)
+
+    def test_round_trip(self):
+        """each format reads back what it wrote, detected on its own"""
+        for name in formats:
+            with self.subTest(name):
+                self.write("fmt_test.bin", name)
+                records = list(load("fmt_test.bin"))
+                self.assertEqual([k for k, _ in records],
+                                 [k for k, _ in self.records])
+                attrs = records[0][1]
+                self.assertEqual(attrs["amenity_ids"], ["a", "b"])
+                self.assertEqual(attrs["__class__"], "Place")
+                created = attrs["created_at"]
+                if isinstance(created, datetime):
+                    created = created.isoformat()
+                self.assertEqual(created, self.records[0][1]["created_at"])
+
+    def test_pickle_compact(self):
+        """the binary format has integer times and no repeated class"""
+        self.write("fmt_test.bin", "pickle")
+        with open("fmt_test.bin", "rb") as f:
+            data = f.read()
+        self.assertTrue(data.startswith(formats["pickle"].magic))
+        self.assertEqual(data.count(b"Place"), 1)
+        names, rows = pickle.loads(data[len(formats["pickle"].magic):])
+        self.assertEqual(names, ["Place"])
+        self.assertIsInstance(rows[0][2], int)
+
+    def test_no_classes(self):
+        """a pickle referring to a class is refused"""
+        with open("fmt_test.bin", "wb") as f:
+            f.write(formats["pickle"].magic)
+            f.write(pickle.dumps((["Place"], [datetime.now()])))
+        with self.assertRaises(pickle.UnpicklingError):
+            list(load("fmt_test.bin"))
+
+    def test_convert(self):
+        """convert() goes from one format to the other and back"""
+        self.write("fmt_test.json", "json")
+        convert("fmt_test.json", "fmt_test.bin", "pickle")
+        convert("fmt_test.bin", "fmt_test.out", "json")
+        with open("fmt_test.json") as f, open("fmt_test.out") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_gzip(self):
+        """a compressed file of any format is read back, whatever follows
+        the compressed data"""
+        for name in formats:
+            with self.subTest(name):
+                self.write("fmt_test.json", name)
+                with open("fmt_test.json", "rb") as f:
+                    data = f.read()
+                packer = codecs["gzip"].compressor()
+                with open("fmt_test.bin", "wb") as f:
+                    f.write(packer.compress(data) + packer.flush())
+                    f.write(b"\n#sha256:00\n")
+                self.assertEqual(list(load("fmt_test.bin")),
+                                 list(load("fmt_test.json")))
+
+    def test_gzip_cut(self):
+        """a compressed file cut short is refused"""
+        self.write("fmt_test.json", "json")
+        with open("fmt_test.json", "rb") as f:
+            data = f.read()
+        packer = GzipCodec(level=1).compressor()
+        data = packer.compress(data) + packer.flush()
+        with open("fmt_test.bin", "wb") as f:
+            f.write(data[:len(data) // 2])
+        with self.assertRaises(ValueError):
+            list(load("fmt_test.bin"))
+
+    def test_utf8(self):
+        """JSON snapshots are read as UTF-8 whatever the locale"""
+        with open("fmt_test.json", "wb") as f:
+            f.write('{"Place.x": {"name": "Caf\u00e9"}}'.encode())
+        script = ("from models.engine.serializers import load; "
+                  "print(list(load('fmt_test.json'))[0][1]['name'] == "
+                  "'Caf\\u00e9')")
+        env = dict(os.environ, LC_ALL="C", PYTHONCOERCECLOCALE="0",
+                   PYTHONUTF8="0", HBNB_LAZY="1")
+        result = subprocess.run([sys.executable, "-c", script], env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), "True", result.stderr)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""The spatial index test module"""
+from models.engine.spatial import Grid, bounds, distance
+import unittest
+
+
+class Obj:
+    """a stand-in for a place"""
+
+    def __init__(self, id_):
+        """the place of id_"""
+        self.id = id_
+
+
+class TestGrid(unittest.TestCase):
+    """tests for the grid of places"""
+
+    def setUp(self):
+        """a few places around Lagos, and two on the antimeridian"""
+        self.grid = Grid()
+        self.spots = {"ikeja": (6.6018, 3.3515), "lekki": (6.4698, 3.5852),
+                      "yaba": (6.5095, 3.3711), "abuja": (9.0765, 7.3986),
+                      "fiji": (-17.7134, 179.9), "samoa": (-17.7, -179.95)}
+        for name, (lat, lon) in self.spots.items():
+            self.grid.add(Obj(name), lat, lon)
+
+    def ids(self, objs):
+        """the ids of objs"""
+        return [obj.id for obj in objs]
+
+    def test_distance(self):
+        """great-circle distances in km"""
+        self.assertAlmostEqual(distance(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(distance(*self.spots["ikeja"],
+                                        *self.spots["yaba"]), 10.49, places=2)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5), 111.195,
+                               places=2)
+
+    def test_bounds(self):
+        """the box around a radius"""
+        south, west, north, east = bounds(0, 0, 111.195)
+        self.assertAlmostEqual(north, 1, places=5)
+        self.assertTrue(1 <= east < 1.001)  # as wide as at 1 degree N
+        self.assertGreater(bounds(0, 179.9, 50)[1],
+                           bounds(0, 179.9, 50)[3])
+        self.assertEqual(bounds(89.9, 0, 50)[1::2], (-180, 180))
+
+    def test_near(self):
+        """places within a radius, the nearest first"""
+        self.assertEqual(self.ids(self.grid.near(6.6, 3.35, 15)),
+                         ["ikeja", "yaba"])
+        self.assertEqual(self.ids(self.grid.near(6.6, 3.35, 50)),
+                         ["ikeja", "yaba", "lekki"])
+        self.assertEqual(self.ids(self.grid.near(6.6, 3.35, 50, limit=1)),
+                         ["ikeja"])
+        self.assertEqual(self.ids(self.grid.near(-17.7, 180, 20)),
+                         ["samoa", "fiji"])
+        self.assertEqual(len(self.grid.near(0, 0, 20000)), 6)
+
+    def test_within(self):
+        """places within a bounding box"""
+        self.assertCountEqual(self.ids(self.grid.box(6, 3, 7, 4)),
+                              ["ikeja", "lekki", "yaba"])
+        self.assertCountEqual(self.ids(self.grid.box(-20, 179, -15, -179)),
+                              ["fiji", "samoa"])
+        self.assertCountEqual(self.ids(self.grid.box(-90, -180, 90, 180)),
+                              list(self.spots))
+
+    def test_changes(self):
+        """places move, and are dropped"""
+        self.grid.add(Obj("ikeja"), 9.07, 7.39)
+        self.grid.discard("yaba")
+        self.grid.add(Obj("lekki"), "6.4", 3.5)
+        self.assertEqual(len(self.grid), 4)
+        self.assertEqual(self.ids(self.grid.near(9.07, 7.39, 5)),
+                         ["ikeja", "abuja"])
+        self.assertEqual(self.grid.box(6, 3, 7, 4), [])
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""The models SQLiteStorage test module"""
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models.amenity import Amenity
+from models.city import City
+from models.engine.sqlite_storage import SQLiteStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import os
+import unittest
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """tests for the SQLiteStorage class"""
+
+    def setUp(self):
+        """makes a fresh database the storage of the models"""
+        self.strg = SQLiteStorage("sqlite_test.db")
+        self.strg.reload()
+        self.patch = patch("models.storage", self.strg)
+        self.patch.start()
+
+    def tearDown(self):
+        """drops the database"""
+        self.patch.stop()
+        self.strg.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.isfile("sqlite_test.db" + suffix):
+                os.remove("sqlite_test.db" + suffix)
+
+    def test_wal(self):
+        """the database runs in WAL mode"""
+        db = self.strg._SQLiteStorage__db
+        self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0],
+                         "wal")
+
+    def test_save_reload(self):
+        """saved objects come back after a reload"""
+        user = User()
+        user.first_name = "Betty"
+        state = State()
+        self.strg.save()
+        strg = SQLiteStorage("sqlite_test.db")
+        strg.reload()
+        self.assertEqual(strg.get(User, user.id).to_dict(), user.to_dict())
+        self.assertEqual(set(strg.all()),
+                         {"User." + user.id, "State." + state.id})
+        self.assertEqual(strg.count(State), 1)
+        strg.close()
+
+    def test_identity(self):
+        """an instance is only built once while it is in use"""
+        user = User()
+        self.strg.save()
+        self.assertIs(self.strg.get(User, user.id), user)
+        self.assertIs(self.strg.all(User)["User." + user.id], user)
+
+    def test_update_delete(self):
+        """updates and deletions are written as single rows"""
+        user, other = User(), User()
+        self.strg.save()
+        user.email = "a@b.c"
+        self.strg.delete(other)
+        self.strg.save()
+        strg = SQLiteStorage("sqlite_test.db")
+        strg.reload()
+        self.assertEqual(strg.get("User", user.id).email, "a@b.c")
+        self.assertIsNone(strg.get("User", other.id))
+        self.assertEqual(strg.count(), 1)
+        strg.close()
+
+    def test_related(self):
+        """foreign keys are looked up through their indexed columns"""
+        state = State()
+        city = City()
+        city.state_id = state.id
+        place = Place()
+        amenity = Amenity()
+        place.amenity_ids = [amenity.id]
+        review = Review()
+        review.place_id = place.id
+        self.assertEqual(state.cities, [city])
+        self.assertEqual(place.reviews, [review])
+        self.assertEqual(amenity.places, [place])
+        self.assertEqual(place.amenities, [amenity])
+        with self.assertRaises(ValueError):
+            self.strg.related(City, "name", "x")
+
+    def test_select(self):
+        """select filters on the stored attributes"""
+        cheap, dear = Place(), Place()
+        cheap.price_by_night = 40
+        dear.price_by_night = 400
+        self.assertEqual(self.strg.select(Place, price_by_night__lt=100),
+                         [cheap])
+        self.assertEqual(self.strg.select(Place), [cheap, dear])
+
+    def test_query(self):
+        """queries run over the SQLite storage too"""
+        city = City()
+        cheap = Place()
+        cheap.city_id = city.id
+        cheap.price_by_night = 50
+        dear = Place()
+        dear.city_id = city.id
+        dear.price_by_night = 150
+        self.strg.save()
+        query = self.strg.query(Place).where(city_id=city.id)
+        self.assertEqual([p.id for p in query.order_by("-price_by_night")],
+                         [dear.id, cheap.id])
+        self.assertEqual([p.id for p in query.where(price_by_night__lt=99)],
+                         [cheap.id])
+
+    def test_between(self):
+        """ranges and the top of an attribute, read from the database"""
+        places = [Place() for _ in range(3)]
+        for place, price in zip(places, [150, 50, 120]):
+            place.price_by_night = price
+        self.strg.save()
+        self.assertEqual([p.id for p in self.strg.between(
+            Place, "price_by_night", ge=50, lt=150)],
+            [places[1].id, places[2].id])
+        self.assertEqual([p.id for p in self.strg.between(
+            Place, "price_by_night", reverse=True, limit=1)], [places[0].id])
+        self.assertEqual(len(self.strg.between(
+            None, "updated_at", ge=places[0].created_at)), 3)
+        places[2].price_by_night = None
+        self.strg.save()
+        self.assertEqual([p.id for p in self.strg.unordered(
+            Place, "price_by_night")], [places[2].id])
+        self.assertEqual([p.id for p in self.strg.query(Place).order_by(
+            "price_by_night")], [places[1].id, places[0].id, places[2].id])
+
+    def test_near(self):
+        """places around a position, read from the database"""
+        ikeja, lekki, fiji = Place(), Place(), Place()
+        ikeja.latitude, ikeja.longitude = 6.6018, 3.3515
+        lekki.latitude, lekki.longitude = 6.4698, 3.5852
+        fiji.latitude, fiji.longitude = -17.7134, 179.9
+        self.strg.save()
+        self.assertEqual([p.id for p in self.strg.near(6.6, 3.35, 50)],
+                         [ikeja.id, lekki.id])
+        self.assertEqual([p.id for p in self.strg.within(-20, 179, -15,
+                                                         -179)], [fiji.id])
+
+    def test_search(self):
+        """reviews ranked by their words, read from the database"""
+        calm, loud = Review(), Review()
+        calm.text = "Quiet and clean"
+        loud.text = "Noisy but clean"
+        self.strg.save()
+        self.assertEqual([r.id for r in self.strg.search(Review, "quiet")],
+                         [calm.id])
+
+    def test_having(self):
+        """places holding amenities, read from the link table"""
+        both, one = Place(), Place()
+        both.amenity_ids = ["wifi", "pool"]
+        one.amenity_ids = ["wifi"]
+        self.strg.save()
+        having = self.strg.having
+        self.assertEqual([p.id for p in having(Place, "amenity_ids",
+                                               ["wifi", "pool"])], [both.id])
+        self.assertCountEqual([p.id for p in having(
+            Place, "amenity_ids", any_of=["pool", "wifi"])],
+            [both.id, one.id])
+        self.assertEqual(having(Place, "amenity_ids", any_of=[]), [])
+        with self.assertRaises(ValueError):
+            having(Place, "city_id", ["x"])
+
+    def test_close(self):
+        """close() only closes the database, opened again by the next use,
+        as the console does between commands"""
+        user = User()
+        self.strg.save()
+        self.strg.close()
+        self.assertIs(self.strg.get(User, user.id), user)
+        city = City()
+        self.strg.close()
+        self.strg.save()
+        self.assertEqual(self.strg.count(), 2)
+        with patch("console.storage", self.strg), \
+                patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("quit")
+            HBNBCommand().onecmd("count City")
+        self.assertEqual(f.getvalue().split(), ["1"])
+        self.assertIn("City." + city.id, self.strg.all(City))
+
+    def test_batch(self):
+        """a batch commits once, or rolls the transaction back"""
+        with self.strg.batch():
+            user = User()
+            user.save()
+            City().save()
+        self.assertEqual(self.strg.count(), 2)
+        with self.assertRaises(KeyError):
+            with self.strg.batch():
+                State().save()
+                self.strg.delete(user)
+                self.strg.save()
+                raise KeyError("oops")
+        self.assertEqual(self.strg.count(State), 0)
+        self.assertEqual(self.strg.get(User, user.id).id, user.id)
+
+    def test_console(self):
+        """the console works on top of the SQLite storage"""
+        with patch("console.storage", self.strg), \
+                patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("create City")
+            id_ = f.getvalue().strip()
+            HBNBCommand().onecmd('update City {} name "Kano"'.format(id_))
+            HBNBCommand().onecmd("count City")
+            HBNBCommand().onecmd("destroy City {}".format(id_))
+            HBNBCommand().onecmd("count City")
+        self.assertEqual(f.getvalue().split(), [id_, "1", "0"])
+        self.assertIsNone(self.strg.get(City, id_))
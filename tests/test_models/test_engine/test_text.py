@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""The full-text index test module"""
+from models.engine.text import TextIndex, words
+import unittest
+
+
+class Obj:
+    """a stand-in for an instance"""
+
+    def __init__(self, id_):
+        """the instance of id_"""
+        self.id = id_
+
+
+class TestTextIndex(unittest.TestCase):
+    """tests for the inverted index"""
+
+    def setUp(self):
+        """a few reviews"""
+        self.index = TextIndex()
+        texts = {"a": "Quiet and clean, would stay again.",
+                 "b": "Noisy street, but clean rooms.",
+                 "c": "Quiet, quiet, QUIET! Perfect for sleeping.",
+                 "d": "Great host."}
+        for id_, text in texts.items():
+            self.index.add(Obj(id_), text)
+
+    def ids(self, objs):
+        """the ids of objs"""
+        return [obj.id for obj in objs]
+
+    def test_words(self):
+        """texts are split into lowercase words"""
+        self.assertEqual(words("Quiet, clean & café-like"),
+                         ["quiet", "clean", "café", "like"])
+
+    def test_search(self):
+        """the instances holding the words, the most relevant first"""
+        self.assertEqual(self.ids(self.index.search("quiet")), ["c", "a"])
+        self.assertEqual(self.ids(self.index.search("quiet clean")),
+                         ["a", "c", "b"])
+        self.assertEqual(self.ids(self.index.search("QUIET", limit=1)),
+                         ["c"])
+        self.assertEqual(self.index.search("pool"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_changes(self):
+        """texts change, and are dropped"""
+        self.index.add(Obj("d"), "So quiet")
+        self.index.discard("c")
+        self.index.discard("x")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.ids(self.index.search("quiet")), ["d", "a"])
+        self.assertEqual(self.index.search("host perfect"), [])
+        self.assertNotIn("host", self.index.postings)
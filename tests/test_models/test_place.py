@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """Models place test module"""
-from models.place import Place
+from models.place import OwnList, Place
 from models.base_model import BaseModel
+from models.review import Review
+from models.amenity import Amenity
 import unittest
 
 
@@ -99,3 +101,55 @@ class TestPlaceClass(unittest.TestCase):
         place = Place()
         string = "[Place] ({}) {}".format(place.id, place.__dict__)
         self.assertEqual(string, str(place))
+
+    def test_reviews(self):
+        """test the reviews of a place follow Review.place_id"""
+        place = Place()
+        review = Review()
+        review.place_id = place.id
+        self.assertEqual(place.reviews, [review])
+
+    def test_amenities(self):
+        """test the amenities of a place are looked up from amenity_ids"""
+        place = Place()
+        amenity = Amenity()
+        place.amenity_ids = [amenity.id, "missing"]
+        self.assertEqual(place.amenities, [amenity])
+
+    def test_amenity_ids_owned(self):
+        """test each place gets an amenity_ids list of its own"""
+        place, other = Place(), Place()
+        place.amenity_ids.append("wifi")
+        self.assertEqual(place.amenity_ids, ["wifi"])
+        self.assertEqual(other.amenity_ids, [])
+        self.assertIsInstance(Place.amenity_ids, OwnList)
+        self.assertNotIn("amenity_ids", other.__dict__)
+        self.assertEqual(Place().to_dict().get("amenity_ids", []), [])
+
+    def test_amenity_ids_in_place(self):
+        """test changing amenity_ids in place flags the place as changed"""
+        place = Place()
+        amenity = Amenity()
+        place.amenity_ids.append(amenity.id)
+        self.assertEqual(amenity.places, [place])
+        ids = place.amenity_ids
+        ids.remove(amenity.id)
+        self.assertEqual(amenity.places, [])
+        ids += [amenity.id]
+        self.assertEqual(amenity.places, [place])
+        place.amenity_ids = []
+        ids.append("stale")
+        self.assertEqual(place.amenity_ids, [])
+        self.assertEqual(amenity.places, [])
+
+    def test_amenity_ids_sort(self):
+        """test the list methods taking keywords take them on amenity_ids"""
+        place = Place()
+        place.amenity_ids.extend(["b", "c", "a"])
+        place.amenity_ids.sort(reverse=True)
+        self.assertEqual(place.amenity_ids, ["c", "b", "a"])
+        place.amenity_ids.sort(key=str)
+        self.assertEqual(place.amenity_ids, ["a", "b", "c"])
+        ids = Place().amenity_ids
+        ids.sort(reverse=True)
+        self.assertEqual(ids, [])
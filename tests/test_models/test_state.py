@@ -2,6 +2,7 @@
 """Models state test module"""
 from models.state import State
 from models.base_model import BaseModel
+from models.city import City
 import unittest
 
 
@@ -39,3 +40,13 @@ class TestStateClass(unittest.TestCase):
         state = State()
         string = "[State] ({}) {}".format(state.id, state.__dict__)
         self.assertEqual(string, str(state))
+
+    def test_cities(self):
+        """test the cities of a state follow City.state_id"""
+        state = State()
+        city = City()
+        self.assertEqual(state.cities, [])
+        city.state_id = state.id
+        self.assertEqual(state.cities, [city])
+        city.state_id = "elsewhere"
+        self.assertEqual(state.cities, [])
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Timestamps test module"""
+from datetime import datetime, timedelta, timezone
+from models import timestamps
+from models.base_model import BaseModel
+from models.compact import compact
+from models.timestamps import from_micros, isoformat, parse, to_micros
+import unittest
+from unittest import mock
+
+
+class TestTimestamps(unittest.TestCase):
+    """tests for the cached timestamp conversions"""
+
+    def test_parse(self):
+        """equal texts give the same datetime"""
+        text = "2017-09-28T21:03:54.052302"
+        value = parse(text)
+        self.assertEqual(value, datetime.fromisoformat(text))
+        self.assertIs(parse("".join(text)), value)
+
+    def test_isoformat(self):
+        """equal datetimes give the same text"""
+        value = datetime.now()
+        text = isoformat(value)
+        self.assertEqual(text, value.isoformat())
+        self.assertIs(isoformat(value.replace()), text)
+
+    def test_isoformat_aware(self):
+        """aware datetimes keep their own offset, equal as they are"""
+        utc = datetime(2017, 9, 28, 20, 0, tzinfo=timezone.utc)
+        wat = utc.astimezone(timezone(timedelta(hours=1)))
+        self.assertEqual(isoformat(utc), "2017-09-28T20:00:00+00:00")
+        self.assertEqual(isoformat(wat), "2017-09-28T21:00:00+01:00")
+
+    def test_micros(self):
+        """microseconds convert back and forth"""
+        value = datetime(2017, 9, 28, 21, 3, 54, 52302)
+        self.assertEqual(from_micros(to_micros(value)), value)
+        self.assertIs(from_micros(to_micros(value)),
+                      from_micros(to_micros(value)))
+        self.assertIs(to_micros(value), to_micros(value.replace()))
+
+    def test_limit(self):
+        """a full cache starts over"""
+        with mock.patch.object(timestamps, "LIMIT", 2):
+            for day in range(1, 6):
+                parse("2017-09-0{}T00:00:00".format(day))
+                to_micros(datetime(2017, 9, day))
+            self.assertLessEqual(len(timestamps._parsed), 2)
+            self.assertLessEqual(len(timestamps._ints), 2)
+
+    def test_shared(self):
+        """instances saved together share their timestamps"""
+        dic = BaseModel().to_dict()
+        first, second = BaseModel.from_records([dic, dict(dic, id="x")])
+        self.assertIs(first.created_at, second.created_at)
+        self.assertIs(first.to_dict()["updated_at"],
+                      second.to_dict()["updated_at"])
+
+    def test_shared_compact(self):
+        """compact instances saved together share their timestamps too"""
+        dic = BaseModel().to_dict()
+        first, second = compact(BaseModel).from_records(
+            [dic, dict(dic, id="x")])
+        self.assertIs(first._created, second._created)
+        self.assertIs(first._updated, second._updated)
@@ -2,6 +2,8 @@
 """Models user test module"""
 from models.user import User
 from models.base_model import BaseModel
+from models.review import Review
+from models.place import Place
 import unittest
 
 
@@ -66,3 +68,12 @@ class TestUserClass(unittest.TestCase):
         user = User()
         string = "[User] ({}) {}".format(user.id, user.__dict__)
         self.assertEqual(string, str(user))
+
+    def test_places_reviews(self):
+        """test the places and reviews of a user follow their user_id"""
+        user = User()
+        place, review = Place(), Review()
+        place.user_id = user.id
+        review.user_id = user.id
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])